@@ -0,0 +1,379 @@
+"""
+End-to-end crawler benchmark against a local fixture site.
+
+Starts an HTTP server that serves synthetic AZ-list pages
+(/az-list/all?page=N), series pages listing their episodes (/watch/<slug>)
+and episode pages (/watch/<slug>/ep-<n>, 404 past the last episode), with configurable latency, error rate, page size and series
+lengths. Then runs crawl_anime_az_list and enrich_anime_with_iframes against
+it through BASE_URL / WATCH_BASE_URL, each stage in its own process with its
+output in a temporary directory, and reports pages/s, p50/p99 response
+latency (as seen by the server), CPU time and peak RSS per stage.
+
+Everything is derived from --seed, so two runs serve the same site and only
+the crawler differs.
+
+Usage:
+    python benchmarks/bench_crawl.py [--pages 20] [--per-page 40] [--episodes 1-24]
+        [--latency 0.05] [--error-rate 0] [--stages list,iframes] [--workers 4]
+"""
+import argparse
+import asyncio
+import csv
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+WORDS = [
+    "academy", "blade", "dragon", "garden", "hero", "kaisen", "night", "shadow",
+    "sky", "spring", "story", "summer", "sword", "tokyo", "villain", "winter",
+]
+FILLER = '<div class="film-detail-extra" style="display:none">{}</div>\n'
+
+
+class FixtureSite:
+    """
+    The synthetic site: page content, series lengths and injected faults.
+
+    Args:
+        pages (int): Number of AZ-list pages.
+        per_page (int): Animes per AZ-list page.
+        episodes (Tuple[int, int]): Range of series lengths (inclusive).
+        latency (float): Mean seconds added to every response.
+        jitter (float): Latency varies by +/- this fraction of the mean.
+        error_rate (float): Fraction of requests answered with a 503.
+        page_kb (int): Pad pages to about this many KiB of HTML.
+        seed (int): Seed for titles, series lengths and fault injection.
+    """
+
+    def __init__(
+        self,
+        pages: int,
+        per_page: int,
+        episodes: Tuple[int, int],
+        latency: float,
+        jitter: float,
+        error_rate: float,
+        page_kb: int,
+        seed: int,
+    ):
+        self.pages = pages
+        self.per_page = per_page
+        self.episodes = episodes
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.page_kb = page_kb
+        self.seed = seed
+        self.host = ""
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.log: List[Tuple[str, int, float]] = []  # (kind, status, seconds)
+
+    def title(self, index: int) -> str:
+        rng = random.Random(self.seed * 1000003 + index)
+        return " ".join(word.capitalize() for word in rng.sample(WORDS, 3)) + f" {index}"
+
+    def slug(self, index: int) -> str:
+        return self.title(index).lower().replace(" ", "-")
+
+    def episode_count(self, slug: str) -> int:
+        low, high = self.episodes
+        return low + zlib.crc32(f"{self.seed}:{slug}".encode()) % (high - low + 1)
+
+    def _pad(self, body: str) -> str:
+        missing = self.page_kb * 1024 - len(body)
+        if missing <= 0:
+            return body
+        line = " ".join(WORDS) + " "
+        return body + FILLER.format(line * (missing // len(line) + 1))
+
+    def _document(self, title: str, body: str) -> str:
+        return (
+            f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n'
+            f'</head>\n<body>\n{self._pad(body)}</body>\n</html>\n'
+        )
+
+    def az_list_page(self, page: int) -> str:
+        items = []
+        if 1 <= page <= self.pages:
+            for index in range((page - 1) * self.per_page, page * self.per_page):
+                href = f"{self.host}/watch/{self.slug(index)}"
+                items.append(
+                    f'<div class="flw-item"><h3 class="film-name"><a href="{href}" class="dynamic-name">'
+                    f'{self.title(index)}<div class="fd-infor"><span class="fdi-item">TV</span>'
+                    f'<span class="fdi-item">{self.episode_count(self.slug(index))} Eps</span></div></a></h3></div>\n'
+                )
+        pagination = "".join(
+            f'<li><a href="/az-list/all?page={number}">{number}</a></li>' for number in range(1, self.pages + 1)
+        )
+        body = (
+            f'<div class="film_list-wrap">\n{"".join(items)}</div>\n'
+            f'<nav><ul class="pagination">{pagination}</ul></nav>\n'
+        )
+        return self._document("A-Z List", body)
+
+    def embed_url(self, slug: str, episode: int) -> str:
+        return f"https://megacloud.example.tv/embed-2/e-1/{zlib.crc32(f'{slug}/{episode}'.encode()):08x}?k=1"
+
+    def series_page(self, slug: str) -> str:
+        items = "".join(
+            f'<li><a href="{self.host}/watch/{slug}/ep-{episode}" class="ep-item" data-number="{episode}" '
+            f'data-embed="{self.embed_url(slug, episode)}">Episode {episode}</a></li>\n'
+            for episode in range(1, self.episode_count(slug) + 1)
+        )
+        body = f'<div id="wrapper" data-anime-id="{zlib.crc32(slug.encode())}">\n<ul class="ep-list">\n{items}</ul>\n</div>\n'
+        return self._document(f"Watch {slug}", body)
+
+    def episode_page(self, slug: str, episode: int) -> Optional[str]:
+        if not 1 <= episode <= self.episode_count(slug):
+            return None
+        embed = self.embed_url(slug, episode)
+        body = (
+            f'<link rel="canonical" href="{self.host}/watch/{slug}/ep-{episode}">\n'
+            f'<div id="iframe-embed"><iframe src="{embed}" allowfullscreen></iframe></div>\n'
+        )
+        return self._document(f"Watch {slug} Episode {episode}", body)
+
+    def delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency * (1 + self._random.uniform(-self.jitter, self.jitter)))
+
+    def inject_error(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def record(self, kind: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self.log.append((kind, status, seconds))
+
+    def take_log(self) -> List[Tuple[str, int, float]]:
+        with self._lock:
+            log, self.log = self.log, []
+        return log
+
+
+def make_handler(site: FixtureSite):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            start = time.perf_counter()
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            kind, body = "other", None
+            if parts == ["az-list", "all"]:
+                kind = "az_list"
+                page = parse_qs(url.query).get("page", ["1"])[0]
+                body = site.az_list_page(int(page) if page.isdigit() else 1)
+            elif len(parts) == 2 and parts[0] == "watch":
+                kind = "series"
+                body = site.series_page(parts[1])
+            elif len(parts) == 3 and parts[0] == "watch" and parts[2].startswith("ep-"):
+                kind = "episode"
+                episode = parts[2][3:]
+                body = site.episode_page(parts[1], int(episode) if episode.isdigit() else 0)
+
+            time.sleep(site.delay())
+            if site.inject_error():
+                status, body = 503, "<html><body>Service Unavailable</body></html>"
+            elif body is None:
+                status, body = 404, "<html><body>Not Found</body></html>"
+            else:
+                status = 200
+
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            site.record(kind, status, time.perf_counter() - start)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return FixtureHandler
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# CSV each stage writes in the work directory
+STAGE_OUTPUTS = {"list": "anime_az_list.csv", "iframes": "anime_az_list_with_iframes.csv"}
+
+
+def run_stage(stage: str, work_dir: str, args: argparse.Namespace) -> None:
+    """
+    Runs one crawl stage; called in a fresh process so config picks up the
+    fixture URLs.
+
+    Raises:
+        RuntimeError: The stage wrote no output rows. The crawlers log and
+            swallow their errors (e.g. a browser that fails to start), so
+            this is what turns a broken run into a failed one.
+    """
+    if not args.verbose:
+        sys.stdout = open(os.devnull, "w")
+    az_list_csv = os.path.join(work_dir, "anime_az_list.csv")
+    if stage == "list":
+        from main_az_list import crawl_anime_az_list
+
+        asyncio.run(crawl_anime_az_list(concurrency=args.concurrency, csv_file=az_list_csv))
+    else:
+        from fetch_iframes import enrich_anime_with_iframes
+        from utils.framed_jsonl import jsonl_output_path
+
+        asyncio.run(enrich_anime_with_iframes(
+            csv_input_file=az_list_csv,
+            csv_output_file=os.path.join(work_dir, "anime_az_list_with_iframes.csv"),
+            json_output_file=jsonl_output_path(os.path.join(work_dir, "anime_az_list_with_iframes.jsonl")),
+            workers=args.workers,
+            discovery=args.discovery,
+            range_workers=args.range_workers,
+        ))
+
+    if not count_rows(os.path.join(work_dir, STAGE_OUTPUTS[stage])):
+        raise RuntimeError(f"The {stage} stage wrote no output rows (run with --verbose to see the crawler's errors)")
+
+
+def write_az_list(site: FixtureSite, path: str) -> None:
+    # Input for an "iframes" run without a "list" stage before it
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["title", "slug", "watch_url"])
+        writer.writeheader()
+        for index in range(site.pages * site.per_page):
+            slug = site.slug(index)
+            writer.writerow({"title": site.title(index), "slug": slug, "watch_url": f"{site.host}/watch/{slug}"})
+
+
+def count_rows(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+def report(stage: str, site: FixtureSite, wall: float, cpu: float, peak_rss_kb: int, rows: int) -> int:
+    """Prints a stage's numbers; returns the number of requests it made."""
+    log = site.take_log()
+    latencies = [seconds for _, _, seconds in log]
+    statuses: Dict[int, int] = {}
+    for _, status, _ in log:
+        statuses[status] = statuses.get(status, 0) + 1
+    served = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+
+    print(f"\n{stage}")
+    print(f"  requests      {len(log)} ({served or 'none'})")
+    print(f"  wall time     {wall:.2f}s")
+    print(f"  pages/s       {len(log) / wall if wall else 0:.1f}")
+    print(f"  latency p50   {percentile(latencies, 0.50) * 1000:.1f}ms")
+    print(f"  latency p99   {percentile(latencies, 0.99) * 1000:.1f}ms")
+    print(f"  CPU           {cpu:.2f}s ({cpu / wall * 100 if wall else 0:.0f}% of one core)")
+    print(f"  peak RSS      {peak_rss_kb / 1024:.0f} MiB (largest process)")
+    print(f"  output rows   {rows}")
+    return len(log)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the crawlers against a local fixture site.")
+    parser.add_argument("--pages", type=int, default=20, help="AZ-list pages")
+    parser.add_argument("--per-page", type=int, default=40, help="Animes per AZ-list page")
+    parser.add_argument("--episodes", default="1-24", help="Series length range, e.g. 1-24")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Latency jitter as a fraction of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--page-kb", type=int, default=30, help="Pad pages to about this many KiB")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the site content and faults")
+    parser.add_argument("--stages", default="list,iframes", help="Comma-separated stages: list, iframes")
+    parser.add_argument("--concurrency", type=int, default=4, help="AZ-list pages fetched in parallel")
+    parser.add_argument("--workers", type=int, default=4, help="Animes fetched in parallel")
+    parser.add_argument("--discovery", choices=["linear", "gallop", "series"], default="gallop")
+    parser.add_argument("--range-workers", type=int, default=4)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0,
+        help="Start and cap the rate limiter at this many requests/s (default: config values)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show the crawlers' output")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - {"list", "iframes"}
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    low, _, high = args.episodes.partition("-")
+    episodes = (int(low), int(high or low))
+
+    site = FixtureSite(
+        args.pages, args.per_page, episodes, args.latency, args.jitter, args.error_rate, args.page_kb, args.seed
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(site))
+    server.daemon_threads = True
+    site.host = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Inherited by the stage processes, read by config at import
+    os.environ["BASE_URL"] = f"{site.host}/az-list/all"
+    os.environ["WATCH_BASE_URL"] = f"{site.host}/watch"
+    os.environ["PAGE_CACHE"] = "false"
+    if args.rate > 0:
+        os.environ["RATE_LIMIT_INITIAL"] = os.environ["RATE_LIMIT_MAX"] = str(args.rate)
+
+    print(
+        f"Fixture site at {site.host}: {args.pages} pages x {args.per_page} animes, "
+        f"{episodes[0]}-{episodes[1]} episodes, {args.latency * 1000:.0f}ms latency, "
+        f"{args.error_rate:.0%} errors, ~{args.page_kb} KiB pages"
+    )
+
+    context = multiprocessing.get_context("spawn")
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="bench_crawl_") as work_dir:
+        if "list" not in stages:
+            write_az_list(site, os.path.join(work_dir, "anime_az_list.csv"))
+
+        for stage in stages:
+            before = resource.getrusage(resource.RUSAGE_CHILDREN)
+            start = time.perf_counter()
+            process = context.Process(target=run_stage, args=(stage, work_dir, args))
+            process.start()
+            process.join()
+            wall = time.perf_counter() - start
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+            cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+            rows = count_rows(os.path.join(work_dir, STAGE_OUTPUTS[stage]))
+            # ru_maxrss for children is the largest of any waited-for process so far
+            requests = report(stage, site, wall, cpu, after.ru_maxrss, rows)
+            if process.exitcode != 0:
+                print(f"  exit code     {process.exitcode}")
+                failed = True
+            if not requests or not rows:
+                # Not a measurement: the crawl never reached the site or saved nothing
+                print(f"  FAILED        {'no requests reached the site' if not requests else 'no output rows'}")
+                failed = True
+
+    server.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark and equivalence check for the HTML extractor backends.
+
+Runs every extraction function of every backend over the saved fixture pages,
+checks the results match the bs4 reference backend and prints the mean parse
+time per page.
+
+Usage:
+    python benchmarks/bench_extractors.py [--repeat 50] [fixture.html ...]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from utils.extractor_backends import BACKENDS  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT_DIR, "benchmarks", "fixtures")
+FUNCTIONS = ["iframe_src", "all_iframes", "canonical_url", "anime_links"]
+
+
+def time_call(func, html_content: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html_content)
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the HTML extractor backends.")
+    parser.add_argument("fixtures", nargs="*", help="HTML files (default: benchmarks/fixtures/*.html)")
+    parser.add_argument("--repeat", type=int, default=50, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    fixtures = args.fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+    reference = BACKENDS["bs4"]
+    mismatches = 0
+
+    for path in fixtures:
+        with open(path, "r", encoding="utf-8") as f:
+            html_content = f.read()
+        print(f"\n{os.path.basename(path)} ({len(html_content) / 1024:.0f} KiB)")
+        print(f"  {'function':<14}" + "".join(f"{name:>12}" for name in BACKENDS))
+
+        for function in FUNCTIONS:
+            expected = getattr(reference, function)(html_content)
+            row = f"  {function:<14}"
+            for name, backend in BACKENDS.items():
+                func = getattr(backend, function)
+                if func(html_content) != expected:
+                    mismatches += 1
+                    print(f"  MISMATCH: {name}.{function} differs from bs4")
+                row += f"{time_call(func, html_content, args.repeat) * 1000:>10.3f}ms"
+            print(row)
+
+    print(f"\n{mismatches} mismatches against the bs4 reference backend.")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
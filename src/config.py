@@ -1,6 +1,14 @@
 # config.py
+import os
 
-BASE_URL = "https://hianimez.live/az-list/all"
+from dotenv import load_dotenv
+
+# Read .env before any setting below, so every entry point sees it
+load_dotenv()
+
+# AZ-list URL; point it (and WATCH_BASE_URL, read by fetch_iframes.py) at another
+# host to crawl a mirror or the local fixture site in benchmarks/bench_crawl.py
+BASE_URL = os.getenv("BASE_URL", "https://hianimez.live/az-list/all")
 CSS_SELECTOR = "div[class*='item'], article, section[class*='anime']"  # Adjust based on actual structure
 CANONICAL_SELECTOR = "link[rel='canonical']"  # Select canonical link
 REQUIRED_KEYS = [
@@ -15,3 +23,156 @@ OPTIONAL_KEYS = [
     # "description",
     "watch_url",
 ]
+
+# AZ-list pages fetched in parallel by main_az_list.py (1 = sequential crawl)
+AZ_LIST_CONCURRENCY = int(os.getenv("AZ_LIST_CONCURRENCY", "1"))
+# In the parallel crawl, a page that fails or comes back empty is queued again
+# up to AZ_LIST_PAGE_RETRIES times
+AZ_LIST_PAGE_RETRIES = int(os.getenv("AZ_LIST_PAGE_RETRIES", "2"))
+
+# Number of animes fetched in parallel by fetch_iframes.py (each gets its own browser session)
+IFRAME_WORKERS = int(os.getenv("IFRAME_WORKERS", "1"))
+
+# Episode discovery: "linear" probes ep-1, ep-2, ...; "gallop" finds the last
+# episode with exponential + binary search, then fetches the range; "series"
+# reads the episode list (and player URLs) from the series' watch page
+EPISODE_DISCOVERY = os.getenv("EPISODE_DISCOVERY", "linear")
+# Concurrent episode fetches per anime once the range is known (gallop / series mode)
+EPISODE_RANGE_WORKERS = int(os.getenv("EPISODE_RANGE_WORKERS", "4"))
+# Episode list endpoint for series pages that build their list in JavaScript,
+# e.g. "https://example.com/ajax/episode/list/{id}" ({slug}; {id} is the page's
+# data-anime-id / data-series-id); empty to only read the series page
+EPISODE_LIST_URL = os.getenv("EPISODE_LIST_URL", "")
+
+# Try a plain pooled HTTP fetch before rendering a page in Chromium; the browser
+# is only used when nothing useful can be extracted from the raw HTML
+HTTP_FAST_PATH = os.getenv("HTTP_FAST_PATH", "true").lower() in ("1", "true", "yes")
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+)
+
+# fetch_iframes.py --update skips animes whose last_checked is more recent than this
+UPDATE_RECHECK_HOURS = float(os.getenv("UPDATE_RECHECK_HOURS", "24"))
+
+# HTML extraction engine: "bs4" (BeautifulSoup + html.parser), "stream" (regex tag
+# scanner that stops at the first match) or "lxml" (falls back to "stream" if missing)
+EXTRACTOR_BACKEND = os.getenv("EXTRACTOR_BACKEND", "bs4")
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Where crawl state and output live: "files" (CSV / JSONL) or "sqlite" (WAL
+# database at SQLITE_DB_PATH; CSV / JSONL are produced with export_store.py)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "files")
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(DATA_DIR, "crawl.db"))
+
+# Requests to the site are paced by an adaptive token bucket (AIMD): the rate in
+# requests/s grows by RATE_LIMIT_INCREASE per second while responses are healthy
+# and is multiplied by RATE_LIMIT_DECREASE on errors or responses slower than
+# RATE_LIMIT_LATENCY_TARGET seconds. Cached pages aren't paced.
+RATE_LIMIT_INITIAL = float(os.getenv("RATE_LIMIT_INITIAL", "2"))
+RATE_LIMIT_MIN = float(os.getenv("RATE_LIMIT_MIN", "0.2"))
+RATE_LIMIT_MAX = float(os.getenv("RATE_LIMIT_MAX", "20"))
+RATE_LIMIT_INCREASE = float(os.getenv("RATE_LIMIT_INCREASE", "0.2"))
+RATE_LIMIT_DECREASE = float(os.getenv("RATE_LIMIT_DECREASE", "0.5"))
+RATE_LIMIT_LATENCY_TARGET = float(os.getenv("RATE_LIMIT_LATENCY_TARGET", "5"))
+
+# Transient failures (timeouts, 5xx, 429, navigation errors) are retried with
+# jittered exponential backoff; after CIRCUIT_BREAKER_THRESHOLD consecutive
+# failures against a host, all requests to it pause for the cooldown, which
+# doubles (up to the max) while the host keeps failing
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "3"))
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "1"))
+RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "30"))
+CIRCUIT_BREAKER_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", "5"))
+CIRCUIT_BREAKER_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN", "60"))
+CIRCUIT_BREAKER_MAX_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_MAX_COOLDOWN", "600"))
+
+# Distributed crawl (fetch_iframes.py --coordinator / --worker): shared SQLite
+# work queue, lease length (kept alive by heartbeats) and leases per slug
+# before it is marked failed
+WORK_QUEUE_PATH = os.getenv("WORK_QUEUE_PATH", os.path.join(DATA_DIR, "work_queue.db"))
+WORK_QUEUE_LEASE_SECONDS = float(os.getenv("WORK_QUEUE_LEASE_SECONDS", "300"))
+WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "5"))
+
+# HTML bigger than PARSE_INLINE_BYTES characters is parsed in a pool of
+# PARSE_WORKERS processes so parsing doesn't block the event loop (0 = inline)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+PARSE_INLINE_BYTES = int(os.getenv("PARSE_INLINE_BYTES", str(32 * 1024)))
+
+# Metrics (per-stage timings, request / page counters, queue depths) in the
+# Prometheus text format: served at http://127.0.0.1:METRICS_PORT/metrics
+# (0 = off) and/or rewritten to METRICS_TEXTFILE every METRICS_INTERVAL seconds
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")
+METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "15"))
+
+# --profile writes cProfile stats, sampled stacks (every PROFILE_SAMPLE_INTERVAL
+# seconds) and a summary to PROFILE_DIR
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# clean_iframes_data.py cleans JSONL in CLEAN_CHUNK_BYTES ranges on
+# CLEAN_WORKERS processes (0 = one per core)
+CLEAN_WORKERS = int(os.getenv("CLEAN_WORKERS", "0"))
+CLEAN_CHUNK_BYTES = int(os.getenv("CLEAN_CHUNK_BYTES", str(16 * 1024**2)))
+# clean_csv.py / clean_iframes_data.py drop rows repeating an earlier row's slug
+# when CLEAN_DROP_DUPLICATES is on (off: every row is kept)
+CLEAN_DROP_DUPLICATES = os.getenv("CLEAN_DROP_DUPLICATES", "false").lower() in ("1", "true", "yes")
+
+# Lean browser profile: pages are rendered without the resource types in
+# LEAN_BLOCKED_TYPES, child frames (the video player behind an episode iframe)
+# or requests to LEAN_BLOCKED_HOSTS (and their subdomains), with media autoplay
+# off. LEAN_BROWSER=false renders pages in full.
+LEAN_BROWSER = os.getenv("LEAN_BROWSER", "true").lower() in ("1", "true", "yes")
+LEAN_BLOCKED_TYPES = os.getenv("LEAN_BLOCKED_TYPES", "image,media,font,stylesheet,texttrack,manifest").split(",")
+LEAN_BLOCKED_HOSTS = os.getenv(
+    "LEAN_BLOCKED_HOSTS",
+    "doubleclick.net,googlesyndication.com,googleadservices.com,google-analytics.com,googletagmanager.com,"
+    "amazon-adsystem.com,adnxs.com,criteo.com,taboola.com,outbrain.com,popads.net,propellerads.com,"
+    "adsterra.com,histats.com,scorecardresearch.com,facebook.net,hotjar.com,disqus.com,cloudflareinsights.com",
+).split(",")
+
+# Browser renders end as soon as the element a scraper reads (WAIT_SELECTORS,
+# per page kind) is in the DOM: navigation only waits for the response to start
+# (RENDER_WAIT_UNTIL). A page that finished loading RENDER_SETTLE_MS ago without
+# it counts as not found; one that neither loaded nor showed it within
+# RENDER_TIMEOUT_MS counts as a timeout, which is retried.
+RENDER_WAIT_UNTIL = os.getenv("RENDER_WAIT_UNTIL", "commit")
+RENDER_TIMEOUT_MS = int(os.getenv("RENDER_TIMEOUT_MS", "10000"))
+RENDER_SETTLE_MS = int(os.getenv("RENDER_SETTLE_MS", "500"))
+WAIT_SELECTORS = {
+    "episode": 'iframe[src*="https://"]',
+    "az_list": 'a[href*="/watch/"]',
+    "series": 'a[href*="/ep-"], [data-number], [data-embed]',
+}
+
+# Episode JSONL outputs (fetch_iframes.py, sync_csv_to_jsonl.py,
+# clean_iframes_data.py) are written as compressed frames when
+# JSONL_COMPRESSION is "gzip" or "zstd" (needs the zstandard package), to
+# "<name>.jsonl.gz" / "<name>.jsonl.zst". Records are buffered into frames of
+# JSONL_FRAME_RECORDS records or JSONL_FRAME_BYTES uncompressed bytes (whichever
+# comes first), each decompressible on its own.
+JSONL_COMPRESSION = os.getenv("JSONL_COMPRESSION", "").lower()
+JSONL_COMPRESSION_LEVEL = int(os.getenv("JSONL_COMPRESSION_LEVEL", "0"))  # 0 = codec default
+JSONL_FRAME_RECORDS = int(os.getenv("JSONL_FRAME_RECORDS", "256"))
+JSONL_FRAME_BYTES = int(os.getenv("JSONL_FRAME_BYTES", str(1024**2)))
+
+# Output is written by a background task in batches: a batch is flushed once it
+# holds WRITER_BATCH_SIZE records or WRITER_FLUSH_SECONDS after its first record
+WRITER_BATCH_SIZE = int(os.getenv("WRITER_BATCH_SIZE", "50"))
+WRITER_FLUSH_SECONDS = float(os.getenv("WRITER_FLUSH_SECONDS", "2"))
+
+# On-disk page cache so reruns read pages from disk instead of refetching them
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE", "true").lower() in ("1", "true", "yes")
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join(DATA_DIR, "page_cache"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(2 * 1024**3)))
+# Per page kind TTLs in seconds; stale entries are revalidated with ETag / Last-Modified
+CACHE_TTLS = {
+    "az_list": 6 * 3600,
+    "episode": 7 * 24 * 3600,
+    "series": 6 * 3600,
+    "no_results": 6 * 3600,
+}
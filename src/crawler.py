@@ -0,0 +1,101 @@
+"""
+Single entry point for the crawler's commands.
+
+Usage (from src/):
+    python -m crawler list [--concurrency 8] [--storage sqlite] ...
+    python -m crawler iframes [--workers 4] [--discovery gallop] ...
+    python -m crawler clean [az-list|iframes|all]
+    python -m crawler sync
+    python -m crawler export [--db PATH] ...
+
+Each command imports its module only when it runs, so the offline
+commands (clean, sync, export) start without loading crawl4ai and the
+browser stack. Options after the command go to that command; run
+`python -m crawler <command> --help` to list them.
+"""
+import argparse
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+PROG = "python -m crawler"
+
+
+def run_list(args: List[str]) -> None:
+    import asyncio
+
+    from main_az_list import main
+
+    asyncio.run(main())
+
+
+def run_iframes(args: List[str]) -> None:
+    import asyncio
+
+    from fetch_iframes import main
+
+    asyncio.run(main())
+
+
+def run_clean(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(prog=f"{PROG} clean", description="Clean scraped titles.")
+    parser.add_argument(
+        "target",
+        nargs="?",
+        choices=["az-list", "iframes", "all"],
+        default="all",
+        help="AZ-list CSV, episode CSV/JSONL, or both (default: all)",
+    )
+    target = parser.parse_args(args).target
+
+    if target in ("az-list", "all"):
+        from clean_csv import clean_csv
+
+        clean_csv()
+    if target in ("iframes", "all"):
+        from clean_iframes_data import clean_iframes_files
+
+        clean_iframes_files()
+
+
+def run_sync(args: List[str]) -> None:
+    argparse.ArgumentParser(
+        prog=f"{PROG} sync", description="Append episode CSV rows missing from the JSONL."
+    ).parse_args(args)
+    from sync_csv_to_jsonl import sync_csv_to_jsonl
+
+    sync_csv_to_jsonl()
+
+
+def run_export(args: List[str]) -> None:
+    from export_store import main
+
+    main()
+
+
+COMMANDS: Dict[str, Tuple[str, Callable[[List[str]], None]]] = {
+    "list": ("Crawl the AZ-list (main_az_list.py)", run_list),
+    "iframes": ("Fetch episode iframes, incl. shards / coordinator / worker modes (fetch_iframes.py)", run_iframes),
+    "clean": ("Clean titles in the CSV / JSONL outputs (clean_csv.py, clean_iframes_data.py)", run_clean),
+    "sync": ("Append episode CSV rows missing from the JSONL (sync_csv_to_jsonl.py)", run_sync),
+    "export": ("Export the SQLite store to CSV / JSONL (export_store.py)", run_export),
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog=PROG,
+        description="Anime crawler commands.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<10}{help_text}" for name, (help_text, _) in COMMANDS.items()),
+    )
+    parser.add_argument("command", choices=COMMANDS, metavar="command", help="One of: " + ", ".join(COMMANDS))
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Options for the command")
+    parsed = parser.parse_args(argv)
+
+    # The scripts' own parsers read sys.argv
+    sys.argv = [f"{PROG} {parsed.command}", *parsed.args]
+    COMMANDS[parsed.command][1](parsed.args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import os
+
+from config import SQLITE_DB_PATH
+from utils.sqlite_store import CrawlStore
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AZ_LIST_CSV = os.path.join(BASE_DIR, "data", "csvs", "anime_az_list.csv")
+CSV_OUTPUT = os.path.join(BASE_DIR, "data", "csvs", "anime_az_list_with_iframes.csv")
+JSONL_OUTPUT = os.path.join(BASE_DIR, "data", "jsonls", "anime_az_list_with_iframes.jsonl")
+
+
+def export_store(db_path: str, az_list_csv: str, csv_output: str, jsonl_output: str) -> None:
+    """
+    Exports the SQLite crawl store to the CSV / JSONL files the file-based
+    pipeline produces. Each file is written to a temp path and swapped in.
+    """
+    if not os.path.exists(db_path):
+        print(f"Store not found: {db_path}")
+        return
+
+    with CrawlStore(db_path) as store:
+        for path, export in (
+            (az_list_csv, store.export_az_list_csv),
+            (csv_output, store.export_records_csv),
+            (jsonl_output, store.export_records_jsonl),
+        ):
+            if not path:
+                continue
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            count = export(tmp_path)
+            os.replace(tmp_path, path)
+            print(f"Exported {count} rows to {path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the SQLite crawl store to CSV / JSONL.")
+    parser.add_argument("--db", default=SQLITE_DB_PATH, help="SQLite database path")
+    parser.add_argument("--az-list-csv", default=AZ_LIST_CSV, help="AZ-list CSV output ('' to skip)")
+    parser.add_argument("--csv", default=CSV_OUTPUT, help="CSV output with embed_url ('' to skip)")
+    parser.add_argument("--jsonl", default=JSONL_OUTPUT, help="JSONL output ('' to skip)")
+    args = parser.parse_args()
+
+    export_store(args.db, args.az_list_csv, args.csv, args.jsonl)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,74 @@
+import argparse
+import contextlib
 import csv
 import json
 import asyncio
+import multiprocessing
 import os
-from typing import List, Set, Dict, Any
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CacheMode, CrawlerRunConfig
+import socket
+import zlib
+from datetime import datetime, timezone
+from functools import partial
+from typing import TYPE_CHECKING, List, Set, Dict, Any, Iterable, Optional
+from urllib.parse import urljoin
+from config import (
+    CACHE_TTLS,
+    DATA_DIR,
+    EPISODE_DISCOVERY,
+    EPISODE_LIST_URL,
+    EPISODE_RANGE_WORKERS,
+    FETCH_RETRIES,
+    HTTP_FAST_PATH,
+    IFRAME_WORKERS,
+    JSONL_FRAME_RECORDS,
+    METRICS_PORT,
+    METRICS_TEXTFILE,
+    PAGE_CACHE_DIR,
+    PAGE_CACHE_ENABLED,
+    SQLITE_DB_PATH,
+    STORAGE_BACKEND,
+    UPDATE_RECHECK_HOURS,
+    WORK_QUEUE_LEASE_SECONDS,
+    WORK_QUEUE_PATH,
+    WAIT_SELECTORS,
+    WRITER_BATCH_SIZE,
+)
+from utils.episode_list import parse_episode_list_response, parse_series_page
+from utils.hash_set import HashSet
+from utils.http_fetcher import HttpFetcher
 from utils.iframe_extractor import extract_iframe_src
-from dotenv import load_dotenv
+from utils.framed_jsonl import jsonl_file, jsonl_output_path, jsonl_temp_path, read_jsonl_lines
+from utils.metrics import PAGES, QUEUE_DEPTH, MetricsExporter, stage_timer
+from utils.page_cache import PageCache
+from utils.page_loader import PageLoader
+from utils.parse_pool import ParsePool
+from utils.profiler import CrawlProfiler
+from utils.rate_limiter import get_rate_limiter
+from utils.resilience import (
+    NAVIGATION,
+    NOT_FOUND,
+    TIMEOUT,
+    TransientFetchError,
+    backoff_delay,
+    classify_failure,
+    get_circuit_breakers,
+)
+from utils.record_writer import CsvSink, JsonlSink, RecordWriter, StoreSink
+from utils.scraper_utils import get_crawler
+from utils.sqlite_store import CrawlStore
+from utils.work_queue import LEASED, WorkQueue
 
-load_dotenv()
+if TYPE_CHECKING:
+    # Crawlers come from get_crawler, which imports crawl4ai when called, so
+    # the coordinator commands don't load the browser stack
+    from crawl4ai import AsyncWebCrawler
 
 async def fetch_episode_iframes(
-    crawler: AsyncWebCrawler,
+    crawler: "AsyncWebCrawler",
     anime_slug: str,
     episode_num: int = 1,
     session_id: str = "iframe_session",
+    loader: Optional[PageLoader] = None,
 ) -> str:
     """
     Fetches an episode page and extracts the iframe src.
@@ -23,36 +78,515 @@ async def fetch_episode_iframes(
         anime_slug (str): The anime slug (e.g., "jujutsu-kaisen-2nd-season").
         episode_num (int): The episode number to fetch (default: 1).
         session_id (str): The session identifier.
+        loader (Optional[PageLoader]): Page loader (HTTP fast path + browser);
+            defaults to browser-only.
     
+    Transient failures (timeouts, 5xx, 429, navigation errors) are retried
+    FETCH_RETRIES times with jittered exponential backoff. Only a page that
+    loads and settles without an iframe (a render gives up RENDER_SETTLE_MS
+    after the load event) or a 404 / 410 counts as a missing episode; a
+    render cut off by RENDER_TIMEOUT_MS is a timeout.
+
     Returns:
-        str: The iframe src URL if found, empty string otherwise.
+        str: The iframe src URL if found, empty string if the episode doesn't exist.
+
+    Raises:
+        TransientFetchError: The page still failed after all retries.
     """
     # Base URL for watching episodes, e.g., "https://example.com/watch"
     watch_base = os.getenv("WATCH_BASE_URL", "https://example.com/watch")
     url = f"{watch_base}/{anime_slug}/ep-{episode_num}"
     
+    loader = loader or PageLoader(
+        crawler,
+        rate_limiter=get_rate_limiter(),
+        breakers=get_circuit_breakers(),
+    )
+    kind, error = None, ""
+    for attempt in range(FETCH_RETRIES + 1):
+        if attempt:
+            delay = backoff_delay(attempt - 1)
+            print(f"Retrying {url} in {delay:.1f}s ({kind}, attempt {attempt + 1}/{FETCH_RETRIES + 1})")
+            with stage_timer("sleep"):
+                await asyncio.sleep(delay)
+
+        try:
+            result = await loader.load(
+                url,
+                session_id,
+                extract=extract_iframe_src,
+                cache_ttl=CACHE_TTLS["episode"],
+                wait_for=WAIT_SELECTORS["episode"],
+            )
+        except Exception as e:
+            kind, error = TIMEOUT if isinstance(e, asyncio.TimeoutError) else NAVIGATION, str(e)
+            PAGES.inc(kind="episode", outcome=kind)
+            print(f"✗ Error fetching {url}: {e}")
+            continue
+
+        kind = classify_failure(result)
+        PAGES.inc(kind="episode", outcome=kind or "ok")
+        if kind is None:
+            print(f"✓ Found iframe for {anime_slug} ep-{episode_num}")
+            return result.extracted
+        if kind == NOT_FOUND:
+            return ""
+        error = result.error_message
+        print(f"✗ Failed to fetch {url} ({kind}): {error}")
+
+    # Transient failures only: the episode may well exist
+    raise TransientFetchError(url, kind, error)
+
+
+async def find_last_episode(
+    crawler: "AsyncWebCrawler",
+    anime_slug: str,
+    max_episodes: int = 10000,
+    session_id: str = "iframe_session",
+    probes: Optional[Dict[int, str]] = None,
+    loader: Optional[PageLoader] = None,
+    start_episode: int = 1,
+) -> int:
+    """
+    Finds the last available episode with exponential probing followed by a
+    binary search, i.e. O(log n) fetches instead of n + 1.
+
+    Assumes episodes are contiguous; callers should verify the range afterwards.
+
+    Args:
+        crawler (AsyncWebCrawler): The web crawler instance.
+        anime_slug (str): The anime slug.
+        max_episodes (int): Upper bound for the search.
+        session_id (str): The session identifier.
+        probes (Optional[Dict[int, str]]): Cache of probed episodes, filled in
+            with every iframe src fetched ("" for misses) so they aren't refetched.
+        loader (Optional[PageLoader]): Page loader passed to fetch_episode_iframes.
+        start_episode (int): First episode to probe; earlier ones are assumed to exist.
+
+    Returns:
+        int: The last episode number found, or start_episode - 1 if
+        start_episode itself is missing.
+
+    Raises:
+        TransientFetchError: A probe failed after all retries.
+    """
+    if probes is None:
+        probes = {}
+
+    async def exists(ep_num: int) -> bool:
+        if ep_num not in probes:
+            probes[ep_num] = await fetch_episode_iframes(
+                crawler,
+                anime_slug,
+                episode_num=ep_num,
+                session_id=session_id,
+                loader=loader,
+            )
+        return bool(probes[ep_num])
+
+    if max_episodes < start_episode or not await exists(start_episode):
+        return start_episode - 1
+
+    # Gallop: start, +1, +2, +4, ... until a miss; lo always exists, hi is missing
+    lo, step = start_episode, 1
+    hi = lo + step
+    while hi <= max_episodes and await exists(hi):
+        lo, step = hi, step * 2
+        hi = lo + step
+    hi = min(hi, max_episodes + 1)
+
+    # Binary search between the last hit and the first miss
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if await exists(mid):
+            lo = mid
+        else:
+            hi = mid
+
+    return lo
+
+
+async def fetch_episode_range(
+    crawler: "AsyncWebCrawler",
+    anime_slug: str,
+    episodes: List[int],
+    session_id: str = "iframe_session",
+    workers: int = 1,
+    known: Optional[Dict[int, str]] = None,
+    loader: Optional[PageLoader] = None,
+) -> Dict[int, str]:
+    """
+    Fetches a known list of episodes with up to `workers` pages in flight.
+
+    Args:
+        crawler (AsyncWebCrawler): The web crawler instance.
+        anime_slug (str): The anime slug.
+        episodes (List[int]): Episode numbers to fetch.
+        session_id (str): Prefix for the per-slot session identifiers.
+        workers (int): Maximum number of concurrent episode fetches.
+        known (Optional[Dict[int, str]]): Already fetched episodes to reuse.
+        loader (Optional[PageLoader]): Page loader passed to fetch_episode_iframes.
+
+    Returns:
+        Dict[int, str]: Mapping of episode number to iframe src ("" for misses).
+
+    Raises:
+        TransientFetchError: An episode failed after all retries.
+    """
+    results = dict(known or {})
+    pending = [ep for ep in episodes if ep not in results]
+    queue: asyncio.Queue = asyncio.Queue()
+    for ep_num in pending:
+        queue.put_nowait(ep_num)
+
+    async def slot(slot_id: int) -> None:
+        slot_session = session_id if slot_id == 0 else f"{session_id}_ep{slot_id}"
+        while True:
+            try:
+                ep_num = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            try:
+                results[ep_num] = await fetch_episode_iframes(
+                    crawler,
+                    anime_slug,
+                    episode_num=ep_num,
+                    session_id=slot_session,
+                    loader=loader,
+                )
+            except TransientFetchError:
+                # The range is incomplete either way; stop the other slots too
+                while not queue.empty():
+                    queue.get_nowait()
+                raise
+
+    slot_count = max(1, min(workers, len(pending)))
+    outcomes = await asyncio.gather(
+        *(slot(slot_id) for slot_id in range(slot_count)), return_exceptions=True
+    )
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+    return {ep: results.get(ep, "") for ep in episodes}
+
+
+def series_url(anime_slug: str, watch_url: str = "") -> str:
+    """
+    Returns the series' watch page: the watch_url from the AZ-list (resolved
+    against WATCH_BASE_URL when relative), or WATCH_BASE_URL/<slug>.
+    """
+    watch_base = os.getenv("WATCH_BASE_URL", "https://example.com/watch")
+    if watch_url:
+        return urljoin(f"{watch_base}/", watch_url)
+    return f"{watch_base}/{anime_slug}"
+
+
+async def discover_series_episodes(
+    crawler: "AsyncWebCrawler",
+    anime_slug: str,
+    watch_url: str = "",
+    session_id: str = "iframe_session",
+    loader: Optional[PageLoader] = None,
+) -> Dict[int, str]:
+    """
+    Reads the episode list from the series' watch page in one request (plus
+    one to EPISODE_LIST_URL when the page builds its list with JavaScript).
+
+    Args:
+        crawler (AsyncWebCrawler): The web crawler instance.
+        anime_slug (str): The anime slug.
+        watch_url (str): The series' watch URL from the AZ-list, if known.
+        session_id (str): The session identifier.
+        loader (Optional[PageLoader]): Page loader (HTTP fast path + browser);
+            defaults to browser-only.
+
+    Returns:
+        Dict[int, str]: Mapping of listed episode number to its player URL
+        ("" when the list doesn't give one); empty if no list was found or
+        the page failed to load.
+    """
+    loader = loader or PageLoader(
+        crawler,
+        rate_limiter=get_rate_limiter(),
+        breakers=get_circuit_breakers(),
+    )
+    url = series_url(anime_slug, watch_url)
     try:
-        result = await crawler.arun(
-            url=url,
-            config=CrawlerRunConfig(
-                cache_mode=CacheMode.BYPASS,
+        result = await loader.load(
+            url,
+            session_id,
+            extract=partial(parse_series_page, slug=anime_slug),
+            cache_ttl=CACHE_TTLS["series"],
+            wait_for=WAIT_SELECTORS["series"],
+        )
+        page = result.extracted
+        if not page and page is not None and EPISODE_LIST_URL and (page.series_id or "{id}" not in EPISODE_LIST_URL):
+            result = await loader.load(
+                EPISODE_LIST_URL.format(slug=anime_slug, id=page.series_id),
+                session_id,
+                extract=partial(parse_episode_list_response, slug=anime_slug),
+                cache_ttl=CACHE_TTLS["series"],
+            )
+            page = result.extracted
+    except Exception as e:
+        PAGES.inc(kind="series", outcome="error")
+        print(f"✗ Error fetching episode list {url}: {e}")
+        return {}
+
+    PAGES.inc(kind="series", outcome="ok" if page else classify_failure(result) or "empty")
+    return dict(page.episodes) if page else {}
+
+
+async def fetch_anime_episodes(
+    crawler: "AsyncWebCrawler",
+    anime_slug: str,
+    max_episodes: int = 10000,
+    session_id: str = "iframe_session",
+    discovery: str = "linear",
+    range_workers: int = 1,
+    loader: Optional[PageLoader] = None,
+    start_episode: int = 1,
+    watch_url: str = "",
+) -> Dict[str, str]:
+    """
+    Fetches iframe URLs for all episodes of an anime, from start_episode on.
+
+    Discovery strategies:
+        - "linear": probe ep-1, ep-2, ... until the first missing episode.
+        - "gallop": find the last episode with find_last_episode, then fetch
+          the whole range (range_workers pages at a time). If the range has
+          gaps the contiguity assumption is broken, so probing continues
+          linearly past the discovered end until the next miss.
+        - "series": read the episode list from the series' watch page with
+          discover_series_episodes. Episodes listed with a player URL are
+          taken as is; only the others are fetched (range_workers pages at a
+          time). Without a usable list, falls back to "gallop".
+
+    Args:
+        crawler (AsyncWebCrawler): The web crawler instance.
+        anime_slug (str): The anime slug.
+        max_episodes (int): Maximum number of episodes to attempt.
+        session_id (str): The session identifier (one per concurrent worker).
+        discovery (str): "linear", "gallop" or "series".
+        range_workers (int): Concurrent episode fetches in gallop / series mode.
+        loader (Optional[PageLoader]): Page loader passed to fetch_episode_iframes.
+        start_episode (int): First episode to fetch (> 1 when updating a
+            series we already have the earlier episodes of).
+        watch_url (str): The series' watch URL from the AZ-list (series mode).
+
+    Returns:
+        Dict[str, str]: Mapping of episode number to iframe src.
+
+    Raises:
+        TransientFetchError: An episode failed after all retries, so where
+            the series ends is unknown.
+    """
+    episode_map = {}
+
+    if discovery == "series":
+        listed = await discover_series_episodes(
+            crawler,
+            anime_slug,
+            watch_url=watch_url,
+            session_id=session_id,
+            loader=loader,
+        )
+        episodes = sorted(ep for ep in listed if start_episode <= ep <= max_episodes)
+        if listed:
+            unresolved = [ep for ep in episodes if not listed[ep]]
+            print(
+                f"Episode list of {anime_slug}: {len(episodes)} episodes, "
+                f"{len(episodes) - len(unresolved)} with a player URL"
+            )
+            fetched = await fetch_episode_range(
+                crawler,
+                anime_slug,
+                unresolved,
                 session_id=session_id,
-            ),
+                workers=range_workers,
+                loader=loader,
+            )
+            for ep in episodes:
+                src = listed[ep] or fetched.get(ep, "")
+                if src:
+                    episode_map[str(ep)] = src
+            return episode_map
+
+        print(f"No episode list found for {anime_slug}, falling back to gallop discovery")
+        discovery = "gallop"
+
+    if discovery == "gallop":
+        probes: Dict[int, str] = {}
+        last_episode = await find_last_episode(
+            crawler,
+            anime_slug,
+            max_episodes=max_episodes,
+            session_id=session_id,
+            probes=probes,
+            loader=loader,
+            start_episode=start_episode,
         )
-        
-        if result.success:
-            iframe_src = extract_iframe_src(result.html)
-            if iframe_src:
-                print(f"✓ Found iframe for {anime_slug} ep-{episode_num}")
-                return iframe_src
-            else:
-                pass
+        print(f"Discovered {last_episode} episodes for {anime_slug} with {len(probes)} probes")
+
+        fetched = await fetch_episode_range(
+            crawler,
+            anime_slug,
+            list(range(start_episode, last_episode + 1)),
+            session_id=session_id,
+            workers=range_workers,
+            known=probes,
+            loader=loader,
+        )
+        episode_map = {str(ep): src for ep, src in fetched.items() if src}
+
+        gaps = last_episode - start_episode + 1 - len(episode_map)
+        if not gaps:
+            return episode_map
+
+        print(f"{anime_slug} has {gaps} missing episodes, falling back to linear probing")
+        start_episode = last_episode + 1
+    elif discovery != "linear":
+        raise ValueError(f"Unknown episode discovery mode: {discovery}")
+
+    for ep_num in range(start_episode, max_episodes + 1):
+        # Try to get iframe for the current episode
+        iframe_src = await fetch_episode_iframes(
+            crawler,
+            anime_slug,
+            episode_num=ep_num,
+            session_id=session_id,
+            loader=loader,
+        )
+
+        if iframe_src:
+            episode_map[str(ep_num)] = iframe_src
         else:
-            print(f"✗ Failed to fetch {url}: {result.error_message}")
-    except Exception as e:
-        print(f"✗ Error fetching {url}: {e}")
-    
-    return ""
+            print(f"Stopped at episode {ep_num} (not found)")
+            break
+
+    return episode_map
+
+
+def parse_embed_map(value: Any) -> Dict[str, str]:
+    """
+    Returns the episode map of a stored record, whether its embed_url is a
+    dict (JSONL) or a JSON string (CSV).
+    """
+    if isinstance(value, dict):
+        return value
+    try:
+        parsed = json.loads(value or "{}")
+    except (TypeError, ValueError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def is_due_for_update(record: Dict[str, Any], recheck_after: float) -> bool:
+    """
+    Checks whether a stored record was last checked more than recheck_after
+    seconds ago (records without a timestamp are always due).
+    """
+    try:
+        checked_at = datetime.fromisoformat(record.get('last_checked') or "")
+    except ValueError:
+        return True
+    return (datetime.now(timezone.utc) - checked_at).total_seconds() >= recheck_after
+
+
+def to_jsonl_record(anime: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts a CSV-style record to its JSONL form (embed_url as an object).
+    """
+    record = anime.copy()
+    # Keep embed_url as plain object in JSONL for better readability
+    try:
+         record['embed_url'] = json.loads(record['embed_url'])
+    except:
+        pass
+    return record
+
+
+def apply_record_updates(
+    csv_output_file: Optional[str],
+    json_output_file: Optional[str],
+    updates: Dict[str, Dict[str, Any]],
+) -> None:
+    """
+    Rewrites the output files with the updated records replacing the stored
+    ones in place. Each file is written to a temp file and swapped in
+    atomically, so an interrupted rewrite leaves the old file intact.
+
+    Args:
+        csv_output_file (Optional[str]): Path to the output CSV file.
+        json_output_file (Optional[str]): Path to the output JSONL file.
+        updates (Dict[str, Dict[str, Any]]): CSV-style records keyed by slug.
+    """
+    if not updates:
+        return
+
+    if csv_output_file and os.path.exists(csv_output_file):
+        tmp_file = f"{csv_output_file}.tmp"
+        with open(csv_output_file, 'r', encoding='utf-8') as infile, \
+             open(tmp_file, 'w', newline='', encoding='utf-8') as outfile:
+            reader = csv.DictReader(infile)
+            fieldnames = list(reader.fieldnames or [])
+            if 'last_checked' not in fieldnames:
+                fieldnames.append('last_checked')
+            writer = csv.DictWriter(outfile, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for row in reader:
+                writer.writerow(updates.get(row.get('slug'), row))
+        os.replace(tmp_file, csv_output_file)
+
+    if json_output_file and os.path.exists(json_output_file):
+        # Written through IndexedJsonl / FramedJsonl so the index is rebuilt
+        # alongside; lines are appended in frame-sized batches
+        tmp_file = jsonl_temp_path(json_output_file)
+        for path in (tmp_file, f"{tmp_file}.idx", f"{tmp_file}.idx.slugset"):
+            if os.path.exists(path):
+                os.remove(path)
+        with jsonl_file(tmp_file) as outfile:
+            batch = []
+            for line in read_jsonl_lines(json_output_file):
+                try:
+                    record = json.loads(line)
+                    slug = record.get('slug')
+                except (ValueError, AttributeError):
+                    continue
+                if not slug:
+                    continue
+                if slug in updates:
+                    batch.append((json.dumps(to_jsonl_record(updates[slug])), slug))
+                else:
+                    batch.append((line.decode('utf-8').rstrip('\n'), slug))
+                if len(batch) >= JSONL_FRAME_RECORDS:
+                    outfile.append_lines(batch)
+                    batch = []
+            if batch:
+                outfile.append_lines(batch)
+        os.replace(tmp_file, json_output_file)
+        os.replace(outfile.index_path, f"{json_output_file}.idx")
+        os.replace(outfile.slugset_path, f"{json_output_file}.idx.slugset")
+
+    print(f"Updated {len(updates)} records in place.")
+
+
+def open_csv_sink(csv_output_file: str, sample_row: Dict[str, Any]) -> CsvSink:
+    """
+    Opens the output CSV for appending, keeping an existing file's column
+    layout; a new file gets sample_row's columns plus embed_url and
+    last_checked.
+    """
+    file_exists = os.path.exists(csv_output_file) and os.path.getsize(csv_output_file) > 0
+    if file_exists:
+        with open(csv_output_file, 'r', encoding='utf-8') as f:
+            fieldnames = next(csv.reader(f), [])
+    else:
+        fieldnames = list(sample_row.keys())
+        for column in ('embed_url', 'last_checked'):
+            if column not in fieldnames:
+                fieldnames.append(column)
+    return CsvSink(csv_output_file, fieldnames, write_header=not file_exists and bool(fieldnames))
 
 
 async def enrich_anime_with_iframes(
@@ -60,236 +594,712 @@ async def enrich_anime_with_iframes(
     csv_output_file: str = None, 
     json_output_file: str = None,
     max_episodes: int = 10000,
+    workers: int = 1,
+    discovery: str = "linear",
+    range_workers: int = 1,
+    update: bool = False,
+    recheck_after: float = 0,
+    storage: str = "files",
 ) -> None:
     """
     Reads anime from CSV and fetches iframe URLs for episodes.
+
+    With workers > 1, that many animes are processed in parallel on the same
+    browser, each worker using its own session. Records are still written
+    one per anime, in completion order.
+
+    With update=True, already processed animes are rechecked for new
+    episodes: probing starts after the highest stored episode, new episodes
+    are merged into the stored record and its last_checked timestamp is
+    refreshed. Updated records are rewritten in place at the end of the run.
+
+    With storage="sqlite" progress and output live in the SQLite store
+    (SQLITE_DB_PATH): resume is an indexed lookup per slug, each anime is
+    saved in one transaction and the CSV / JSONL outputs are not written
+    (export them with export_store.py).
     
     Args:
         csv_input_file (str): Path to input CSV file.
         csv_output_file (str): Path to output CSV file with embed_url column.
         json_output_file (str): Path to output JSONL file (incremental).
         max_episodes (int): Maximum number of episodes to attempt (for pagination).
+        workers (int): Number of animes to fetch concurrently.
+        discovery (str): Episode discovery strategy, "linear", "gallop" or "series".
+        range_workers (int): Concurrent episode fetches per anime in gallop mode.
+        update (bool): Recheck already processed animes for new episodes.
+        recheck_after (float): In update mode, skip records checked less than
+            this many seconds ago.
+        storage (str): "files" or "sqlite".
     """
-    if not csv_output_file and not json_output_file:
+    store = None
+    if storage == "sqlite":
+        store = CrawlStore(SQLITE_DB_PATH)
+        # CSV / JSONL become export targets; progress lives in the store
+        csv_output_file = json_output_file = None
+    elif not csv_output_file and not json_output_file:
         print("Error: Must provide either csv_output_file or json_output_file")
         return
 
-    browser_config = BrowserConfig(
-        browser_type="chromium",
-        headless=True,
-        verbose=False,
-    )
-    
     animes = []
     
     # Read input CSV
     try:
-        if not os.path.exists(csv_input_file):
+        if os.path.exists(csv_input_file):
+            with open(csv_input_file, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                animes = list(reader)
+            print(f"Loaded {len(animes)} anime from {csv_input_file}")
+        elif store is None:
             print(f"Input file not found: {csv_input_file}")
             return
-            
-        with open(csv_input_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            animes = list(reader)
-        print(f"Loaded {len(animes)} anime from {csv_input_file}")
+
+        if store:
+            # The store also holds AZ-list rows crawled with --storage sqlite
+            store.add_animes(animes)
+            animes = store.iter_animes()
+            print(f"Store has {len(animes)} anime")
     except Exception as e:
         print(f"Error reading CSV: {e}")
         return
     
-    # Check for existing progress
-    processed_slugs = set()
-    
-    # helper to load from jsonl
-    json_slugs = set()
-    if json_output_file and os.path.exists(json_output_file):
+    # Check for existing progress: slugs claimed this run, plus those of the
+    # output CSV when there is no JSONL index to hold them
+    processed_slugs = HashSet()
+    # Stored CSV rows by slug, only kept in update mode without a JSONL
+    existing_records: Dict[str, Dict[str, Any]] = {}
+
+    # The JSONL index gives the processed slugs without reading the JSONL
+    # (mapped from its slugset); it is used as is, not copied
+    jsonl = None
+    json_slugs: HashSet = HashSet()
+    if json_output_file:
         try:
-            valid_lines = []
-            needs_repair = False
-            
-            with open(json_output_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Naive repair for the specific "}{" issue reported
-            if '}{' in content:
-                print("Detected corrupted JSONL (missing newlines). Repairing...")
-                content = content.replace('}{', '}\n{')
-                needs_repair = True
-            
-            # Re-read lines from the (potentially repaired) content
-            import io
-            f_io = io.StringIO(content)
-            
-            for line in f_io:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                    if data.get('slug'):
-                        json_slugs.add(data['slug'])
-                    valid_lines.append(line)
-                except json.JSONDecodeError:
-                    print(f"Skipping invalid JSON line during load: {line[:50]}...")
-                    needs_repair = True
-            
-            print(f"JSONL: Found {len(valid_lines)} valid processed animes.")
-            
-            # Rewrite file if repair was needed to ensure cleanliness
-            if needs_repair:
-                print("Rewriting repaired JSONL file...")
-                with open(json_output_file, 'w', encoding='utf-8') as f:
-                    for line in valid_lines:
-                        f.write(line + '\n')
-                        
+            jsonl = jsonl_file(json_output_file).open()
+            json_slugs = jsonl.slugs
+            print(f"JSONL: Found {len(json_slugs)} processed animes in the index.")
         except Exception as e:
-            print(f"Error reading/repairing existing parsed JSONL file: {e}")
+            print(f"Error opening JSONL index: {e}")
+            return
 
-    # helper to load from csv if jsonl check didn't cover it or wasn't used
-    # AND BACKFILL JSONL IF NEEDED
-    if csv_output_file and os.path.exists(csv_output_file):
+    # Load from csv if the jsonl didn't cover it or wasn't used, and backfill
+    # the jsonl. Skipped when the CSV hasn't changed since the last clean
+    # shutdown recorded its size in the index.
+    csv_in_sync = (
+        jsonl is not None
+        and csv_output_file is not None
+        and os.path.exists(csv_output_file)
+        and jsonl.checkpoints.get('csv_size') == str(os.path.getsize(csv_output_file))
+    )
+    if csv_output_file and os.path.exists(csv_output_file) and not csv_in_sync:
         try:
             csv_rows_to_backfill = []
+            csv_slugs = 0
             with open(csv_output_file, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
                 for row in reader:
                     slug = row.get('slug')
                     if slug:
-                        processed_slugs.add(slug)
-                        if json_output_file and slug not in json_slugs:
-                             csv_rows_to_backfill.append(row)
+                        csv_slugs += 1
+                        if jsonl is None:
+                            processed_slugs.add(slug)
+                            if update:
+                                existing_records[slug] = row
+                        elif slug not in json_slugs:
+                            csv_rows_to_backfill.append(row)
             
-            print(f"CSV: Found {len(processed_slugs)} processed animes.")
+            print(f"CSV: Found {csv_slugs} processed animes.")
             
-            # Backfill step
-            if csv_rows_to_backfill and json_output_file:
+            # Backfill step (the JSONL index then covers every CSV slug)
+            if csv_rows_to_backfill:
                 print(f"Backfilling {len(csv_rows_to_backfill)} items from CSV to JSONL...")
-                with open(json_output_file, 'a', encoding='utf-8') as f_json:
-                    for row in csv_rows_to_backfill:
-                        record = row.copy()
-                        try:
-                            # Try to parse the nested JSON string if it exists
-                            if isinstance(record.get('embed_url'), str):
-                                record['embed_url'] = json.loads(record['embed_url'])
-                        except:
-                            # If it fails or isn't there, keep as is
-                            pass
-                        json.dump(record, f_json)
-                        f_json.write('\n')
-                print("Backfill complete.")
-                # Update json_slugs
+                batch = {}
                 for row in csv_rows_to_backfill:
-                    json_slugs.add(row['slug'])
+                    if row['slug'] not in batch:
+                        batch[row['slug']] = (json.dumps(to_jsonl_record(row)), row['slug'])
+                # One write; a FramedJsonl splits it into frames
+                jsonl.append_lines(list(batch.values()))
+                print("Backfill complete.")
 
         except Exception as e:
             print(f"Error reading existing output CSV file: {e}")
+            if jsonl:
+                jsonl.close()
             return
     
-    # Combined processed slugs
-    processed_slugs.update(json_slugs)
-    print(f"Total processed slugs (after sync): {len(processed_slugs)}")
+    if store is None:
+        print(f"Total processed slugs (after sync): {len(json_slugs) if jsonl else len(processed_slugs)}")
+
+    def stored_record(slug: str) -> Optional[Dict[str, Any]]:
+        if store:
+            return store.get_record(slug)
+        if jsonl and slug in json_slugs:
+            return jsonl.read_record(slug)
+        return existing_records.get(slug)
+
+    # Outputs are written by a background task in batches
+    sinks = []
+    if store:
+        sinks.append(StoreSink(store.save_animes))
 
-    # Open CSV writer if needed
-    csv_f = None
-    csv_writer = None
-    
     if csv_output_file:
-        file_exists = os.path.exists(csv_output_file)
-        csv_f = open(csv_output_file, 'a', newline='', encoding='utf-8')
-        fieldnames = list(animes[0].keys()) if animes else []
-        if 'embed_url' not in fieldnames:
-            fieldnames.append('embed_url')
-        csv_writer = csv.DictWriter(csv_f, fieldnames=fieldnames)
-        if not file_exists and fieldnames:
-            csv_writer.writeheader()
-
-    # Open JSONL writer if needed
-    jsonl_f = None
-    if json_output_file:
-        jsonl_f = open(json_output_file, 'a', encoding='utf-8')
+        sinks.append(open_csv_sink(csv_output_file, animes[0] if animes else {}))
 
-    try:
-        # Fetch iframes
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            for idx, anime in enumerate(animes, 1):
-                slug = anime.get('slug', '')
-                
-                if not slug:
-                    print(f"[{idx}/{len(animes)}] Skipping anime with no slug")
+    if jsonl:
+        # embed_url is already a JSON string; it is spliced into the JSONL line as-is
+        sinks.append(JsonlSink(jsonl, raw_fields=('embed_url',)))
+
+    record_writer = RecordWriter(sinks)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for idx, anime in enumerate(animes, 1):
+        queue.put_nowait((idx, anime))
+
+    # Finished updates by slug, written back in place at the end
+    updates: Dict[str, Dict[str, Any]] = {}
+    updating: Set[str] = set()
+
+    async def update_record(
+        crawler: "AsyncWebCrawler",
+        loader: PageLoader,
+        session_id: str,
+        idx: int,
+        slug: str,
+        stored: Dict[str, Any],
+    ) -> None:
+        episode_map = parse_embed_map(stored.get('embed_url'))
+        last_episode = max((int(ep) for ep in episode_map if ep.isdigit()), default=0)
+        print(f"[{idx}/{len(animes)}] Checking {slug} for episodes after {last_episode}...")
+
+        new_episodes = await fetch_anime_episodes(
+            crawler,
+            slug,
+            max_episodes=max_episodes,
+            session_id=session_id,
+            discovery=discovery,
+            range_workers=range_workers,
+            loader=loader,
+            start_episode=last_episode + 1,
+            watch_url=stored.get('watch_url') or '',
+        )
+
+        record = dict(stored)
+        record['embed_url'] = json.dumps({**episode_map, **new_episodes})
+        record['last_checked'] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        if store:
+            record_writer.write(record)
+        else:
+            updates[slug] = record
+        print(f"Found {len(new_episodes)} new episodes for {slug}")
+
+    async def worker(crawler: "AsyncWebCrawler", loader: PageLoader, worker_id: int) -> None:
+        session_id = f"iframe_session_{worker_id}"
+        while True:
+            try:
+                idx, anime = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            QUEUE_DEPTH.set(queue.qsize(), queue="animes")
+
+            slug = anime.get('slug', '')
+
+            if not slug:
+                print(f"[{idx}/{len(animes)}] Skipping anime with no slug")
+                continue
+
+            if slug in processed_slugs or slug in json_slugs or (store and store.is_processed(slug)):
+                if not update:
+                    print(f"[{idx}/{len(animes)}] Skipping {slug} (already processed)")
                     continue
-                
-                if slug in processed_slugs:
+
+                stored = stored_record(slug)
+                if stored is None or slug in updating or not is_due_for_update(stored, recheck_after):
                     print(f"[{idx}/{len(animes)}] Skipping {slug} (already processed)")
                     continue
-                
-                print(f"[{idx}/{len(animes)}] Fetching episodes for {slug}...")
-                
-                episode_map = {}
-                for ep_num in range(1, max_episodes + 1):
-                    # Try to get iframe for the current episode
-                    iframe_src = await fetch_episode_iframes(
-                        crawler,
-                        slug,
-                        episode_num=ep_num,
-                        session_id="iframe_session",
-                    )
-                    
-                    if iframe_src:
-                        episode_map[str(ep_num)] = iframe_src
-                    else:
-                        print(f"Stopped at episode {ep_num} (not found)")
-                        break
-                    
-                    # Small delay between episodes of the same anime
-                    await asyncio.sleep(0.2)
-                
-                # Store data
-                anime['embed_url'] = json.dumps(episode_map)
-                print(f"Collected {len(episode_map)} episodes for {slug}")
-                
-                # Write to CSV
-                if csv_writer:
-                    csv_writer.writerow(anime)
-                    csv_f.flush()
-
-                # Write to JSONL
-                if jsonl_f:
-                    # Create a clean record for JSONL
-                    record = anime.copy()
-                    # Keep embed_url as plain object in JSONL for better readability
-                    try:
-                         record['embed_url'] = json.loads(record['embed_url'])
-                    except:
-                        pass
-                        
-                    json.dump(record, jsonl_f)
-                    jsonl_f.write('\n')
-                    jsonl_f.flush()
-                
-                # Rate limiting between animes
-                await asyncio.sleep(0.5)
-            
+
+                # Claim the update before awaiting
+                updating.add(slug)
+                try:
+                    await update_record(crawler, loader, session_id, idx, slug, stored)
+                except TransientFetchError as e:
+                    print(f"[{idx}/{len(animes)}] Keeping stored {slug} unchanged: {e}")
+                continue
+
+            # Claim the slug before awaiting so duplicate rows aren't fetched twice
+            processed_slugs.add(slug)
+            print(f"[{idx}/{len(animes)}] Fetching episodes for {slug}...")
+
+            try:
+                episode_map = await fetch_anime_episodes(
+                    crawler,
+                    slug,
+                    max_episodes=max_episodes,
+                    session_id=session_id,
+                    discovery=discovery,
+                    range_workers=range_workers,
+                    loader=loader,
+                    watch_url=anime.get('watch_url') or '',
+                )
+            except TransientFetchError as e:
+                # Not written, so the next run fetches it again from scratch
+                print(f"[{idx}/{len(animes)}] Leaving {slug} unprocessed: {e}")
+                continue
+
+            # Store data
+            anime['embed_url'] = json.dumps(episode_map)
+            anime['last_checked'] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            print(f"Collected {len(episode_map)} episodes for {slug}")
+            record_writer.write(anime)
+
+    record_writer.start()
+    try:
+        # Fetch iframes
+        async with get_crawler(verbose=False) as crawler, HttpFetcher() as http_fetcher, \
+                ParsePool() as parse_pool:
+            loader = PageLoader(
+                crawler,
+                http_fetcher if HTTP_FAST_PATH else None,
+                cache=PageCache(PAGE_CACHE_DIR) if PAGE_CACHE_ENABLED else None,
+                rate_limiter=get_rate_limiter(),
+                breakers=get_circuit_breakers(),
+                parse_pool=parse_pool,
+            )
+            worker_count = max(1, min(workers, len(animes)))
+            if worker_count > 1:
+                print(f"Processing with {worker_count} concurrent workers")
+            await asyncio.gather(
+                *(worker(crawler, loader, worker_id) for worker_id in range(1, worker_count + 1))
+            )
+
     except Exception as e:
         print(f"Error during processing: {e}")
     finally:
-        if csv_f:
-            csv_f.close()
-        if jsonl_f:
-            jsonl_f.close()
+        # Drains queued records and closes the CSV / JSONL files
+        await record_writer.close()
+        apply_record_updates(csv_output_file, json_output_file, updates)
+        if jsonl and csv_output_file and os.path.exists(csv_output_file):
+            # Lets the next run skip rescanning the CSV if it is unchanged
+            jsonl.checkpoint('csv_size', os.path.getsize(csv_output_file))
+        if store:
+            store.close()
+
+
+def coordinator_load(queue_path: str, csv_input_file: str, json_output_file: Optional[str] = None) -> None:
+    """
+    Coordinator: queues the AZ-list animes for queue workers, skipping slugs
+    already in the canonical JSONL output.
+    """
+    with open(csv_input_file, 'r', encoding='utf-8') as f:
+        animes = list(csv.DictReader(f))
+
+    # Mapped from the index's slugset; stays usable after the JSONL is closed
+    done: HashSet = HashSet()
+    if json_output_file and os.path.exists(json_output_file):
+        with jsonl_file(json_output_file) as jsonl:
+            done = jsonl.slugs
+
+    with WorkQueue(queue_path) as work_queue:
+        added = work_queue.enqueue(animes, skip=done)
+        print(f"Queued {added} new animes ({len(done)} already in the output); queue: {work_queue.stats()}")
+
+
+def append_records(
+    records: Iterable[Dict[str, Any]],
+    csv_output_file: Optional[str],
+    json_output_file: str,
+) -> int:
+    """
+    Appends CSV-style records (embed_url as a JSON string) to the canonical
+    CSV / JSONL outputs, skipping slugs the JSONL already has (or that repeat
+    within `records`).
+
+    Returns:
+        int: Number of records appended.
+    """
+    jsonl = jsonl_file(json_output_file).open()
+    # Slugs repeated within records; the JSONL's own are checked in its index
+    seen = HashSet()
+    new_records = []
+    for record in records:
+        if record['slug'] not in jsonl.slugs and seen.add(record['slug']):
+            new_records.append(record)
+
+    sinks = [JsonlSink(jsonl, raw_fields=('embed_url',))]
+    if csv_output_file:
+        sinks.insert(0, open_csv_sink(csv_output_file, new_records[0] if new_records else {}))
+
+    for start in range(0, len(new_records), WRITER_BATCH_SIZE):
+        for sink in sinks:
+            sink.write(new_records[start:start + WRITER_BATCH_SIZE])
+    for sink in sinks:
+        sink.close()
+    if csv_output_file and os.path.exists(csv_output_file):
+        jsonl.checkpoint('csv_size', os.path.getsize(csv_output_file))
+    return len(new_records)
+
+
+def coordinator_export(queue_path: str, csv_output_file: Optional[str], json_output_file: str) -> None:
+    """
+    Coordinator: appends the records reported by queue workers to the
+    canonical CSV / JSONL outputs, skipping slugs they already contain, so it
+    can be run repeatedly while workers are still going.
+    """
+    with WorkQueue(queue_path) as work_queue:
+        print(f"Queue: {work_queue.stats()}")
+        count = append_records(work_queue.iter_results(), csv_output_file, json_output_file)
+        print(f"Exported {count} new records")
+
+
+def shard_of(slug: str, shards: int) -> int:
+    """Stable hash partition of a slug (same shard on every run and box)."""
+    return zlib.crc32(slug.encode('utf-8')) % shards
+
+
+def shard_path(path: str, shard: int, shards: int) -> str:
+    """data/shards/<name>.shard-<i>-of-<n><ext> for an output or input file."""
+    name, ext = os.path.splitext(os.path.basename(path))
+    return os.path.join(DATA_DIR, "shards", f"{name}.shard-{shard}-of-{shards}{ext}")
+
+
+def _run_shard(shard: int, shards: int, enrich_kwargs: Dict[str, Any], profile: bool = False) -> None:
+    # Entry point of a shard process; output is prefixed so shards can be told apart
+    print(f"[shard {shard}/{shards}] started (pid {os.getpid()})")
+    # Each shard exports its own metrics: next port up, textfile with a shard suffix
+    port = METRICS_PORT + 1 + shard if METRICS_PORT else 0
+    textfile = f"{METRICS_TEXTFILE}.shard-{shard}" if METRICS_TEXTFILE else ""
+    with MetricsExporter(port=port, textfile=textfile), \
+            CrawlProfiler(f"fetch_iframes-shard-{shard}") if profile else contextlib.nullcontext():
+        asyncio.run(enrich_anime_with_iframes(**enrich_kwargs))
+
+
+def run_shards(
+    shards: int,
+    csv_input_file: str,
+    csv_output_file: Optional[str],
+    json_output_file: str,
+    profile: bool = False,
+    **enrich_kwargs: Any,
+) -> None:
+    """
+    Shared-nothing multi-process crawl. Animes are hash-partitioned by slug
+    into `shards` partitions; each is crawled by its own process with its
+    own browser into its own CSV / JSONL segment under data/shards/, and the
+    segments are merged into the canonical outputs when all shards finish.
+
+    Animes already in the canonical output are left out of the partitions,
+    and each shard resumes from its own segment, so an interrupted run is
+    resumed by running the same command again.
+
+    Args:
+        shards (int): Number of shard processes.
+        csv_input_file (str): Path to the AZ-list CSV.
+        csv_output_file (Optional[str]): Canonical output CSV.
+        json_output_file (str): Canonical output JSONL.
+        profile (bool): Profile each shard process (see CrawlProfiler).
+        **enrich_kwargs: Passed on to enrich_anime_with_iframes.
+    """
+    with open(csv_input_file, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames or []
+        animes = list(reader)
+
+    # Mapped from the index's slugset; stays usable after the JSONL is closed
+    done: HashSet = HashSet()
+    if os.path.exists(json_output_file):
+        with jsonl_file(json_output_file) as jsonl:
+            done = jsonl.slugs
+
+    partitions: List[List[Dict[str, Any]]] = [[] for _ in range(shards)]
+    for anime in animes:
+        slug = anime.get('slug')
+        if slug and slug not in done:
+            partitions[shard_of(slug, shards)].append(anime)
+    print(f"Split {sum(map(len, partitions))} animes over {shards} shards ({len(done)} already done)")
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = []
+    for shard, partition in enumerate(partitions):
+        shard_input = shard_path(csv_input_file, shard, shards)
+        os.makedirs(os.path.dirname(shard_input), exist_ok=True)
+        with open(f"{shard_input}.tmp", 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(partition)
+        os.replace(f"{shard_input}.tmp", shard_input)
+
+        kwargs = dict(
+            enrich_kwargs,
+            csv_input_file=shard_input,
+            csv_output_file=shard_path(csv_output_file, shard, shards) if csv_output_file else None,
+            json_output_file=shard_path(json_output_file, shard, shards),
+        )
+        process = ctx.Process(target=_run_shard, args=(shard, shards, kwargs, profile), name=f"shard-{shard}")
+        process.start()
+        processes.append(process)
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # The shards got the same SIGINT and flush their segments on the way out
+        for process in processes:
+            process.join()
+    finally:
+        failed = [process.name for process in processes if process.exitcode]
+        if failed:
+            print(f"Shards exited with errors: {', '.join(failed)}")
+        merge_shards(shards, csv_output_file, json_output_file)
+
+
+def merge_shards(shards: int, csv_output_file: Optional[str], json_output_file: str) -> None:
+    """
+    Appends the shard segments' records to the canonical CSV / JSONL outputs,
+    deduplicated by slug. Safe to run repeatedly.
+    """
+    def segment_records():
+        for shard in range(shards):
+            segment = shard_path(json_output_file, shard, shards)
+            if not os.path.exists(segment):
+                continue
+            for line in read_jsonl_lines(segment):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line of an interrupted shard
+                if isinstance(record.get('embed_url'), dict):
+                    record['embed_url'] = json.dumps(record['embed_url'])
+                yield record
+
+    count = append_records(segment_records(), csv_output_file, json_output_file)
+    print(f"Merged {count} new records from {shards} shard segments")
+
+
+async def run_queue_worker(
+    queue_path: str,
+    max_episodes: int = 10000,
+    workers: int = 1,
+    discovery: str = "linear",
+    range_workers: int = 1,
+    lease_seconds: float = WORK_QUEUE_LEASE_SECONDS,
+) -> None:
+    """
+    Worker mode: leases animes from the shared work queue, fetches their
+    episodes with this box's own browser and reports the records back to the
+    queue (the coordinator exports them). Leases are renewed by a heartbeat
+    every lease_seconds / 3; if this process dies they expire and the animes
+    go to another worker. Runs until the queue has nothing left to lease.
+
+    Args:
+        queue_path (str): Path to the work queue database.
+        max_episodes (int): Maximum number of episodes to attempt.
+        workers (int): Animes fetched concurrently by this process.
+        discovery (str): Episode discovery strategy, "linear", "gallop" or "series".
+        range_workers (int): Concurrent episode fetches per anime in gallop mode.
+        lease_seconds (float): Lease length.
+    """
+    owner = f"{socket.gethostname()}-{os.getpid()}"
+    work_queue = WorkQueue(queue_path)
+    held: Set[str] = set()
+    completed = 0
+
+    async def heartbeat() -> None:
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            lost = await asyncio.to_thread(work_queue.heartbeat, owner, list(held), lease_seconds)
+            for slug in lost:
+                print(f"Lost the lease on {slug}, another worker has it")
+
+    async def worker(crawler: "AsyncWebCrawler", loader: PageLoader, worker_id: int) -> None:
+        nonlocal completed
+        session_id = f"iframe_session_{worker_id}"
+        while True:
+            task = await asyncio.to_thread(work_queue.lease, owner, lease_seconds)
+            if task is None:
+                if not (await asyncio.to_thread(work_queue.stats))[LEASED]:
+                    break
+                # Other workers still hold leases that may expire and come back
+                await asyncio.sleep(min(30, lease_seconds / 4))
+                continue
+
+            slug, anime = task
+            held.add(slug)
+            print(f"[{owner}] Fetching episodes for {slug}...")
+            try:
+                episode_map = await fetch_anime_episodes(
+                    crawler,
+                    slug,
+                    max_episodes=max_episodes,
+                    session_id=session_id,
+                    discovery=discovery,
+                    range_workers=range_workers,
+                    loader=loader,
+                    watch_url=anime.get('watch_url') or '',
+                )
+            except TransientFetchError as e:
+                print(f"[{owner}] Giving {slug} back to the queue: {e}")
+                await asyncio.to_thread(work_queue.release, owner, slug, str(e))
+                held.discard(slug)
+                continue
+
+            anime['embed_url'] = json.dumps(episode_map)
+            anime['last_checked'] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            if await asyncio.to_thread(work_queue.complete, owner, slug, anime):
+                completed += 1
+                print(f"[{owner}] Reported {len(episode_map)} episodes for {slug}")
+            else:
+                print(f"[{owner}] Lease on {slug} expired before it finished; result dropped")
+            held.discard(slug)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    try:
+        async with get_crawler(verbose=False) as crawler, \
+                HttpFetcher() as http_fetcher, ParsePool() as parse_pool:
+            loader = PageLoader(
+                crawler,
+                http_fetcher if HTTP_FAST_PATH else None,
+                cache=PageCache(PAGE_CACHE_DIR) if PAGE_CACHE_ENABLED else None,
+                rate_limiter=get_rate_limiter(),
+                breakers=get_circuit_breakers(),
+                parse_pool=parse_pool,
+            )
+            await asyncio.gather(*(worker(crawler, loader, worker_id) for worker_id in range(1, max(1, workers) + 1)))
+    finally:
+        heartbeat_task.cancel()
+        # Hand unfinished animes back right away instead of waiting for the leases to expire
+        for slug in list(held):
+            work_queue.release(owner, slug, "worker stopped")
+        work_queue.close()
+        print(f"[{owner}] Done: {completed} animes reported")
 
 
 async def main():
     """
     Main function to enrich anime data with iframe URLs.
     """
+    parser = argparse.ArgumentParser(description="Fetch episode iframe URLs for scraped animes.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=IFRAME_WORKERS,
+        help=f"Number of animes to fetch concurrently (default: {IFRAME_WORKERS})",
+    )
+    parser.add_argument(
+        "--discovery",
+        choices=["linear", "gallop", "series"],
+        default=EPISODE_DISCOVERY,
+        help="Episode discovery strategy: probe one by one, exponential + binary search, "
+        "or read the episode list from the series page",
+    )
+    parser.add_argument(
+        "--range-workers",
+        type=int,
+        default=EPISODE_RANGE_WORKERS,
+        help="Concurrent episode fetches per anime once the range is known (gallop / series mode)",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Recheck already processed animes for new episodes and update them in place",
+    )
+    parser.add_argument(
+        "--recheck-hours",
+        type=float,
+        default=UPDATE_RECHECK_HOURS,
+        help=f"With --update, skip animes checked within this many hours (default: {UPDATE_RECHECK_HOURS})",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["files", "sqlite"],
+        default=STORAGE_BACKEND,
+        help=f"Keep progress and output in CSV/JSONL files or the SQLite store (default: {STORAGE_BACKEND})",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Crawl with N processes, each with its own browser and output segment, then merge (default: 1)",
+    )
+    parser.add_argument(
+        "--coordinator",
+        choices=["load", "export", "status"],
+        help="Distributed crawl: queue the AZ-list for workers, export their results, or show queue progress",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Distributed crawl: lease animes from the work queue and report results back to it",
+    )
+    parser.add_argument(
+        "--queue",
+        default=WORK_QUEUE_PATH,
+        help=f"Work queue database shared by the coordinator and workers (default: {WORK_QUEUE_PATH})",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=WORK_QUEUE_LEASE_SECONDS,
+        help=f"Worker lease length, renewed by heartbeats (default: {WORK_QUEUE_LEASE_SECONDS:g})",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run and write a summary and collapsed stacks to data/profiles/",
+    )
+    args = parser.parse_args()
+
     # Robust path resolution
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    
-    await enrich_anime_with_iframes(
-        csv_input_file=os.path.join(base_dir, "data", "csvs", "anime_az_list.csv"),
-        csv_output_file=os.path.join(base_dir, "data", "csvs", "anime_az_list_with_iframes.csv"),
-        json_output_file=os.path.join(base_dir, "data", "jsonls", "anime_az_list_with_iframes.jsonl")
-    )
+    csv_input_file = os.path.join(base_dir, "data", "csvs", "anime_az_list.csv")
+    csv_output_file = os.path.join(base_dir, "data", "csvs", "anime_az_list_with_iframes.csv")
+    # <name>.jsonl.gz / .zst when JSONL_COMPRESSION is set
+    json_output_file = jsonl_output_path(os.path.join(base_dir, "data", "jsonls", "anime_az_list_with_iframes.jsonl"))
 
+    if args.coordinator == "load":
+        coordinator_load(args.queue, csv_input_file, json_output_file)
+        return
+    if args.coordinator == "export":
+        coordinator_export(args.queue, csv_output_file, json_output_file)
+        return
+    if args.coordinator == "status":
+        with WorkQueue(args.queue) as work_queue:
+            print(f"Queue: {work_queue.stats()}")
+        return
+    if args.shards > 1:
+        if args.update or args.storage != "files":
+            print("--shards works with the CSV/JSONL files and without --update")
+            return
+        run_shards(
+            args.shards,
+            csv_input_file,
+            csv_output_file,
+            json_output_file,
+            profile=args.profile,
+            workers=args.workers,
+            discovery=args.discovery,
+            range_workers=args.range_workers,
+        )
+        return
+    with MetricsExporter(), CrawlProfiler("fetch_iframes") if args.profile else contextlib.nullcontext():
+        if args.worker:
+            await run_queue_worker(
+                args.queue,
+                workers=args.workers,
+                discovery=args.discovery,
+                range_workers=args.range_workers,
+                lease_seconds=args.lease_seconds,
+            )
+            return
+
+        await enrich_anime_with_iframes(
+            csv_input_file=csv_input_file,
+            csv_output_file=csv_output_file,
+            json_output_file=json_output_file,
+            workers=args.workers,
+            discovery=args.discovery,
+            range_workers=args.range_workers,
+            update=args.update,
+            recheck_after=args.recheck_hours * 3600,
+            storage=args.storage,
+        )
 
 if __name__ == "__main__":
     asyncio.run(main())
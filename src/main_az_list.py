@@ -1,40 +1,62 @@
+import argparse
 import asyncio
+import contextlib
 import csv
 import os
 import re
-from typing import List, Set, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 from bs4 import BeautifulSoup
 
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CacheMode, CrawlerRunConfig
-from dotenv import load_dotenv
-
-from config import BASE_URL
-from utils.scraper_utils import get_browser_config
+from config import (
+    AZ_LIST_CONCURRENCY,
+    AZ_LIST_PAGE_RETRIES,
+    BASE_URL,
+    CACHE_TTLS,
+    HTTP_FAST_PATH,
+    PAGE_CACHE_DIR,
+    PAGE_CACHE_ENABLED,
+    SQLITE_DB_PATH,
+    STORAGE_BACKEND,
+    WAIT_SELECTORS,
+)
+from utils.http_fetcher import HttpFetcher
+from utils.metrics import PAGES, QUEUE_DEPTH, MetricsExporter
+from utils.page_cache import PageCache
+from utils.page_loader import PageLoad, PageLoader
+from utils.parse_pool import ParsePool
+from utils.profiler import CrawlProfiler
+from utils.rate_limiter import get_rate_limiter
+from utils.resilience import get_circuit_breakers
+from utils.record_writer import CsvSink, RecordWriter, StoreSink
+from utils.scraper_utils import get_crawler
+from utils.sqlite_store import CrawlStore
 from utils.data_utils import is_duplicate_anime
+from utils.extractor_backends import get_backend
+from utils.hash_set import HashSet
 from models.venue import Anime
 
-load_dotenv()
+if TYPE_CHECKING:
+    # get_crawler imports crawl4ai when called
+    from crawl4ai import AsyncWebCrawler
 
 # --- FIXED LOGIC INLINED FROM utils.az_list_scraper ---
 
+WATCH_SLUG_RE = re.compile(r'/watch/([a-zA-Z0-9\-]+)$')
+
 def extract_anime_from_html(html_content: str) -> List[dict]:
     """
     Extracts anime titles and slugs from the AZ-list page HTML.
     FIXED: Prevents merging of metadata (like 'TV', '12 Eps') into the title.
+    Links are found by the EXTRACTOR_BACKEND parser (see utils.extractor_backends).
     """
     animes = []
     seen_slugs = set()
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        anime_links = soup.find_all('a', href=re.compile(r'/watch/[a-zA-Z0-9\-]+$'))
-        
-        for link in anime_links:
-            href = link.get('href', '')
+        for href, full_text, child_texts in get_backend().anime_links(html_content):
             
             # --- FIX VARIANT 1: Use separator ---
             # link.get_text(separator='|', strip=True) will return "Title|TV|12 Eps"
             # We then split by '|' and take the first part.
-            full_text = link.get_text(separator='|', strip=True)
             if not full_text:
                 continue
                 
@@ -45,8 +67,8 @@ def extract_anime_from_html(html_content: str) -> List[dict]:
             # But usually the first text node is the title.
             if not title or title.isdigit():
                 # Fallback: try iterating children to find the first text node explicitly
-                for child in link.children:
-                    if isinstance(child, str) and child.strip():
+                for child in child_texts:
+                    if child.strip():
                         title = child.strip()
                         break
             
@@ -54,7 +76,7 @@ def extract_anime_from_html(html_content: str) -> List[dict]:
                  continue
 
             # Extract slug from URL
-            match = re.search(r'/watch/([a-zA-Z0-9\-]+)$', href)
+            match = WATCH_SLUG_RE.search(href)
             if match:
                 slug = match.group(1)
                 
@@ -77,37 +99,54 @@ def extract_anime_from_html(html_content: str) -> List[dict]:
     
     return animes
 
+async def load_az_list_page(loader: PageLoader, base_url: str, page_number: int, session_id: str) -> PageLoad:
+    """Loads an AZ-list page with its animes extracted."""
+    return await loader.load(
+        f"{base_url}?page={page_number}",
+        session_id,
+        extract=extract_anime_from_html,
+        cache_ttl=CACHE_TTLS["az_list"],
+        wait_for=WAIT_SELECTORS["az_list"],
+    )
+
+
 async def scrape_az_list_page(
-    crawler: AsyncWebCrawler,
+    crawler: "AsyncWebCrawler",
     page_number: int,
     base_url: str,
     session_id: str,
-    seen_names: Set[str],
+    seen_names: HashSet,
+    loader: Optional[PageLoader] = None,
+    result: Optional[PageLoad] = None,
 ) -> Tuple[List[dict], bool]:
     """
     Scrapes a single page from the AZ-list and extracts anime with slugs.
     Uses the FIXED extract_anime_from_html function.
+    Pass a PageLoader with an HttpFetcher to try plain HTTP before the browser,
+    and result to reuse a page that was already loaded (with load_az_list_page).
     """
-    url = f"{base_url}?page={page_number}"
-    print(f"Loading page {page_number}...")
-    
-    result = await crawler.arun(
-        url=url,
-        config=CrawlerRunConfig(
-            cache_mode=CacheMode.BYPASS,
-            session_id=session_id,
-        ),
-    )
+    if result is None:
+        print(f"Loading page {page_number}...")
+        loader = loader or PageLoader(
+            crawler,
+            rate_limiter=get_rate_limiter(),
+            breakers=get_circuit_breakers(),
+        )
+        result = await load_az_list_page(loader, base_url, page_number, session_id)
     
     if not result.success:
+        PAGES.inc(kind="az_list", outcome="error")
         print(f"Error fetching page {page_number}: {result.error_message}")
         return [], True
     
-    extracted_animes = extract_anime_from_html(result.html)
+    extracted_animes = result.extracted
     
     if not extracted_animes:
+        PAGES.inc(kind="az_list", outcome="empty")
         print(f"No animes found on page {page_number}.")
         return [], True
+
+    PAGES.inc(kind="az_list", outcome="ok")
     
     unique_animes = []
     for anime in extracted_animes:
@@ -123,24 +162,162 @@ async def scrape_az_list_page(
 
 # --- END FIXED LOGIC ---
 
-async def crawl_anime_az_list():
+PAGE_PARAM_RE = re.compile(r'[?&]page=(\d+)')
+
+
+def extract_last_page_number(html_content: str) -> int:
+    """
+    Extracts the highest page number linked from the AZ-list pagination block.
+
+    Args:
+        html_content (str): The HTML of an AZ-list page.
+
+    Returns:
+        int: The last page number, or 0 if no pagination links were found.
+    """
+    last_page = 0
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        containers = soup.find_all(class_=re.compile(r'pagination'))
+        links = [a for container in containers for a in container.find_all('a', href=True)]
+        if not links:
+            links = soup.find_all('a', href=PAGE_PARAM_RE)
+
+        for link in links:
+            match = PAGE_PARAM_RE.search(link['href'])
+            if match:
+                last_page = max(last_page, int(match.group(1)))
+    except Exception as e:
+        print(f"Error extracting pagination: {e}")
+
+    return last_page
+
+
+async def crawl_az_list_pages_parallel(
+    crawler: "AsyncWebCrawler",
+    loader: PageLoader,
+    base_url: str,
+    session_id: str,
+    last_page: int,
+    seen_names: HashSet,
+    concurrency: int,
+    on_page: Callable[[int, List[dict]], None],
+    preloaded: Optional[Dict[int, PageLoad]] = None,
+    retries: int = AZ_LIST_PAGE_RETRIES,
+) -> List[int]:
+    """
+    Fetches AZ-list pages 1..last_page with a bounded pool of workers.
+
+    Pages complete out of order, so each one is buffered and handed to
+    on_page strictly in page order; deduplication against seen_names happens
+    at that point, which keeps the output identical to a sequential crawl.
+    A page that fails or comes back empty goes to the back of the queue, up
+    to `retries` more times, before it is given up on.
+
+    Args:
+        crawler (AsyncWebCrawler): The web crawler instance.
+        loader (PageLoader): Page loader shared by all workers.
+        base_url (str): The AZ-list base URL.
+        session_id (str): Prefix for the per-worker session identifiers.
+        last_page (int): The last page number to fetch.
+        seen_names (HashSet): Titles already saved; updated in page order.
+        concurrency (int): Maximum number of pages in flight.
+        on_page (Callable[[int, List[dict]], None]): Called with each page's
+            new animes, in page order.
+        preloaded (Optional[Dict[int, PageLoad]]): Pages already loaded (page 1,
+            read for the pagination), used instead of loading them again.
+        retries (int): Extra attempts for a failed or empty page.
+
+    Returns:
+        List[int]: Page numbers that failed or came back empty.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for page_number in range(1, last_page + 1):
+        queue.put_nowait(page_number)
+
+    preloaded = dict(preloaded or {})
+    attempts: Dict[int, int] = {}
+    finished = {}
+    next_page = 1
+    empty_pages = []
+
+    def drain_in_order() -> None:
+        nonlocal next_page
+        while next_page in finished:
+            page_animes = finished.pop(next_page)
+            if not page_animes:
+                empty_pages.append(next_page)
+            new_animes = []
+            for anime in page_animes:
+                if not is_duplicate_anime(anime["title"], seen_names):
+                    seen_names.add(anime["title"])
+                    new_animes.append(anime)
+            on_page(next_page, new_animes)
+            next_page += 1
+
+    async def worker(worker_id: int) -> None:
+        worker_session = f"{session_id}_{worker_id}"
+        while True:
+            try:
+                page_number = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            QUEUE_DEPTH.set(queue.qsize(), queue="az_list_pages")
+            # Dedup only within the page here; cross-page dedup runs in page order
+            animes, _ = await scrape_az_list_page(
+                crawler,
+                page_number,
+                base_url,
+                worker_session,
+                set(),
+                loader=loader,
+                result=preloaded.pop(page_number, None),
+            )
+            if not animes and attempts.get(page_number, 0) < retries:
+                attempts[page_number] = attempts.get(page_number, 0) + 1
+                print(f"Retrying page {page_number} later (retry {attempts[page_number]} of {retries})")
+                queue.put_nowait(page_number)
+                continue
+            finished[page_number] = animes
+            drain_in_order()
+
+    worker_count = max(1, min(concurrency, last_page))
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(1, worker_count + 1)))
+    return empty_pages
+
+async def crawl_anime_az_list(concurrency: int = 1, storage: str = "files", csv_file: Optional[str] = None):
+    """
+    Crawls the AZ-list into anime_az_list.csv (or csv_file), resuming from
+    existing rows.
+
+    With concurrency > 1 the last page number is read from page 1's pagination
+    and all pages are fetched in parallel (see crawl_az_list_pages_parallel).
+    If no pagination is found it falls back to the sequential crawl.
+
+    With storage="sqlite" animes go into the SQLite store (SQLITE_DB_PATH)
+    instead, one transaction per write batch; export_store.py writes the CSV.
+    """
     # Initialize configurations
-    browser_config = get_browser_config()
     session_id = "anime_az_list_session_fixed"
 
     # Initialize state variables
     page_number = 1
     all_animes = []
-    seen_names = set()
+    seen_names = HashSet()
     max_pages = 10000 
 
     # Robust path resolution
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    csv_file = os.path.join(base_dir, "data", "csvs", "anime_az_list.csv")
+    csv_file = csv_file or os.path.join(base_dir, "data", "csvs", "anime_az_list.csv")
     # Or should we append to the existing one? Use a new one to be safe.
 
-    # Load seen names if file exists (optional, to resume)
-    if os.path.exists(csv_file):
+    store = CrawlStore(SQLITE_DB_PATH) if storage == "sqlite" else None
+
+    # Load seen names to resume
+    if store:
+        seen_names = HashSet(store.titles())
+        print(f"Resuming: found {len(seen_names)} animes already in {SQLITE_DB_PATH}")
+    elif os.path.exists(csv_file):
         try:
             with open(csv_file, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
@@ -153,38 +330,85 @@ async def crawl_anime_az_list():
 
     # Prepare for incremental writing
     try:
-        with open(csv_file, 'a', newline='', encoding='utf-8') as f:
-            fieldnames = Anime.model_fields.keys()
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            
-            if not os.path.exists(csv_file) or os.path.getsize(csv_file) == 0:
-                writer.writeheader()
+        async with contextlib.AsyncExitStack() as stack:
+            if store:
+                stack.callback(store.close)
+                # One transaction per batch
+                sink = StoreSink(store.add_animes)
+            else:
+                write_header = not os.path.exists(csv_file) or os.path.getsize(csv_file) == 0
+                sink = CsvSink(csv_file, list(Anime.model_fields.keys()), write_header=write_header)
+            # Rows are written by a background task; closing it drains the queue
+            writer = await stack.enter_async_context(RecordWriter([sink]))
+
+            def save_page(page_number: int, animes: List[dict]) -> None:
+                if not animes:
+                    return
+                writer.write_many(animes)
+                all_animes.extend(animes)
+                print(f"Saved {len(animes)} new animes from page {page_number}")
+
+            async with get_crawler() as crawler, HttpFetcher() as http_fetcher, \
+                    ParsePool() as parse_pool:
+                loader = PageLoader(
+                    crawler,
+                    http_fetcher if HTTP_FAST_PATH else None,
+                    cache=PageCache(PAGE_CACHE_DIR) if PAGE_CACHE_ENABLED else None,
+                    rate_limiter=get_rate_limiter(),
+                    breakers=get_circuit_breakers(),
+                    parse_pool=parse_pool,
+                )
 
-            async with AsyncWebCrawler(config=browser_config) as crawler:
-                while page_number <= max_pages:
-                    animes, should_stop = await scrape_az_list_page(
+                last_page = 0
+                # Page 1 is read for its pagination, then scraped from the same load
+                preloaded: Dict[int, PageLoad] = {}
+                if concurrency > 1:
+                    first_page = await load_az_list_page(loader, BASE_URL, 1, session_id)
+                    preloaded[1] = first_page
+                    last_page = min(extract_last_page_number(first_page.html) if first_page.success else 0, max_pages)
+                    if last_page:
+                        print(f"Found {last_page} pages, fetching {concurrency} at a time")
+                    else:
+                        print("No pagination found on page 1, crawling sequentially")
+
+                if last_page:
+                    empty_pages = await crawl_az_list_pages_parallel(
                         crawler,
-                        page_number,
+                        loader,
                         BASE_URL,
                         session_id,
+                        last_page,
                         seen_names,
+                        concurrency,
+                        save_page,
+                        preloaded=preloaded,
                     )
+                    if empty_pages:
+                        print(f"Pages with no animes (failed or empty): {empty_pages}")
+                else:
+                    while page_number <= max_pages:
+                        animes, should_stop = await scrape_az_list_page(
+                            crawler,
+                            page_number,
+                            BASE_URL,
+                            session_id,
+                            seen_names,
+                            loader=loader,
+                            result=preloaded.pop(page_number, None),
+                        )
 
-                    if animes:
-                        writer.writerows(animes)
-                        f.flush()
-                        all_animes.extend(animes)
-                        print(f"Saved {len(animes)} new animes from page {page_number}")
-                    else:
-                        print(f"No new animes on page {page_number} (all duplicates). Continuing...")
+                        if animes:
+                            save_page(page_number, animes)
+                        else:
+                            print(f"No new animes on page {page_number} (all duplicates). Continuing...")
 
-                    if should_stop:
-                        print(f"Reached end of pages at page {page_number}.")
-                        break
+                        if should_stop:
+                            print(f"Reached end of pages at page {page_number}.")
+                            break
 
-                    page_number += 1
-                    await asyncio.sleep(1)
+                        page_number += 1
                     
+
             if all_animes:
                 print(f"Total this run: {len(all_animes)} animes.")
             else:
@@ -194,7 +418,28 @@ async def crawl_anime_az_list():
         print(f"Error during crawl: {e}")
 
 async def main():
-    await crawl_anime_az_list()
+    parser = argparse.ArgumentParser(description="Scrape the anime AZ-list into a CSV.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=AZ_LIST_CONCURRENCY,
+        help=f"AZ-list pages fetched in parallel; 1 crawls sequentially (default: {AZ_LIST_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["files", "sqlite"],
+        default=STORAGE_BACKEND,
+        help=f"Write to the CSV file or the SQLite store (default: {STORAGE_BACKEND})",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run and write a summary and collapsed stacks to data/profiles/",
+    )
+    args = parser.parse_args()
+
+    with MetricsExporter(), CrawlProfiler("main_az_list") if args.profile else contextlib.nullcontext():
+        await crawl_anime_az_list(concurrency=args.concurrency, storage=args.storage)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -2,29 +2,65 @@ import csv
 import json
 import os
 
+from config import JSONL_FRAME_RECORDS
+from utils.framed_jsonl import FramedJsonl, codec_for_path, jsonl_output_path
+from utils.hash_set import HashSet, tail_tag
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CSV_INPUT = os.path.join(BASE_DIR, "data", "csvs", "anime_az_list_with_iframes.csv")
-JSONL_OUTPUT = os.path.join(BASE_DIR, "data", "jsonls", "test.jsonl")
+# <name>.jsonl.gz / .zst when JSONL_COMPRESSION is set
+JSONL_OUTPUT = jsonl_output_path(os.path.join(BASE_DIR, "data", "jsonls", "test.jsonl"))
+FRAMED = codec_for_path(JSONL_OUTPUT) is not None
+# Slugs of a plain JSONL_OUTPUT, stamped with the JSONL size they cover and
+# tagged with a hash of the 64 KB before that point (see tail_tag)
+SLUGSET_FILE = f"{JSONL_OUTPUT}.slugset"
 
-def sync_csv_to_jsonl():
-    # 1. Load existing slugs from JSONL to avoid duplicates
-    existing_slugs = set()
-    if os.path.exists(JSONL_OUTPUT):
-        print(f"Reading existing JSONL: {JSONL_OUTPUT}")
+
+def load_existing_slugs() -> HashSet:
+    """
+    Returns the slugs already in JSONL_OUTPUT: the saved slug set (mapped,
+    not read) plus the records appended after it was saved. A set stamped
+    past the end of the JSONL, or whose tag no longer matches the bytes
+    before its stamp, belongs to a rewritten or edited file and is rebuilt.
+    A framed JSONL keeps its slugs in its frame index (and that index's
+    own slugset) instead.
+    """
+    if FRAMED:
+        with FramedJsonl(JSONL_OUTPUT) as jsonl:
+            return jsonl.slugs
+
+    size = os.path.getsize(JSONL_OUTPUT) if os.path.exists(JSONL_OUTPUT) else 0
+    existing_slugs = HashSet.load(SLUGSET_FILE)
+    if existing_slugs is not None and (
+        existing_slugs.stamp > size or existing_slugs.tag != tail_tag(JSONL_OUTPUT, existing_slugs.stamp)
+    ):
+        print(f"{JSONL_OUTPUT} changed since {SLUGSET_FILE} was saved, rebuilding it")
+        existing_slugs = None
+    if existing_slugs is None:
+        existing_slugs = HashSet()
+    start = existing_slugs.stamp
+    if start < size:
+        print(f"Reading existing JSONL: {JSONL_OUTPUT} (from byte {start})")
         try:
-            with open(JSONL_OUTPUT, 'r', encoding='utf-8') as f:
+            with open(JSONL_OUTPUT, 'rb') as f:
+                f.seek(start)
                 for line in f:
                     line = line.strip()
                     if not line: continue
                     try:
                         data = json.loads(line)
-                        if 'slug' in data:
+                        if isinstance(data, dict) and data.get('slug'):
                             existing_slugs.add(data['slug'])
                     except json.JSONDecodeError:
                         continue
         except Exception as e:
             print(f"Error reading JSONL: {e}")
-    
+    return existing_slugs
+
+
+def sync_csv_to_jsonl():
+    # 1. Load existing slugs from JSONL to avoid duplicates
+    existing_slugs = load_existing_slugs()
     print(f"Found {len(existing_slugs)} existing items in JSONL.")
 
     # 2. Read CSV and append new items
@@ -37,12 +73,13 @@ def sync_csv_to_jsonl():
     
     try:
         with open(CSV_INPUT, 'r', encoding='utf-8') as csv_f, \
-             open(JSONL_OUTPUT, 'a', encoding='utf-8') as jsonl_f:
+             (FramedJsonl(JSONL_OUTPUT) if FRAMED else open(JSONL_OUTPUT, 'a', encoding='utf-8')) as jsonl_f:
             
             reader = csv.DictReader(csv_f)
+            frame = []
             
             for row in reader:
-                slug = row.get('slug')
+                slug = row.get('slug') or ''
                 
                 # The Twist: Skip if exactly this anime is already in JSONL
                 if slug in existing_slugs:
@@ -59,14 +96,26 @@ def sync_csv_to_jsonl():
                     except:
                         pass # Leave as string if it fails
                 
-                # Write to JSONL
-                json.dump(record, jsonl_f)
-                jsonl_f.write('\n')
+                # Write to JSONL (a framed one gets a frame per JSONL_FRAME_RECORDS records)
+                if FRAMED:
+                    frame.append((json.dumps(record), slug))
+                    if len(frame) >= JSONL_FRAME_RECORDS:
+                        jsonl_f.append_lines(frame)
+                        frame = []
+                else:
+                    json.dump(record, jsonl_f)
+                    jsonl_f.write('\n')
                 
                 existing_slugs.add(slug) # Add to set to prevent dupes within the CSV itself
                 new_items_count += 1
+
+            if frame:
+                jsonl_f.append_lines(frame)
                 
         print(f"Sync complete. Added {new_items_count} new items to JSONL.")
+        if not FRAMED:
+            size = os.path.getsize(JSONL_OUTPUT)
+            existing_slugs.save(SLUGSET_FILE, stamp=size, tag=tail_tag(JSONL_OUTPUT, size))
 
     except Exception as e:
         print(f"Error during sync: {e}")
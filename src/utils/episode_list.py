@@ -0,0 +1,146 @@
+import html
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from bs4 import BeautifulSoup
+
+# Episode links, e.g. "/watch/<slug>/ep-12" (the URL scheme fetch_episode_iframes uses)
+EPISODE_HREF_RE = re.compile(r'/ep-(\d+)(?:[/?#]|$)')
+# Attributes holding an episode number on episode / server list items
+NUMBER_ATTRS = ("data-number", "data-ep", "data-episode")
+# Attributes holding a player URL, read on the episode link / list item itself
+# (never on its children: a thumbnail's lazy-load data-src is no player)
+EMBED_ATTRS = ("data-embed", "data-src", "data-video", "data-link")
+# Attributes holding the series id that episode list endpoints are keyed by
+# (not the generic data-id, which any wrapper element may carry)
+SERIES_ID_ATTRS = ("data-anime-id", "data-series-id")
+# JSON keys of episode list endpoints
+JSON_HTML_KEYS = ("html", "result", "data")
+JSON_LIST_KEYS = ("episodes", "data", "result", "list")
+JSON_NUMBER_KEYS = ("number", "episode", "ep", "num")
+JSON_EMBED_KEYS = ("embed", "embed_url", "url", "src", "link", "iframe")
+
+TAG_RE = re.compile(r'<[^>]+>')
+
+
+@dataclass
+class SeriesPage:
+    """
+    Episodes listed by a series page or its episode list endpoint.
+
+    Falsy when no episode was found, so PageLoader falls back to the browser
+    for pages that build their list with JavaScript.
+    """
+
+    episodes: Dict[int, str] = field(default_factory=dict)  # number -> embed URL ("" if unknown)
+    series_id: str = ""
+
+    def __bool__(self) -> bool:
+        return bool(self.episodes)
+
+
+def _episode_number(value: Any) -> Optional[int]:
+    try:
+        number = int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def _embed(value: Any) -> str:
+    value = str(value or "").strip()
+    return value if value.startswith("https://") else ""
+
+
+def _tag_embed(tag: Any) -> str:
+    return next((embed for embed in (_embed(tag.get(attr)) for attr in EMBED_ATTRS) if embed), "")
+
+
+def _add(episodes: Dict[int, str], number: Optional[int], embed: str) -> None:
+    if number is not None:
+        # A later item (e.g. a server list entry) may know the embed an earlier link didn't
+        episodes[number] = episodes.get(number) or embed
+
+
+def parse_series_page(html_content: str, slug: str = "") -> SeriesPage:
+    """
+    Extracts the episode list from a series' watch page.
+
+    Episodes come from links to `/<slug>/ep-N` and from list items carrying
+    an episode number attribute (data-number, data-ep, ...). A player URL
+    (data-embed, data-src, ...) on the link or item itself becomes the
+    episode's embed candidate; attributes of its children (thumbnails) are
+    not read. Links to other series' episodes (e.g. recommendations) are
+    ignored.
+
+    Args:
+        html_content (str): The series page HTML (or an HTML fragment).
+        slug (str): The series slug; empty accepts any episode link.
+
+    Returns:
+        SeriesPage: The listed episodes and the series id, if the page has one.
+    """
+    page = SeriesPage()
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        for tag in soup.find_all(True):
+            href = tag.get('href') or ''
+            match = EPISODE_HREF_RE.search(href)
+            if match and (not slug or f"/{slug}/" in href):
+                number = _episode_number(match.group(1))
+            else:
+                number = next(
+                    (_episode_number(tag[attr]) for attr in NUMBER_ATTRS if tag.has_attr(attr)), None
+                )
+            if number is None:
+                continue
+
+            _add(page.episodes, number, _tag_embed(tag))
+
+        for attr in SERIES_ID_ATTRS:
+            tag = soup.find(attrs={attr: True})
+            if tag is not None:
+                page.series_id = str(tag[attr]).strip()
+                break
+    except Exception as e:
+        print(f"Error extracting episode list: {e}")
+    return page
+
+
+def parse_episode_list_response(body: str, slug: str = "") -> SeriesPage:
+    """
+    Extracts the episode list from an episode list endpoint's response.
+
+    Understands the usual shapes: {"html": "<fragment>"} (parsed like a
+    series page), or a list of episode objects, bare or under "episodes" /
+    "data", each with a number ("number", "episode", ...) and optionally a
+    player URL ("embed", "url", ...). A browser-rendered response (JSON in a
+    <pre>) is unwrapped first.
+    """
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        try:
+            data = json.loads(html.unescape(TAG_RE.sub('', body)))
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, (dict, list)):
+            # Not JSON: an HTML fragment (whose text alone may parse, e.g. "3")
+            return parse_series_page(body, slug)
+
+    if isinstance(data, dict):
+        for key in JSON_HTML_KEYS:
+            if isinstance(data.get(key), str):
+                return parse_series_page(data[key], slug)
+        data = next((data[key] for key in JSON_LIST_KEYS if isinstance(data.get(key), list)), [])
+
+    page = SeriesPage()
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict):
+            continue
+        number = next((_episode_number(item[key]) for key in JSON_NUMBER_KEYS if key in item), None)
+        embed = next((embed for embed in (_embed(item.get(key)) for key in JSON_EMBED_KEYS) if embed), "")
+        _add(page.episodes, number, embed)
+    return page
@@ -0,0 +1,278 @@
+import html
+import re
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup, NavigableString
+from bs4.element import PreformattedString
+
+from config import EXTRACTOR_BACKEND
+
+try:
+    import lxml.html as lxml_html
+    from lxml.etree import ParserError
+except ImportError:  # lxml is optional
+    lxml_html = None
+
+# An anime link as seen by extract_anime_from_html:
+# (href, all text joined with '|', non-blank direct text children).
+# Comments are not text, and blank children are left out because parsers
+# disagree on how they collapse whitespace.
+AnimeLink = Tuple[str, str, List[str]]
+
+HTTPS_RE = re.compile(r'https://')
+WATCH_HREF_RE = re.compile(r'/watch/[a-zA-Z0-9\-]+$')
+
+
+class Bs4Backend:
+    """
+    Reference backend: a full BeautifulSoup tree built with html.parser.
+    """
+
+    name = "bs4"
+
+    def iframe_src(self, html_content: str) -> Optional[str]:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        iframe = soup.find('iframe', {'src': HTTPS_RE})
+        if iframe and iframe.get('src'):
+            return iframe['src']
+        return None
+
+    def all_iframes(self, html_content: str) -> List[str]:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        return [iframe.get('src') for iframe in soup.find_all('iframe') if iframe.get('src')]
+
+    def canonical_url(self, html_content: str) -> str:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        canonical_link = soup.find('link', {'rel': 'canonical'})
+        if canonical_link and canonical_link.get('href'):
+            return canonical_link['href']
+        return ""
+
+    def anime_links(self, html_content: str) -> List[AnimeLink]:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        return [
+            (
+                link.get('href', ''),
+                link.get_text(separator='|', strip=True),
+                [
+                    child for child in link.children
+                    if isinstance(child, NavigableString)
+                    and not isinstance(child, PreformattedString)  # Comments, CDATA, doctypes
+                    and child.strip()
+                ],
+            )
+            for link in soup.find_all('a', href=WATCH_HREF_RE)
+        ]
+
+
+# --- Streaming tag scanner ---
+# Walks the raw HTML with one compiled regex, skipping comments and
+# script/style bodies (which html.parser treats as opaque text), and stops as
+# soon as the requested tag is found. No tree is built.
+
+_TOKEN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(script|style)(?=[\s/>])[^>]*>.*?</\1\s*>'
+    r'|<(iframe|link|a)(?=[\s/>])((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.IGNORECASE | re.DOTALL,
+)
+_ATTR_RE = re.compile(
+    r'([^\s"\'=<>/]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'=<>`]+)))?'
+)
+_A_BOUNDARY_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(script|style)(?=[\s/>])[^>]*>.*?</\1\s*>'
+    r'|<(/?)a(?=[\s/>])(?:[^>"\']|"[^"]*"|\'[^\']*\')*>',
+    re.IGNORECASE | re.DOTALL,
+)
+_INNER_TOKEN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(?:script|style)(?=[\s/>])[^>]*>.*?</(?:script|style)\s*>'
+    r'|<(/?)([a-zA-Z][^\s/>]*)(?:[^>"\']|"[^"]*"|\'[^\']*\')*?(/?)>|([^<]+|<)',
+    re.IGNORECASE | re.DOTALL,
+)
+_VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+}
+
+
+def _parse_attrs(attr_text: str) -> dict:
+    attrs = {}
+    for match in _ATTR_RE.finditer(attr_text):
+        name, double, single, bare = match.groups()
+        value = double if double is not None else single if single is not None else bare
+        attrs[name.lower()] = html.unescape(value) if value else (value or "")
+    return attrs
+
+
+def _anchor_end(html_content: str, start: int) -> int:
+    """
+    Offset of the `</a>` closing the link whose start tag ends at start,
+    skipping nested links the way html.parser nests them (or the end of
+    the document if it is never closed).
+    """
+    depth = 1
+    for match in _A_BOUNDARY_RE.finditer(html_content, start):
+        closing = match.group(2)
+        if closing is None:
+            continue  # Comment or script/style body
+        depth += -1 if closing else 1
+        if depth == 0:
+            return match.start()
+    return len(html_content)
+
+
+def _scan_tags(html_content: str, tag_name: str):
+    """Yields the attributes of every `tag_name` start tag, with its end offset."""
+    for match in _TOKEN_RE.finditer(html_content):
+        tag = match.group(2)
+        if tag and tag.lower() == tag_name:
+            yield _parse_attrs(match.group(3)), match.end()
+
+
+class StreamBackend:
+    """
+    Regex-driven tag scanner: no tree, early exit for single-element lookups.
+
+    Matches bs4 on nested links and on stray or misnested end tags inside a
+    link. It doesn't track elements opened before a link, so an end tag for
+    one of those (`<ul><a href=...></ul>text`) doesn't close the link here
+    as it does in html.parser.
+    """
+
+    name = "stream"
+
+    def iframe_src(self, html_content: str) -> Optional[str]:
+        for attrs, _ in _scan_tags(html_content, 'iframe'):
+            src = attrs.get('src')
+            if src and HTTPS_RE.search(src):
+                return src
+        return None
+
+    def all_iframes(self, html_content: str) -> List[str]:
+        return [attrs['src'] for attrs, _ in _scan_tags(html_content, 'iframe') if attrs.get('src')]
+
+    def canonical_url(self, html_content: str) -> str:
+        for attrs, _ in _scan_tags(html_content, 'link'):
+            if 'canonical' in (attrs.get('rel') or '').split():
+                return attrs.get('href') or ""
+        return ""
+
+    def anime_links(self, html_content: str) -> List[AnimeLink]:
+        links = []
+        for attrs, end in _scan_tags(html_content, 'a'):
+            href = attrs.get('href')
+            if not href or not WATCH_HREF_RE.search(href):
+                continue
+            inner = html_content[end:_anchor_end(html_content, end)]
+
+            # Elements open inside the link; like html.parser, an end tag
+            # closes everything opened after its start tag, and a stray one
+            # is ignored
+            texts, direct_texts, open_tags = [], [], []
+            for token in _INNER_TOKEN_RE.finditer(inner):
+                closing, tag, self_closing, text = token.groups()
+                if text is not None:
+                    text = html.unescape(text)
+                    if not open_tags and text.strip():
+                        direct_texts.append(text)
+                    if text.strip():
+                        texts.append(text.strip())
+                elif tag and tag.lower() not in _VOID_TAGS and not self_closing:
+                    tag = tag.lower()
+                    if not closing:
+                        open_tags.append(tag)
+                    elif tag in open_tags:
+                        del open_tags[len(open_tags) - 1 - open_tags[::-1].index(tag):]
+            links.append((href, '|'.join(texts), direct_texts))
+        return links
+
+
+# Text inside a link, as html.parser's get_text() sees it (no script/style)
+_LINK_TEXT_XPATH = './/text()[not(ancestor::script or ancestor::style)]'
+
+
+class LxmlBackend:
+    """
+    libxml2 HTML parser via lxml: builds a tree, but in C.
+
+    libxml2 repairs invalid markup differently from html.parser, so on such
+    pages anime_links can differ from bs4:
+    - a link inside a link closes the outer one first (as browsers do), so
+      `<a>One <a>Two</a> tail</a>` gives the outer link only 'One' where
+      html.parser nests them and gives it 'One|Two|tail';
+    - text around a stray end tag stays one string ('12</div>&amp;' is
+      '12&' rather than '12|&').
+    Well-formed pages, like the saved fixtures, give the same results.
+    """
+
+    name = "lxml"
+
+    def _parse(self, html_content: str):
+        if not html_content or not html_content.strip():
+            return None
+        try:
+            return lxml_html.fromstring(html_content)
+        except ParserError:  # Only comments or whitespace, no elements
+            return None
+
+    def iframe_src(self, html_content: str) -> Optional[str]:
+        doc = self._parse(html_content)
+        if doc is None:
+            return None
+        for src in doc.xpath('//iframe/@src'):
+            if src and HTTPS_RE.search(src):
+                return str(src)
+        return None
+
+    def all_iframes(self, html_content: str) -> List[str]:
+        doc = self._parse(html_content)
+        return [] if doc is None else [str(src) for src in doc.xpath('//iframe/@src') if src]
+
+    def canonical_url(self, html_content: str) -> str:
+        doc = self._parse(html_content)
+        if doc is None:
+            return ""
+        for link in doc.xpath('//link[@rel]'):
+            if 'canonical' in link.get('rel', '').split():
+                return link.get('href') or ""
+        return ""
+
+    def anime_links(self, html_content: str) -> List[AnimeLink]:
+        doc = self._parse(html_content)
+        if doc is None:
+            return []
+        links = []
+        for link in doc.xpath('//a[@href]'):
+            href = link.get('href')
+            if not WATCH_HREF_RE.search(href):
+                continue
+            texts = [text.strip() for text in link.xpath(_LINK_TEXT_XPATH) if text.strip()]
+            direct_texts = [link.text] if link.text and link.text.strip() else []
+            direct_texts += [child.tail for child in link if child.tail and child.tail.strip()]
+            links.append((href, '|'.join(texts), direct_texts))
+        return links
+
+
+BACKENDS = {
+    "bs4": Bs4Backend(),
+    "stream": StreamBackend(),
+}
+if lxml_html is not None:
+    BACKENDS["lxml"] = LxmlBackend()
+elif EXTRACTOR_BACKEND.lower() == "lxml":
+    print("lxml is not installed, using the stream extractor backend")
+
+
+def get_backend(name: Optional[str] = None):
+    """
+    Returns the extractor backend named in config (EXTRACTOR_BACKEND) or by name.
+    Falls back to the streaming scanner when lxml is requested but missing.
+    """
+    name = (name or EXTRACTOR_BACKEND).lower()
+    if name == "lxml" and name not in BACKENDS:
+        name = "stream"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown extractor backend: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]
@@ -0,0 +1,434 @@
+import gzip
+import io
+import json
+import os
+import zlib
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from config import JSONL_COMPRESSION, JSONL_COMPRESSION_LEVEL, JSONL_FRAME_BYTES, JSONL_FRAME_RECORDS
+from utils.hash_set import HashMap
+from utils.jsonl_index import IndexedJsonl, _crc
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional
+    zstandard = None
+
+
+class GzipCodec:
+    """Frames are gzip members: the file as a whole is a regular .gz."""
+
+    name = "gzip"
+    suffix = ".gz"
+    errors: Tuple[type, ...] = (zlib.error, EOFError, gzip.BadGzipFile)
+
+    def __init__(self, level: int = JSONL_COMPRESSION_LEVEL):
+        self.level = level or 6
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def decompressor(self) -> Any:
+        # Stops at the end of one member; what follows is left in unused_data
+        return zlib.decompressobj(wbits=31)
+
+    def stream(self, f: BinaryIO) -> BinaryIO:
+        return gzip.GzipFile(fileobj=f, mode="rb")
+
+
+class ZstdCodec:
+    """Frames are zstd frames: the file as a whole is a regular .zst."""
+
+    name = "zstd"
+    suffix = ".zst"
+
+    def __init__(self, level: int = JSONL_COMPRESSION_LEVEL):
+        self.level = level or 3
+        self.errors: Tuple[type, ...] = (zstandard.ZstdError,)
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompressor(self) -> Any:
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def stream(self, f: BinaryIO) -> BinaryIO:
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True))
+
+
+Codec = Union[GzipCodec, ZstdCodec]
+
+CODECS: Dict[str, Codec] = {"gzip": GzipCodec()}
+if zstandard is not None:
+    CODECS["zstd"] = ZstdCodec()
+elif JSONL_COMPRESSION == "zstd":
+    print("zstandard is not installed, compressing JSONL with gzip")
+
+SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+# entries value of a record still buffered for the next frame
+PENDING = (-1, 0)
+
+# Compressed bytes split_frames reads (and feeds a decompressor) at a time
+SPLIT_READ_BYTES = 64 * 1024
+
+
+def codec_for_path(path: str) -> Optional[Codec]:
+    """Returns the codec of a framed JSONL path (by suffix), None for plain JSONL."""
+    for suffix, name in SUFFIXES.items():
+        if path.endswith(suffix):
+            if name not in CODECS:
+                raise ValueError(f"{path} is {name}-compressed, which needs the zstandard package")
+            return CODECS[name]
+    return None
+
+
+def jsonl_output_path(path: str, compression: str = JSONL_COMPRESSION) -> str:
+    """
+    Returns the path a JSONL output is written to: path itself, or path with
+    the suffix of the compression named in config (JSONL_COMPRESSION) or by
+    compression. Falls back to gzip when zstd is requested but missing.
+    """
+    if not compression:
+        return path
+    if compression == "zstd" and compression not in CODECS:
+        compression = "gzip"
+    if compression not in CODECS:
+        raise ValueError(f"Unknown JSONL compression: {compression} (choose from {', '.join(CODECS)})")
+    return path + CODECS[compression].suffix
+
+
+def jsonl_temp_path(path: str) -> str:
+    """<path>.tmp, with the compression suffix kept last (x.jsonl.gz -> x.jsonl.tmp.gz)."""
+    codec = codec_for_path(path)
+    if codec is None:
+        return f"{path}.tmp"
+    return f"{path[:-len(codec.suffix)]}.tmp{codec.suffix}"
+
+
+def read_jsonl_lines(path: str) -> Iterator[bytes]:
+    """
+    Streams the lines of a JSONL file, plain or framed. A torn last frame
+    (an interrupted write) ends the stream instead of raising.
+    """
+    codec = codec_for_path(path)
+    with open(path, "rb") as f:
+        if codec is None:
+            yield from f
+            return
+        try:
+            yield from codec.stream(f)
+        except codec.errors as e:
+            print(f"Stopped reading {path} at a torn frame: {e}")
+
+
+def split_frames(
+    codec: Codec, f: BinaryIO, start: int = 0, end: Optional[int] = None,
+) -> Iterator[Tuple[int, int, str, bytes]]:
+    """
+    Yields (offset, length, crc, content) for each complete frame of f
+    between start and end (default: the end of the file), in order. Stops
+    at the first torn or corrupt frame.
+
+    The file is read SPLIT_READ_BYTES at a time and fed to one decompressor
+    per frame, so memory stays at about one frame and each byte is copied
+    a bounded number of times whatever the file size.
+    """
+    f.seek(start)
+    position = offset = start
+    buffer = memoryview(b"")
+    while True:
+        decompressor = codec.decompressor()
+        parts: List[bytes] = []
+        length = crc = 0
+        while not decompressor.eof:
+            if not buffer:
+                size = SPLIT_READ_BYTES if end is None else min(SPLIT_READ_BYTES, end - position)
+                buffer = memoryview(f.read(size) if size > 0 else b"")
+                position += len(buffer)
+                if not buffer:
+                    return  # End of the range, or a torn frame if length > 0
+            try:
+                parts.append(decompressor.decompress(buffer))
+            except codec.errors:
+                return
+            used = len(buffer) - len(decompressor.unused_data) if decompressor.eof else len(buffer)
+            crc = zlib.crc32(buffer[:used], crc)
+            length += used
+            buffer = buffer[used:]
+        yield offset, length, f"{crc & 0xFFFFFFFF:08x}", b"".join(parts)
+        offset += length
+
+
+def _frame_payload(offset: int, length: int, crc: str, slugs: List[str]) -> str:
+    return "\t".join(["f", str(offset), str(length), crc, *slugs])
+
+
+def _record_slug(line: bytes) -> Optional[str]:
+    # The slug of a JSONL line, None for a record without one or invalid JSON
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(record, dict) and record.get("slug"):
+        return record["slug"]
+    return None
+
+
+class FramedJsonl(IndexedJsonl):
+    """
+    Append-only JSONL file of compressed frames, with a sidecar frame index
+    (`<path>.idx`).
+
+    Appended records are buffered until they fill a frame (frame_records
+    records or frame_bytes uncompressed bytes, whichever comes first), so a
+    slow crawl that flushes a record or two at a time still gets full
+    frames. Each frame is an independent gzip member or zstd frame, so the
+    file is also a regular .gz / .zst that zcat / zstdcat stream, and the
+    embed URLs repeated across a frame compress several-fold. flush(),
+    checkpoint() and close() write the partial frame. Buffered records are
+    in `entries` and read_record() already; a crash loses them, like records
+    still in the writer queue, and the next run backfills them from the CSV
+    or fetches them again.
+
+    The index line of a frame holds its offset, length, CRC32 and slugs:
+        - resume gets the slugs from the index without decompressing anything,
+        - read_record(slug) decompresses only the frame holding the slug,
+        - `frames` lists (offset, length) in file order, for readers that
+          split the file between processes.
+    Recovery is IndexedJsonl's: frames appended after the last indexed one
+    are indexed on open, and a torn final frame is truncated away.
+
+    If the file doesn't exist yet but its uncompressed counterpart (the path
+    without .gz / .zst) does, open() compresses that into it first, so
+    turning JSONL_COMPRESSION on keeps the records already crawled.
+
+    Args:
+        path (str): The framed file; its suffix picks the codec.
+        frame_records (int): Maximum records per frame.
+        frame_bytes (int): Uncompressed bytes at which a frame is written.
+    """
+
+    def __init__(self, path: str, frame_records: int = JSONL_FRAME_RECORDS, frame_bytes: int = JSONL_FRAME_BYTES):
+        super().__init__(path)
+        self.codec = codec_for_path(path) or CODECS["gzip"]
+        self.frame_records = max(1, frame_records)
+        self.frame_bytes = max(1, frame_bytes)
+        # None until first use when the index was loaded from its slugset
+        self._frames: Optional[List[Tuple[int, int]]] = []
+        # Records waiting for the next frame, and their uncompressed size
+        self._pending: List[Tuple[bytes, str]] = []
+        self._pending_bytes = 0
+        # Offset of the last frame read_record decompressed, and its lines by slug
+        self._cached_frame: Tuple[int, Dict[str, bytes]] = (-1, {})
+
+    def open(self) -> "FramedJsonl":
+        plain_path = self.path[:-len(self.codec.suffix)]
+        if (not os.path.exists(self.path) or os.path.getsize(self.path) == 0) and os.path.exists(plain_path):
+            self._import_plain(plain_path)
+        super().open()
+        return self
+
+    # --- Writing ---
+
+    def close(self) -> None:
+        if self._file:
+            self.flush()
+        super().close()
+
+    def checkpoint(self, key: str, value: Any) -> None:
+        # A checkpoint vouches for everything appended before it
+        if self._file:
+            self.flush()
+        super().checkpoint(key, value)
+
+    def append_lines(self, lines: List[Tuple[str, str]]) -> None:
+        """
+        Appends a batch of (serialized JSON record, slug) pairs. Frames they
+        complete are written with one write and indexed; the rest waits for
+        the next append or flush().
+        """
+        self.append_encoded([(line + "\n").encode("utf-8") for line, _ in lines], [slug for _, slug in lines])
+
+    def append_encoded(self, lines: List[bytes], slugs: List[str]) -> None:
+        """Like append_lines, for newline-terminated lines already encoded."""
+        frames = []
+        for line, slug in zip(lines, slugs):
+            self._pending.append((line, slug))
+            self._pending_bytes += len(line)
+            if slug:
+                self.entries.put(slug, *PENDING)
+            if len(self._pending) >= self.frame_records or self._pending_bytes >= self.frame_bytes:
+                frames.append(self._take_pending())
+        self._write_frames(frames)
+
+    def flush(self) -> None:
+        """Writes the buffered records as a (partial) frame."""
+        if self._pending:
+            self._write_frames([self._take_pending()])
+
+    def _take_pending(self) -> List[Tuple[bytes, str]]:
+        pending, self._pending, self._pending_bytes = self._pending, [], 0
+        return pending
+
+    def _write_frames(self, frames: List[List[Tuple[bytes, str]]]) -> None:
+        # One write for all frames, then their index lines; a crash can only tear the last frame
+        if not frames:
+            return
+        offset = self._file.tell()
+        data = []
+        payloads = []
+        for records in frames:
+            frame = self.codec.compress(b"".join(line for line, _ in records))
+            payloads.append(self._frame_entry(offset, len(frame), _crc(frame), [slug for _, slug in records if slug]))
+            data.append(frame)
+            offset += len(frame)
+        self._file.write(b"".join(data))
+        self._file.flush()
+        self._write_index_lines(payloads)
+
+    def _frame_entry(self, offset: int, length: int, crc: str, slugs: List[str]) -> str:
+        for slug in slugs:
+            self.entries.put(slug, offset, length)
+        if self._frames is not None:
+            self._frames.append((offset, length))
+        self._last_entry = (offset, length, crc)
+        self._dirty = True
+        return _frame_payload(offset, length, crc, slugs)
+
+    def _import_plain(self, plain_path: str) -> None:
+        # Writes each frame's index line as it goes, so open() only has to
+        # load the index afterwards
+        print(f"Compressing {plain_path} into {self.path}...")
+        if os.path.exists(self.slugset_path):
+            os.remove(self.slugset_path)
+        batch: List[bytes] = []
+        batch_bytes = 0
+        with open(self.path, "wb") as f, open(self.index_path, "w", encoding="utf-8") as index:
+            def write_frame() -> None:
+                frame = self.codec.compress(b"".join(batch))
+                slugs = [slug for slug in map(_record_slug, batch) if slug]
+                payload = _frame_payload(f.tell(), len(frame), _crc(frame), slugs)
+                f.write(frame)
+                index.write(f"{payload}\t{_crc(payload.encode('utf-8'))}\n")
+
+            for line in read_jsonl_lines(plain_path):
+                line = line.strip()
+                if line:
+                    batch.append(line + b"\n")
+                    batch_bytes += len(line) + 1
+                if len(batch) >= self.frame_records or batch_bytes >= self.frame_bytes:
+                    write_frame()
+                    batch = []
+                    batch_bytes = 0
+            if batch:
+                write_frame()
+            # The index must not claim frames that never reached the disk
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --- Reading ---
+
+    @property
+    def frames(self) -> List[Tuple[int, int]]:
+        """(offset, length) of every frame, in file order."""
+        if self._frames is None:
+            # The slugset has no frame list; read it from the index on first use
+            self._frames = [
+                (int(fields[1]), int(fields[2])) for fields, _ in self._read_index_lines() if fields[0] == "f"
+            ]
+        return self._frames
+
+    def read_frame(self, offset: int, length: int) -> bytes:
+        """Returns the decompressed content of the frame at offset."""
+        if self._file:
+            self._file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return self.codec.decompressor().decompress(f.read(length))
+
+    def read_record(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Reads one record by slug, decompressing only its frame."""
+        entry = self.entries.get(slug)
+        if entry is None:
+            return None
+        if entry == PENDING:
+            line = next(line for line, pending_slug in reversed(self._pending) if pending_slug == slug)
+            return json.loads(line)
+        if self._cached_frame[0] != entry[0]:
+            lines = {}
+            for line in self.read_frame(*entry).splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("slug"):
+                    lines[record["slug"]] = line
+            self._cached_frame = (entry[0], lines)
+        line = self._cached_frame[1].get(slug)
+        return json.loads(line) if line is not None else None
+
+    # --- Loading / recovery ---
+
+    def _load_slugset(self) -> int:
+        start = super()._load_slugset()
+        if start:
+            self._frames = None
+        return start
+
+    def _load_index_line(self, fields: List[str]) -> None:
+        if fields[0] == "f":
+            self._frame_entry(int(fields[1]), int(fields[2]), fields[3], fields[4:])
+        else:
+            super()._load_index_line(fields)
+
+    def _scan_tail(self, start: int) -> int:
+        """
+        Indexes frames after `start`, truncating a torn final frame.
+
+        Returns:
+            int: Number of records indexed.
+        """
+        added = 0
+        end = start
+        payloads: List[str] = []
+        with open(self.path, "r+b") as f:
+            for offset, length, crc, content in split_frames(self.codec, f, start):
+                slugs = []
+                for line in content.splitlines():
+                    slug = _record_slug(line)
+                    if slug:
+                        slugs.append(slug)
+                    elif line.strip():
+                        print(f"Skipping invalid JSON line in the frame at byte {offset} of {self.path}")
+                payloads.append(self._frame_entry(offset, length, crc, slugs))
+                added += len(slugs)
+                end = offset + length
+                if len(payloads) >= 1024:
+                    self._write_index_lines(payloads)
+                    payloads = []
+            if end < os.fstat(f.fileno()).st_size:
+                print(f"Dropped torn frame at byte {end} of {self.path}")
+                f.truncate(end)
+        self._write_index_lines(payloads)
+        return added
+
+    def _rebuild(self) -> None:
+        print(f"Building index for {self.path}...")
+        self.entries = HashMap()
+        self.checkpoints.clear()
+        self._frames = []
+        self._last_entry = None
+        self._dirty = True
+        open(self.index_path, "w").close()
+        self._scan_tail(0)
+
+
+JsonlFile = Union[IndexedJsonl, FramedJsonl]
+
+
+def jsonl_file(path: str) -> JsonlFile:
+    """Returns an (unopened) FramedJsonl for a .gz / .zst path, else an IndexedJsonl."""
+    if codec_for_path(path) is not None:
+        return FramedJsonl(path)
+    return IndexedJsonl(path)
@@ -0,0 +1,276 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+MAGIC = b"HSET\x00\x00\x00\x02"
+MAP_MAGIC = b"HMAP\x00\x00\x00\x01"
+# magic, capacity, count, bloom bytes, stamp, tag
+HEADER = struct.Struct("<8sQQQQQ")
+BLOOM_HASHES = 4
+# Bytes of a file before a stamp that tail_tag() hashes
+TAIL_TAG_BYTES = 64 * 1024
+
+Table = Union[array, memoryview]
+
+
+def key_hash(key: str) -> int:
+    """
+    Stable 64-bit hash of a key (the same in every process, unlike hash()).
+    0 marks an empty slot, so it is never returned.
+    """
+    value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1
+
+
+def tail_tag(path: str, end: int, tail_bytes: int = TAIL_TAG_BYTES) -> int:
+    """
+    64-bit hash of the tail_bytes of path before byte end: a saved set's
+    `tag`, to tell a file that was only appended to since from one that
+    was rewritten or edited.
+    """
+    data = b""
+    if end:
+        start = max(0, end - tail_bytes)
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class HashSet:
+    """
+    Compact set of strings (slugs, titles) stored as 64-bit hashes in an
+    open-addressing table (linear probing, at most half full): 8-16 bytes
+    per key instead of the ~100 of a Python set of str. Two keys sharing a
+    64-bit hash would be confused, which at crawl sizes (millions of keys)
+    is a ~1e-7 chance.
+
+    An optional Bloom filter (bloom_bits per key, 4 hashes) answers most
+    lookups for absent keys without touching the table, which matters once
+    the table is a large file mapped from disk.
+
+    save() writes the table to a file with a caller-defined `stamp` and
+    `tag` (e.g. the size of the data file it was built from and a hash of
+    the bytes before that point, to tell a rewritten file from one that was
+    only appended to); load() maps that file
+    copy-on-write with a single mmap, so startup doesn't read or rebuild
+    anything, and later adds stay in memory until the next save().
+
+    Args:
+        keys (Iterable[str]): Initial keys.
+        capacity (int): Initial number of slots (rounded up to a power of 2).
+        bloom_bits (int): Bloom filter bits per key of capacity; 0 for none.
+    """
+
+    MAGIC = MAGIC
+    # int64 values stored per slot after the table (see HashMap)
+    VALUES_PER_KEY = 0
+
+    def __init__(self, keys: Iterable[str] = (), capacity: int = 1024, bloom_bits: int = 0):
+        self._capacity = self._round_capacity(capacity)
+        self._table: Table = array("Q", bytes(8 * self._capacity))
+        self._count = 0
+        self._bloom_bits_per_key = bloom_bits
+        self._bloom: Optional[Union[bytearray, memoryview]] = self._new_bloom() if bloom_bits else None
+        self.stamp = 0
+        self.tag = 0
+        self.update(keys)
+
+    @staticmethod
+    def _round_capacity(capacity: int) -> int:
+        size = 16
+        while size < capacity:
+            size *= 2
+        return size
+
+    def _new_bloom(self) -> bytearray:
+        return bytearray(max(8, self._capacity * self._bloom_bits_per_key // 8))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains_hash(key_hash(key))
+
+    def add(self, key: str) -> bool:
+        """Adds a key; returns False if it was already present."""
+        return self.add_hash(key_hash(key))
+
+    def update(self, keys: Iterable[str]) -> None:
+        if isinstance(keys, HashSet):
+            for value in keys.hashes():
+                self.add_hash(value)
+            return
+        for key in keys:
+            self.add_hash(key_hash(key))
+
+    def hashes(self) -> Iterator[int]:
+        """Yields the stored 64-bit hashes."""
+        for value in self._table:
+            if value:
+                yield value
+
+    # --- Hash-level operations ---
+
+    def _bloom_positions(self, value: int) -> Iterator[int]:
+        bits = len(self._bloom) * 8
+        # Double hashing from the two 32-bit halves of the key hash
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        for i in range(BLOOM_HASHES):
+            yield (first + i * second) % bits
+
+    def _slot(self, value: int) -> int:
+        # Index of value's slot, or of the empty slot where it would go
+        mask = self._capacity - 1
+        index = (value ^ (value >> 29)) & mask
+        table = self._table
+        while True:
+            current = table[index]
+            if current == value or current == 0:
+                return index
+            index = (index + 1) & mask
+
+    def contains_hash(self, value: int) -> bool:
+        if self._bloom is not None:
+            for position in self._bloom_positions(value):
+                if not self._bloom[position >> 3] & (1 << (position & 7)):
+                    return False
+        return self._table[self._slot(value)] == value
+
+    def add_hash(self, value: int) -> bool:
+        index = self._slot(value)
+        if self._table[index] == value:
+            return False
+        self._table[index] = value
+        self._count += 1
+        if self._bloom is not None:
+            for position in self._bloom_positions(value):
+                self._bloom[position >> 3] |= 1 << (position & 7)
+        if self._count * 2 > self._capacity:
+            self._grow()
+        return True
+
+    def _grow(self) -> None:
+        old = self._table
+        self._capacity *= 2
+        self._table = array("Q", bytes(8 * self._capacity))
+        self._count = 0
+        if self._bloom is not None:
+            self._bloom = self._new_bloom()
+        # A loaded set moves into memory here; the mapping is released with its last view
+        for value in old:
+            if value:
+                self.add_hash(value)
+
+    # --- Persistence ---
+
+    def save(self, path: str, stamp: Optional[int] = None, tag: Optional[int] = None) -> None:
+        """Writes the set to path (atomically), with an optional stamp and tag."""
+        if stamp is not None:
+            self.stamp = stamp
+        if tag is not None:
+            self.tag = tag
+        bloom_bytes = len(self._bloom) if self._bloom is not None else 0
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(self.MAGIC, self._capacity, self._count, bloom_bytes, self.stamp, self.tag))
+            f.write(memoryview(self._table).cast("B"))
+            if self.VALUES_PER_KEY:
+                f.write(memoryview(self._values).cast("B"))
+            if self._bloom is not None:
+                f.write(self._bloom)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["HashSet"]:
+        """
+        Maps a saved set (copy-on-write: adds never reach the file).
+
+        Returns:
+            Optional[HashSet]: The set, or None if the file is missing or
+            not a saved set.
+        """
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return None
+        if len(mapped) < HEADER.size:
+            mapped.close()
+            return None
+        magic, capacity, count, bloom_bytes, stamp, tag = HEADER.unpack_from(mapped)
+        table_end = HEADER.size + 8 * capacity
+        values_end = table_end + 8 * cls.VALUES_PER_KEY * capacity
+        if magic != cls.MAGIC or len(mapped) != values_end + bloom_bytes or capacity < 16 or capacity & (capacity - 1):
+            mapped.close()
+            return None
+
+        hash_set = cls.__new__(cls)
+        view = memoryview(mapped)
+        hash_set._capacity = capacity
+        hash_set._table = view[HEADER.size:table_end].cast("Q")
+        hash_set._count = count
+        if cls.VALUES_PER_KEY:
+            hash_set._values = view[table_end:values_end].cast("q")
+        hash_set._bloom = view[values_end:] if bloom_bytes else None
+        hash_set._bloom_bits_per_key = bloom_bytes * 8 // capacity if bloom_bytes else 0
+        hash_set.stamp = stamp
+        hash_set.tag = tag
+        return hash_set
+
+
+class HashMap(HashSet):
+    """
+    HashSet whose keys each carry a pair of integers (e.g. a record's byte
+    offset and length), kept in a parallel array('q'): 48-96 bytes per key
+    instead of the ~200 of a dict from str to tuple. Keys added through the
+    HashSet methods get (0, 0). Saved and mapped like a HashSet, values
+    included.
+
+    Args:
+        capacity (int): Initial number of slots (rounded up to a power of 2).
+    """
+
+    MAGIC = MAP_MAGIC
+    VALUES_PER_KEY = 2
+
+    def __init__(self, capacity: int = 1024):
+        self._values: Table = array("q", bytes(16 * self._round_capacity(capacity)))
+        super().__init__(capacity=capacity)
+
+    def get(self, key: str) -> Optional[Tuple[int, int]]:
+        """Returns the key's pair, or None if the key is absent."""
+        value = key_hash(key)
+        index = self._slot(value)
+        if self._table[index] != value:
+            return None
+        return self._values[2 * index], self._values[2 * index + 1]
+
+    def put(self, key: str, first: int, second: int) -> None:
+        """Adds or updates a key with its pair."""
+        value = key_hash(key)
+        index = self._slot(value)
+        if self._table[index] != value:
+            self._table[index] = value
+            self._count += 1
+        self._values[2 * index] = first
+        self._values[2 * index + 1] = second
+        if self._count * 2 > self._capacity:
+            self._grow()
+
+    def _grow(self) -> None:
+        old_table, old_values = self._table, self._values
+        self._capacity *= 2
+        self._table = array("Q", bytes(8 * self._capacity))
+        self._values = array("q", bytes(16 * self._capacity))
+        for old_index, value in enumerate(old_table):
+            if value:
+                index = self._slot(value)
+                self._table[index] = value
+                self._values[2 * index] = old_values[2 * old_index]
+                self._values[2 * index + 1] = old_values[2 * old_index + 1]
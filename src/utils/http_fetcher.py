@@ -0,0 +1,91 @@
+from typing import Dict, Optional
+
+import aiohttp
+
+from config import HTTP_MAX_CONNECTIONS, HTTP_TIMEOUT, HTTP_USER_AGENT
+from utils.page_loader import PageLoad
+
+
+class HttpFetcher:
+    """
+    Plain HTTP fetcher with a pooled keep-alive connection set.
+
+    Used as a fast path in front of the browser: most AZ-list and episode
+    pages carry the data we need in the server HTML, so they don't need to be
+    rendered in Chromium at all.
+
+    Usage:
+        async with HttpFetcher() as http_fetcher:
+            page = await http_fetcher.fetch(url)
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        timeout: float = HTTP_TIMEOUT,
+        user_agent: str = HTTP_USER_AGENT,
+    ):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "HttpFetcher":
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            keepalive_timeout=30,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={
+                "User-Agent": self.user_agent,
+                "Accept": "text/html,application/xhtml+xml,*/*;q=0.8",
+                "Accept-Encoding": "gzip, deflate",
+            },
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> PageLoad:
+        """
+        Fetches a page over HTTP. Responses are decompressed transparently.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (Optional[Dict[str, str]]): Extra request headers.
+
+        Returns:
+            PageLoad: The fetched page; success is False on network errors and
+            non-2xx responses.
+        """
+        if self._session is None:
+            raise RuntimeError("HttpFetcher must be used as an async context manager")
+
+        try:
+            async with self._session.get(url, headers=headers, allow_redirects=True) as response:
+                html = await response.text(errors="replace")
+                return PageLoad(
+                    url=url,
+                    success=200 <= response.status < 300,
+                    html=html,
+                    error_message="" if response.status < 300 else f"HTTP {response.status}",
+                    status_code=response.status,
+                    headers=dict(response.headers),
+                    source="http",
+                )
+        except Exception as e:
+            return PageLoad(
+                url=url,
+                success=False,
+                error_message=f"{type(e).__name__}: {e}",
+                source="http",
+            )
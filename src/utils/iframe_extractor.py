@@ -1,11 +1,12 @@
-import re
-from bs4 import BeautifulSoup
 from typing import Optional
 
+from utils.extractor_backends import get_backend
+
 
 def extract_iframe_src(html_content: str) -> Optional[str]:
     """
     Extracts the iframe src attribute from HTML content.
+    The parser used is chosen by EXTRACTOR_BACKEND (see utils.extractor_backends).
     
     Args:
         html_content (str): The HTML content to search.
@@ -14,10 +15,7 @@ def extract_iframe_src(html_content: str) -> Optional[str]:
         Optional[str]: The iframe src URL if found, None otherwise.
     """
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        iframe = soup.find('iframe', {'src': re.compile(r'https://')})
-        if iframe and iframe.get('src'):
-            return iframe['src']
+        return get_backend().iframe_src(html_content)
     except Exception as e:
         print(f"Error extracting iframe src: {e}")
     
@@ -36,12 +34,7 @@ def extract_all_iframes(html_content: str) -> list:
     """
     iframes = []
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        all_iframes = soup.find_all('iframe')
-        for iframe in all_iframes:
-            src = iframe.get('src')
-            if src:
-                iframes.append(src)
+        iframes = get_backend().all_iframes(html_content)
     except Exception as e:
         print(f"Error extracting iframes: {e}")
     
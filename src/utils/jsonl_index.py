@@ -0,0 +1,310 @@
+import io
+import json
+import os
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.hash_set import HashMap, tail_tag
+
+
+def _crc(data: bytes) -> str:
+    return f"{zlib.crc32(data) & 0xFFFFFFFF:08x}"
+
+
+class IndexedJsonl:
+    """
+    Append-only JSONL file with a sidecar slug index (`<path>.idx`).
+
+    Every record is written as one `<json>\\n` write, and its slug, byte
+    offset, length and CRC32 are appended to the index, each index line
+    carrying its own checksum. On open only the index is read; the JSONL is
+    touched just to verify the last indexed record and to pick up a tail that
+    was appended after it (a crash between the two writes, or another tool
+    appending). A torn final record is truncated away, so the old whole-file
+    "}{" repair pass only runs when there is no usable index at all.
+
+    The index also stores named checkpoints (e.g. the size of a companion
+    CSV at the last clean shutdown).
+
+    Slugs are kept as 64-bit hashes in a HashMap (`entries`, 48-96 bytes per
+    slug), which close() saves to `<path>.idx.slugset` stamped with the
+    index size and tagged with a hash of the index bytes before it. The next
+    open() maps that file and only parses the index lines written after the
+    stamp (the closing checkpoint / last-entry lines and whatever came
+    later), so a resume is a single mmap instead of a parse of every index
+    line. A slugset whose tag no longer matches is ignored and replaced.
+
+    Usage:
+        with IndexedJsonl(path) as jsonl:
+            if slug not in jsonl.slugs:
+                jsonl.append(record)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.slugset_path = f"{self.index_path}.slugset"
+        self.entries = HashMap()  # slug hash -> (offset, length)
+        self.checkpoints: Dict[str, str] = {}
+        self._file = None
+        self._index_file = None
+        self._last_entry: Optional[Tuple[int, int, str]] = None  # offset, length, crc
+        # Whether entries changed since the slugset was saved
+        self._dirty = False
+
+    @property
+    def slugs(self) -> HashMap:
+        """The indexed slugs (supports `in` and len())."""
+        return self.entries
+
+    def __enter__(self) -> "IndexedJsonl":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def open(self) -> "IndexedJsonl":
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            # Nothing to index (a leftover index would be stale)
+            open(self.path, "wb").close()
+            open(self.index_path, "w").close()
+        elif not os.path.exists(self.index_path) or not self._load_index():
+            self._rebuild()
+        else:
+            indexed_end = self._indexed_end()
+            if indexed_end < os.path.getsize(self.path):
+                added = self._scan_tail(indexed_end)
+                print(f"Indexed {added} records appended to {self.path} since the last run.")
+
+        self._file = open(self.path, "ab")
+        self._index_file = open(self.index_path, "a", encoding="utf-8")
+        return self
+
+    def close(self) -> None:
+        mark = None
+        if self._index_file and self._dirty:
+            # Restate the checkpoints and the last entry after the slugset's
+            # stamp, so loading from the slugset needs no earlier index line
+            self._index_file.flush()
+            mark = os.path.getsize(self.index_path)
+            closing = [f"c\t{key}\t{value}" for key, value in self.checkpoints.items()]
+            if self._last_entry is not None:
+                closing.append("l\t{}\t{}\t{}".format(*self._last_entry))
+            self._write_index_lines(closing)
+        for handle in (self._file, self._index_file):
+            if handle:
+                handle.flush()
+                os.fsync(handle.fileno())
+                handle.close()
+        self._file = self._index_file = None
+        if mark is not None:
+            self.entries.save(self.slugset_path, stamp=mark, tag=tail_tag(self.index_path, mark))
+            self._dirty = False
+
+    # --- Writing ---
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Appends a record (it must have a slug) and indexes it."""
+        self.append_line(json.dumps(record), record["slug"])
+
+    def append_line(self, line: str, slug: str) -> None:
+        """Appends an already serialized JSON record and indexes it."""
+        self.append_lines([(line, slug)])
+
+    def append_lines(self, lines: List[Tuple[str, str]]) -> None:
+        """
+        Appends a batch of (serialized JSON record, slug) pairs with one
+        write and indexes them. A crash can only tear the last record.
+        """
+        encoded = [(line + "\n").encode("utf-8") for line, _ in lines]
+        offset = self._file.tell()
+        self._file.write(b"".join(encoded))
+        self._file.flush()
+
+        payloads = []
+        for data, (_, slug) in zip(encoded, lines):
+            payloads.append(self._entry(slug, offset, len(data), _crc(data)))
+            offset += len(data)
+        self._write_index_lines(payloads)
+
+    def checkpoint(self, key: str, value: Any) -> None:
+        self.checkpoints[key] = str(value)
+        self._write_index_lines([f"c\t{key}\t{value}"])
+
+    def _entry(self, slug: str, offset: int, length: int, crc: str) -> str:
+        self.entries.put(slug, offset, length)
+        self._last_entry = (offset, length, crc)
+        self._dirty = True
+        return f"r\t{offset}\t{length}\t{crc}\t{slug}"
+
+    def _add_entry(self, slug: str, offset: int, length: int, crc: str) -> None:
+        self._write_index_lines([self._entry(slug, offset, length, crc)])
+
+    def _write_index_lines(self, payloads: List[str]) -> None:
+        handle = self._index_file or open(self.index_path, "a", encoding="utf-8")
+        handle.write("".join(f"{payload}\t{_crc(payload.encode('utf-8'))}\n" for payload in payloads))
+        handle.flush()
+        if handle is not self._index_file:
+            handle.close()
+
+    # --- Reading ---
+
+    def read_record(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Reads one record by slug with a single seek."""
+        entry = self.entries.get(slug)
+        if entry is None:
+            return None
+        if self._file:
+            self._file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(entry[0])
+            return json.loads(f.read(entry[1]))
+
+    # --- Loading / recovery ---
+
+    def _load_index(self) -> bool:
+        """Loads the index; returns False if it doesn't match the JSONL."""
+        valid_bytes = self._load_slugset()
+        for fields, valid_bytes in self._read_index_lines(valid_bytes):
+            self._load_index_line(fields)
+
+        if valid_bytes < os.path.getsize(self.index_path):
+            with open(self.index_path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+        if self._last_entry is None:
+            return False  # Nothing indexed yet, but the JSONL isn't empty
+        offset, length, crc = self._last_entry
+        if offset + length > os.path.getsize(self.path):
+            return False  # JSONL was truncated or rewritten
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return _crc(f.read(length)) == crc
+
+    def _read_index_lines(self, start: int = 0) -> Iterator[Tuple[List[str], int]]:
+        """
+        Yields the fields of each index line from byte start, with the offset
+        it ends at. Stops at the first torn or corrupt line.
+        """
+        with open(self.index_path, "rb") as f:
+            f.seek(start)
+            end = start
+            for raw_line in f:
+                line = raw_line.decode("utf-8", errors="replace").rstrip("\n")
+                payload, _, checksum = line.rpartition("\t")
+                if not raw_line.endswith(b"\n") or _crc(payload.encode("utf-8")) != checksum:
+                    return  # Torn or corrupt tail of the index
+                end += len(raw_line)
+                yield payload.split("\t"), end
+
+    def _load_slugset(self) -> int:
+        """
+        Maps the saved slugset if it still matches the index.
+
+        Returns:
+            int: Index offset to parse from (0 without a usable slugset).
+        """
+        entries = HashMap.load(self.slugset_path)
+        if entries is None:
+            self._dirty = True
+            return 0
+        if entries.stamp > os.path.getsize(self.index_path) or entries.tag != tail_tag(self.index_path, entries.stamp):
+            print(f"{self.index_path} changed since {self.slugset_path} was saved, reading the whole index")
+            self._dirty = True
+            return 0
+        self.entries = entries
+        return entries.stamp
+
+    def _load_index_line(self, fields: List[str]) -> None:
+        if fields[0] == "r":
+            offset, length = int(fields[1]), int(fields[2])
+            self.entries.put(fields[4], offset, length)
+            self._last_entry = (offset, length, fields[3])
+            self._dirty = True
+        elif fields[0] == "c":
+            self.checkpoints[fields[1]] = fields[2]
+        elif fields[0] == "l":
+            # Last entry, restated by close() for loads that start at the slugset
+            self._last_entry = (int(fields[1]), int(fields[2]), fields[3])
+
+    def _indexed_end(self) -> int:
+        if self._last_entry is None:
+            return 0
+        return self._last_entry[0] + self._last_entry[1]
+
+    def _scan_tail(self, start: int) -> int:
+        """
+        Indexes records after `start`, truncating a torn final record.
+
+        Returns:
+            int: Number of records indexed.
+        """
+        added = 0
+        with open(self.path, "r+b") as f:
+            f.seek(start)
+            offset = start
+            for line in f.read().splitlines(keepends=True):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+
+                if not line.endswith(b"\n"):
+                    f.seek(offset)
+                    f.truncate()
+                    if record is not None:
+                        # Complete JSON whose newline never made it to disk
+                        line += b"\n"
+                        f.write(line)
+                    else:
+                        print(f"Dropped torn record at byte {offset} of {self.path}")
+                        break
+
+                if isinstance(record, dict) and record.get("slug"):
+                    self._add_entry(record["slug"], offset, len(line), _crc(line))
+                    added += 1
+                elif line.strip():
+                    print(f"Skipping invalid JSON line at byte {offset} of {self.path}")
+                offset += len(line)
+        return added
+
+    def _rebuild(self) -> None:
+        print(f"Building index for {self.path}...")
+        self.entries = HashMap()
+        self.checkpoints.clear()
+        self._last_entry = None
+        self._dirty = True
+        self._repair_legacy()
+        open(self.index_path, "w").close()
+        self._scan_tail(0)
+
+    def _repair_legacy(self) -> None:
+        # Files written before the index existed may have records glued
+        # together ("}{") or broken lines; fix them once, up front
+        with open(self.path, "r", encoding="utf-8") as f:
+            content = f.read()
+
+        needs_repair = False
+        if "}{" in content:
+            print("Detected corrupted JSONL (missing newlines). Repairing...")
+            content = content.replace("}{", "}\n{")
+            needs_repair = True
+
+        valid_lines = []
+        for line in io.StringIO(content):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                json.loads(line)
+                valid_lines.append(line)
+            except json.JSONDecodeError:
+                print(f"Skipping invalid JSON line during load: {line[:50]}...")
+                needs_repair = True
+
+        if needs_repair:
+            print("Rewriting repaired JSONL file...")
+            with open(self.path, "w", encoding="utf-8") as f:
+                for line in valid_lines:
+                    f.write(line + "\n")
@@ -0,0 +1,105 @@
+import weakref
+from typing import TYPE_CHECKING, Any, Iterable, Tuple
+from urllib.parse import urlsplit
+
+from config import LEAN_BLOCKED_HOSTS, LEAN_BLOCKED_TYPES
+from utils.metrics import BROWSER_PAGE_BYTES, BROWSER_REQUESTS
+
+if TYPE_CHECKING:
+    from crawl4ai import AsyncWebCrawler
+
+# Chromium flags of the lean profile: no media autoplay, no image decoding
+LEAN_BROWSER_ARGS = [
+    "--autoplay-policy=user-gesture-required",
+    "--blink-settings=imagesEnabled=false",
+    "--disable-remote-fonts",
+]
+
+
+def _host_matches(host: str, suffixes: Iterable[str]) -> bool:
+    return any(host == suffix or host.endswith("." + suffix) for suffix in suffixes)
+
+
+class LeanProfile:
+    """
+    Request blocking for the browser, installed as crawl4ai hooks.
+
+    Only the HTML of a page is needed (to read an iframe `src` or the AZ-list
+    links), so every browser context gets a route that aborts:
+        - resources of the types in blocked_types (images, media, fonts,
+          stylesheets, ...),
+        - documents of child frames: the episode iframe's `src` is read from
+          the DOM, its video player never has to load,
+        - requests to blocked_hosts (ad, analytics and tracker domains,
+          matched with their subdomains).
+    The page itself, its scripts and its XHR / fetch calls go through, so
+    pages that build their iframe in JavaScript still work.
+
+    Per rendered page, the bytes that were loaded (from Content-Length) go to
+    crawler_browser_page_bytes and blocked / loaded requests to
+    crawler_browser_requests_total{type, action}.
+
+    Args:
+        blocked_types (Iterable[str]): Playwright resource types to abort.
+        blocked_hosts (Iterable[str]): Host suffixes to abort.
+    """
+
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = LEAN_BLOCKED_TYPES,
+        blocked_hosts: Iterable[str] = LEAN_BLOCKED_HOSTS,
+    ):
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_hosts = tuple(blocked_hosts)
+        self._routed_contexts: "weakref.WeakSet[Any]" = weakref.WeakSet()
+        # page -> bytes loaded since the page's last render
+        self._page_bytes: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+
+    def install(self, crawler: "AsyncWebCrawler") -> "AsyncWebCrawler":
+        """Sets the hooks on crawler (before it starts) and returns it."""
+        crawler.crawler_strategy.set_hook("on_page_context_created", self._on_page_context_created)
+        crawler.crawler_strategy.set_hook("before_return_html", self._before_return_html)
+        return crawler
+
+    def classify(self, request: Any) -> Tuple[str, bool]:
+        """Returns (request type label, whether to abort) for a request."""
+        resource_type = request.resource_type
+        if resource_type == "document":
+            if request.frame.parent_frame is not None:
+                return "subframe", True
+            return "document", False
+        if resource_type in self.blocked_types:
+            return resource_type, True
+        if self.blocked_hosts and _host_matches(urlsplit(request.url).hostname or "", self.blocked_hosts):
+            return "blocked_host", True
+        return resource_type, False
+
+    async def _route(self, route: Any) -> None:
+        label, abort = self.classify(route.request)
+        BROWSER_REQUESTS.inc(type=label, action="blocked" if abort else "loaded")
+        if abort:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _on_response(self, page: Any, response: Any) -> None:
+        try:
+            size = int(response.headers.get("content-length", 0))
+        except ValueError:
+            size = 0
+        self._page_bytes[page] = self._page_bytes.get(page, 0) + size
+
+    async def _on_page_context_created(self, page: Any, context: Any = None, **kwargs: Any) -> Any:
+        # Called on every crawl, also for reused session pages: set things up once
+        if context is not None and context not in self._routed_contexts:
+            await context.route("**/*", self._route)
+            self._routed_contexts.add(context)
+        if page not in self._page_bytes:
+            self._page_bytes[page] = 0
+            page.on("response", lambda response: self._on_response(page, response))
+        return page
+
+    async def _before_return_html(self, page: Any, **kwargs: Any) -> Any:
+        BROWSER_PAGE_BYTES.observe(self._page_bytes.get(page, 0))
+        self._page_bytes[page] = 0
+        return page
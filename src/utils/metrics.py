@@ -0,0 +1,377 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import METRICS_INTERVAL, METRICS_PORT, METRICS_TEXTFILE
+
+# Seconds; covers a parse (ms) up to a slow render or a long backoff
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A value that only goes up (requests sent, records written)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def values(self) -> Dict[LabelValues, float]:
+        """Returns the value per label set."""
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(Counter):
+    """A value that goes up and down (queue depth, pages in flight)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values (latencies in seconds) over fixed
+    buckets, with a running sum and count per label set.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., count in +Inf only], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observes the seconds spent in the with block (also around awaits)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def totals(self) -> Dict[LabelValues, Tuple[int, float]]:
+        """Returns (count, sum) per label set."""
+        with self._lock:
+            return {key: (sum(counts), self._sums[key]) for key, counts in self._counts.items()}
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text
+    exposition format. Registering a name twice returns the existing metric.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, help_text, labels, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_shared: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Returns the process-wide metrics registry."""
+    global _shared
+    if _shared is None:
+        _shared = MetricsRegistry()
+    return _shared
+
+
+# --- Crawler metrics ---
+
+STAGE_SECONDS = get_metrics().histogram(
+    "crawler_stage_seconds",
+    "Seconds spent per crawl stage (fetch, render, parse, write, sleep)",
+    ("stage",),
+)
+REQUESTS = get_metrics().counter(
+    "crawler_requests_total",
+    "Requests sent to the site by method (http, browser) and status",
+    ("method", "status"),
+)
+PAGES = get_metrics().counter(
+    "crawler_pages_total",
+    "Pages handled by the scrapers by kind (az_list, episode) and outcome",
+    ("kind", "outcome"),
+)
+CACHE_LOOKUPS = get_metrics().counter(
+    "crawler_cache_lookups_total",
+    "Page cache lookups by result (hit, revalidated, miss)",
+    ("result",),
+)
+RECORDS_WRITTEN = get_metrics().counter(
+    "crawler_records_written_total",
+    "Records written by the output writer",
+)
+IN_FLIGHT = get_metrics().gauge(
+    "crawler_in_flight_requests",
+    "Requests to the site currently awaiting a response, by method",
+    ("method",),
+)
+QUEUE_DEPTH = get_metrics().gauge(
+    "crawler_queue_depth",
+    "Items waiting per queue (writer, az_list_pages, animes)",
+    ("queue",),
+)
+RATE_LIMIT = get_metrics().gauge(
+    "crawler_rate_limit_requests_per_second",
+    "Current rate of the adaptive rate limiter",
+)
+BROWSER_REQUESTS = get_metrics().counter(
+    "crawler_browser_requests_total",
+    "Requests made by browser pages by resource type and action (loaded, blocked)",
+    ("type", "action"),
+)
+BROWSER_PAGE_BYTES = get_metrics().histogram(
+    "crawler_browser_page_bytes",
+    "Bytes loaded per rendered page (Content-Length of its responses)",
+    buckets=(16 * 1024, 64 * 1024, 256 * 1024, 1024**2, 4 * 1024**2, 16 * 1024**2),
+)
+
+
+def stage_timer(stage: str):
+    """Times a with block into crawler_stage_seconds{stage=...}."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+class MetricsExporter:
+    """
+    Exposes the metrics registry while a crawl runs: over HTTP at
+    http://127.0.0.1:<port>/metrics for Prometheus to scrape, and/or as a
+    textfile rewritten every `interval` seconds (atomically, for the
+    node_exporter textfile collector or a plain cron check). On close the
+    textfile is written one last time and the time spent per stage is
+    printed.
+
+    Usage:
+        with MetricsExporter():
+            asyncio.run(crawl())
+
+    Args:
+        port (int): HTTP port; 0 disables the endpoint.
+        textfile (str): Path of the textfile; empty disables it.
+        interval (float): Seconds between textfile writes.
+    """
+
+    def __init__(self, port: int = METRICS_PORT, textfile: str = METRICS_TEXTFILE, interval: float = METRICS_INTERVAL):
+        self.port = port
+        self.textfile = textfile
+        self.interval = interval
+        self.registry = get_metrics()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "MetricsExporter":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def start(self) -> None:
+        if self.port:
+            try:
+                self._server = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+            except OSError as e:
+                print(f"Metrics endpoint disabled, can't listen on port {self.port}: {e}")
+            else:
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, daemon=True).start()
+                print(f"Metrics at http://127.0.0.1:{self.port}/metrics")
+        if self.textfile:
+            self._writer = threading.Thread(target=self._write_periodically, daemon=True)
+            self._writer.start()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._writer is not None:
+            self._stop.set()
+            self._writer.join()
+            self._writer = None
+            self.write_textfile()
+        self.print_summary()
+
+    def write_textfile(self) -> None:
+        directory = os.path.dirname(self.textfile)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(self.registry.render())
+            os.replace(temp_path, self.textfile)
+        except OSError as e:
+            print(f"Error writing metrics to {self.textfile}: {e}")
+
+    def _write_periodically(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write_textfile()
+
+    def print_summary(self) -> None:
+        totals = STAGE_SECONDS.totals()
+        if totals:
+            print("Time per stage:")
+            for (stage,), (count, seconds) in sorted(totals.items(), key=lambda item: -item[1][1]):
+                print(f"  {stage:<8} {seconds:>10.1f}s  {count:>8} calls  {seconds / count * 1000:>8.1f}ms avg")
+        pages, page_bytes = BROWSER_PAGE_BYTES.totals().get((), (0, 0.0))
+        if pages:
+            blocked = sum(
+                value for (_, action), value in BROWSER_REQUESTS.values().items() if action == "blocked"
+            )
+            print(
+                f"Browser: {pages} pages, {page_bytes / pages / 1024:.0f} KB loaded "
+                f"and {blocked / pages:.1f} requests blocked per page"
+            )
+
+    def _handler(self):
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return MetricsHandler
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from config import PAGE_CACHE_DIR, PAGE_CACHE_ENABLED, PAGE_CACHE_MAX_BYTES
+
+
+@dataclass
+class CachedPage:
+    """
+    A page stored in the PageCache.
+    """
+
+    url: str
+    html: str
+    stored_at: float
+    etag: str = ""
+    last_modified: str = ""
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    On-disk page cache keyed by the SHA-256 of the URL.
+
+    Each entry is a `<key>.html` body plus a `<key>.json` metadata file
+    (URL, store time, ETag / Last-Modified) under a two-character fan-out
+    directory. Freshness is decided per call with a TTL, so different page
+    kinds can share one cache with different policies. Reads bump the entry's
+    mtime, and once the total size exceeds max_bytes the least recently used
+    entries are evicted.
+
+    Args:
+        cache_dir (str): Directory for the cache files.
+        max_bytes (int): Size cap for all cached bodies.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(
+            os.path.getsize(path) for path in self._iter_bodies()
+        )
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        directory = os.path.join(self.cache_dir, key[:2])
+        return directory, os.path.join(directory, f"{key}.html"), os.path.join(directory, f"{key}.json")
+
+    def _iter_bodies(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".html"):
+                    yield os.path.join(root, name)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Returns the cached page for a URL (fresh or stale), or None.
+        """
+        _, body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "r", encoding="utf-8") as f:
+                html = f.read()
+            os.utime(body_path)  # LRU bookkeeping
+        except (OSError, ValueError):
+            return None
+
+        return CachedPage(
+            url=url,
+            html=html,
+            stored_at=meta.get("stored_at", 0.0),
+            etag=meta.get("etag", ""),
+            last_modified=meta.get("last_modified", ""),
+        )
+
+    def put(self, url: str, html: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """
+        Stores a page, keeping its ETag / Last-Modified for revalidation.
+        """
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        directory, body_path, meta_path = self._paths(url)
+        os.makedirs(directory, exist_ok=True)
+
+        old_size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+        self._write_atomic(body_path, html)
+        self._write_atomic(
+            meta_path,
+            json.dumps(
+                {
+                    "url": url,
+                    "stored_at": time.time(),
+                    "etag": headers.get("etag", ""),
+                    "last_modified": headers.get("last-modified", ""),
+                }
+            ),
+        )
+
+        self.total_bytes += os.path.getsize(body_path) - old_size
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def touch(self, url: str) -> None:
+        """
+        Marks a cached page as fresh again (after a 304 Not Modified).
+        """
+        _, _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            meta["stored_at"] = time.time()
+            self._write_atomic(meta_path, json.dumps(meta))
+        except (OSError, ValueError):
+            pass
+
+    def _write_atomic(self, path: str, content: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until we're 10% under the cap
+        target = self.max_bytes * 0.9
+        bodies = sorted(self._iter_bodies(), key=os.path.getmtime)
+        for body_path in bodies:
+            if self.total_bytes <= target:
+                break
+            try:
+                size = os.path.getsize(body_path)
+                os.remove(body_path)
+                os.remove(body_path[: -len(".html")] + ".json")
+            except OSError:
+                continue
+            self.total_bytes -= size
+
+
+_shared: Optional[PageCache] = None
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Returns the process-wide page cache (PAGE_CACHE_DIR), or None when PAGE_CACHE is off."""
+    global _shared
+    if _shared is None and PAGE_CACHE_ENABLED:
+        _shared = PageCache(PAGE_CACHE_DIR)
+    return _shared
@@ -0,0 +1,309 @@
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional
+
+from config import RENDER_SETTLE_MS, RENDER_TIMEOUT_MS, RENDER_WAIT_UNTIL
+from utils.metrics import CACHE_LOOKUPS, IN_FLIGHT, REQUESTS, stage_timer
+from utils.page_cache import PageCache
+from utils.parse_pool import ParsePool
+from utils.rate_limiter import RateLimiter
+
+if TYPE_CHECKING:
+    # crawl4ai pulls in the whole browser stack; only the render path imports it
+    from crawl4ai import AsyncWebCrawler
+
+    from utils.http_fetcher import HttpFetcher
+    from utils.resilience import CircuitBreakers
+
+# Attribute the wait condition sets on <html> when it holds ("found" or
+# "settled"); a render whose HTML lacks it was cut off by RENDER_TIMEOUT_MS
+RENDER_WAIT_ATTR = "data-render-wait"
+RENDER_WAIT_RE = re.compile(r'<html\b[^>]*\s' + RENDER_WAIT_ATTR + r'=["\']?(found|settled)', re.IGNORECASE)
+
+
+def wait_condition(selector: str, settle_ms: int = RENDER_SETTLE_MS) -> str:
+    """
+    Returns a crawl4ai wait_for condition that holds once the document is
+    parsed and has an element matching selector (present, not necessarily
+    visible), or once the page finished loading settle_ms ago without one,
+    so a missing element ends the wait instead of running into the timeout.
+
+    The parse must be complete so that a long list isn't returned cut off at
+    its first item; images, scripts and frames are not waited for.
+
+    crawl4ai returns the HTML without an error when the wait times out, so
+    the condition records which way it held in the RENDER_WAIT_ATTR
+    attribute of <html>; see render_completed().
+    """
+    return (
+        f"js:() => {{"
+        f" const done = (how) => {{ document.documentElement.setAttribute('{RENDER_WAIT_ATTR}', how); return true; }};"
+        f" if (document.readyState !== 'loading' && document.querySelector({json.dumps(selector)})) return done('found');"
+        f" const nav = performance.getEntriesByType('navigation')[0];"
+        f" return !!nav && nav.loadEventEnd > 0 && performance.now() - nav.loadEventEnd > {settle_ms} && done('settled');"
+        f" }}"
+    )
+
+
+def render_completed(html: str) -> bool:
+    """True if html comes from a render whose wait_condition held (not one that timed out)."""
+    return RENDER_WAIT_RE.search(html) is not None
+
+
+@dataclass
+class PageLoad:
+    """
+    Outcome of loading a page, whichever way it was fetched.
+    """
+
+    url: str
+    success: bool
+    html: str = ""
+    error_message: str = ""
+    status_code: Optional[int] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    source: str = "browser"  # "http", "browser" or "cache"
+    extracted: Any = None  # Result of the extract callable passed to PageLoader.load
+    # False when a render ran into RENDER_TIMEOUT_MS before the page loaded or
+    # showed the awaited element, so an empty result says nothing about the page
+    complete: bool = True
+
+
+class PageLoader:
+    """
+    Loads pages for the scrapers: from the page cache when fresh, then plain
+    HTTP (when an HttpFetcher is given), falling back to rendering in the
+    browser when the extract callable finds nothing in the raw HTML.
+
+    Every request that reaches the site (HTTP, conditional GET or render)
+    first takes a token from the rate limiter and reports its outcome and
+    latency back to it; cache hits are not paced. While the circuit breaker
+    for the page's host is open, requests wait instead of being sent.
+
+    Args:
+        crawler (AsyncWebCrawler): The web crawler instance.
+        http_fetcher (Optional[HttpFetcher]): Fast path fetcher, or None to
+            always use the browser.
+        cache (Optional[PageCache]): On-disk page cache, or None to disable.
+        rate_limiter (Optional[RateLimiter]): Shared request pacing, or None
+            for no pacing.
+        breakers (Optional[CircuitBreakers]): Per-host circuit breakers, or
+            None to disable.
+        parse_pool (Optional[ParsePool]): Runs the extract callables off the
+            event loop, or None to parse inline.
+    """
+
+    def __init__(
+        self,
+        crawler: "AsyncWebCrawler",
+        http_fetcher: Optional["HttpFetcher"] = None,
+        cache: Optional[PageCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        breakers: Optional["CircuitBreakers"] = None,
+        parse_pool: Optional[ParsePool] = None,
+    ):
+        self.crawler = crawler
+        self.http_fetcher = http_fetcher
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.breakers = breakers
+        self.parse_pool = parse_pool
+
+    async def load(
+        self,
+        url: str,
+        session_id: str,
+        extract: Optional[Callable[[str], Any]] = None,
+        cache_ttl: Optional[float] = None,
+        wait_for: Optional[str] = None,
+    ) -> PageLoad:
+        """
+        Loads a page and runs the extract callable on its HTML.
+
+        Args:
+            url (str): The URL to load.
+            session_id (str): The browser session identifier.
+            extract (Optional[Callable[[str], Any]]): Parses the HTML; a falsy
+                result on the HTTP response triggers the browser fallback.
+            cache_ttl (Optional[float]): Seconds a cached copy stays fresh; None
+                bypasses the cache. Only pages with a truthy extract result
+                are stored, so misses are always refetched.
+            wait_for (Optional[str]): CSS selector of the element extract
+                reads. A render then returns as soon as it is in the DOM
+                instead of after the full page load, and gives up after
+                RENDER_TIMEOUT_MS (the page is then returned with
+                complete=False).
+
+        Returns:
+            PageLoad: The loaded page with `extracted` set when it succeeded.
+        """
+        use_cache = self.cache is not None and cache_ttl is not None
+        page = None
+        if use_cache:
+            cached = self.cache.get(url)
+            if cached is not None and cached.age() <= cache_ttl:
+                cached_page = await self._from_cache(url, cached.html, extract)
+                if cached_page is not None:
+                    CACHE_LOOKUPS.inc(result="hit")
+                    return cached_page
+            elif cached is not None and self.http_fetcher is not None and cached.validators():
+                # A stale entry with validators can be confirmed with a cheap conditional GET
+                response = await self._paced(
+                    url, lambda: self.http_fetcher.fetch(url, headers=cached.validators())
+                )
+                if response.status_code == 304:
+                    self.cache.touch(url)
+                    cached_page = await self._from_cache(url, cached.html, extract)
+                    if cached_page is not None:
+                        CACHE_LOOKUPS.inc(result="revalidated")
+                        return cached_page
+                elif response.success:
+                    # Changed upstream: use the fresh body if it's usable
+                    response.extracted = await self._extract(extract, response.html)
+                    if extract is None or response.extracted:
+                        page = response
+
+        if use_cache:
+            CACHE_LOOKUPS.inc(result="miss")
+        if page is None:
+            page = await self._fetch(url, session_id, extract, wait_for)
+
+        if use_cache and page.success and (extract is None or page.extracted):
+            self.cache.put(url, page.html, page.headers)
+        return page
+
+    async def _fetch(
+        self,
+        url: str,
+        session_id: str,
+        extract: Optional[Callable[[str], Any]] = None,
+        wait_for: Optional[str] = None,
+    ) -> PageLoad:
+        if self.http_fetcher is not None:
+            page = await self._paced(url, lambda: self.http_fetcher.fetch(url))
+            if page.success:
+                page.extracted = await self._extract(extract, page.html)
+                if extract is None or page.extracted:
+                    return page
+            elif page.status_code in (404, 410):
+                # The server says the page doesn't exist; rendering won't change that
+                return page
+
+        return await self.render(url, session_id, extract, wait_for)
+
+    async def _paced(
+        self,
+        url: str,
+        request: Callable[[], Awaitable[PageLoad]],
+        method: str = "http",
+    ) -> PageLoad:
+        breaker = self.breakers.for_url(url) if self.breakers else None
+        with stage_timer("sleep"):
+            trial = await breaker.wait() if breaker else False
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+
+        start = time.monotonic()
+        IN_FLIGHT.inc(method=method)
+        try:
+            with stage_timer("fetch" if method == "http" else "render"):
+                page = await request()
+        except Exception:
+            REQUESTS.inc(method=method, status="error")
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(False, time.monotonic() - start)
+            if breaker:
+                breaker.record(False, trial)
+            raise
+        except BaseException:
+            # Cancelled: says nothing about the host's health
+            if breaker:
+                breaker.abandon(trial)
+            raise
+        finally:
+            IN_FLIGHT.dec(method=method)
+
+        REQUESTS.inc(method=method, status=str(page.status_code or ("ok" if page.success else "error")))
+
+        # A 404 is a healthy answer (e.g. probing past the last episode); a
+        # render cut off by the timeout is not
+        healthy = (page.success and page.complete) or (
+            page.status_code is not None and page.status_code < 500 and page.status_code != 429
+        )
+        if self.rate_limiter is not None:
+            reason = None if healthy else page.error_message or None
+            self.rate_limiter.record(healthy, time.monotonic() - start, reason)
+        if breaker:
+            breaker.record(healthy, trial)
+        return page
+
+    async def _extract(self, extract: Optional[Callable[[str], Any]], html: str) -> Any:
+        if extract is None:
+            return None
+        with stage_timer("parse"):
+            if self.parse_pool is not None:
+                return await self.parse_pool.run(extract, html)
+            return extract(html)
+
+    async def _from_cache(
+        self,
+        url: str,
+        html: str,
+        extract: Optional[Callable[[str], Any]],
+    ) -> Optional[PageLoad]:
+        page = PageLoad(url=url, success=True, html=html, source="cache")
+        page.extracted = await self._extract(extract, html)
+        if extract is not None and not page.extracted:
+            return None
+        return page
+
+    async def render(
+        self,
+        url: str,
+        session_id: str,
+        extract: Optional[Callable[[str], Any]] = None,
+        wait_for: Optional[str] = None,
+    ) -> PageLoad:
+        """
+        Renders a page in the browser, skipping the HTTP fast path.
+        """
+        page = await self._paced(url, lambda: self._render(url, session_id, wait_for), method="browser")
+        if page.success and extract:
+            page.extracted = await self._extract(extract, page.html)
+        return page
+
+    async def _render(self, url: str, session_id: str, wait_for: Optional[str] = None) -> PageLoad:
+        from crawl4ai import CacheMode, CrawlerRunConfig
+
+        early_exit = {}
+        if wait_for:
+            # A timed out wait still returns the page; render_completed() tells them apart
+            early_exit = dict(
+                wait_until=RENDER_WAIT_UNTIL,
+                wait_for=wait_condition(wait_for),
+                page_timeout=RENDER_TIMEOUT_MS,
+                delay_before_return_html=0,
+            )
+        result = await self.crawler.arun(
+            url=url,
+            config=CrawlerRunConfig(
+                cache_mode=CacheMode.BYPASS,
+                session_id=session_id,
+                **early_exit,
+            ),
+        )
+        page = PageLoad(
+            url=url,
+            success=result.success,
+            html=result.html or "",
+            error_message=result.error_message or "",
+            status_code=result.status_code,
+            headers=dict(result.response_headers or {}),
+            source="browser",
+        )
+        if wait_for and page.success and not render_completed(page.html):
+            page.complete = False
+            page.error_message = page.error_message or f"Timed out after {RENDER_TIMEOUT_MS} ms waiting for {wait_for}"
+        return page
@@ -0,0 +1,76 @@
+import asyncio
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from config import PARSE_INLINE_BYTES, PARSE_WORKERS
+
+
+class ParsePool:
+    """
+    Runs HTML extract callables off the event loop.
+
+    Pages larger than inline_threshold characters are parsed in a
+    ProcessPoolExecutor, so a slow parse doesn't stall the other fetches in
+    flight; smaller pages are parsed inline, where the round trip to a
+    worker would cost more than the parse. The HTML goes to the worker as a
+    single pickled str and the result comes back as plain data (lists,
+    dicts, strings), so extract callables must be module-level functions.
+
+    Workers are started with "spawn", since forking a process that runs a
+    browser driver and an event loop isn't safe. If the pool breaks, or a
+    callable can't be pickled, parsing falls back to inline.
+
+    Usage:
+        async with ParsePool() as parse_pool:
+            links = await parse_pool.run(extract_anime_from_html, html)
+
+    Args:
+        workers (int): Worker processes; 0 parses everything inline.
+        inline_threshold (int): Pages up to this many characters are parsed inline.
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS, inline_threshold: int = PARSE_INLINE_BYTES):
+        self.workers = workers
+        self.inline_threshold = inline_threshold
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "ParsePool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, extract: Callable[[str], Any], html_content: str) -> Any:
+        """Returns extract(html_content), computed inline or in a worker process."""
+        if self.workers <= 0 or len(html_content) <= self.inline_threshold:
+            return extract(html_content)
+
+        if self._executor is None:
+            # Started on first use, so runs that only hit small pages never spawn workers
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, extract, html_content)
+        except BrokenProcessPool as e:
+            print(f"Parse pool broke ({e}), parsing inline from now on")
+            self.workers = 0
+        except (pickle.PicklingError, AttributeError) as e:
+            # Lambdas and nested functions can't be sent to a worker
+            print(f"Can't run {getattr(extract, '__name__', extract)} in the parse pool ({e}), parsing inline")
+        return extract(html_content)
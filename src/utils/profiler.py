@@ -0,0 +1,164 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL
+from utils.metrics import STAGE_SECONDS
+
+# Where CPU goes, matched against a function's file name (or, for C
+# functions, cProfile's description of it). The first match wins.
+CATEGORIES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("parse", ("bs4", "html/parser.py", "_markupbase.py", "lxml", "extractor_backends.py", "html5lib")),
+    ("regex", ("re/__init__.py", "re/_compiler.py", "re/_parser.py", "'re.Pattern'", "_sre")),
+    ("encode", ("csv.py", "json/", "'_csv.", "_json")),
+    ("validate", ("pydantic",)),
+    ("browser", ("crawl4ai", "playwright")),
+    ("http", ("aiohttp", "ssl.py", "'_ssl.", "socket.py")),
+    ("sqlite", ("sqlite3",)),
+    ("wait", ("selectors.py", "'select.", "threading.py", "queue.py")),
+]
+
+
+def categorize(location: str) -> Optional[str]:
+    for name, patterns in CATEGORIES:
+        if any(pattern in location for pattern in patterns):
+            return name
+    return None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # co_qualname is 3.11+; older versions only have the bare name
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class CrawlProfiler:
+    """
+    Profiles a crawl run two ways at once:
+
+    - cProfile on the thread that enters the profiler (the event loop),
+      for exact call counts and self time per function, including C
+      functions such as regex matching and the csv / json encoders.
+    - A sampling thread that records the stacks of all threads every
+      `interval` seconds, which also covers the writer and to_thread work.
+
+    On exit it writes, under PROFILE_DIR:
+    - <name>-<time>-<pid>.pstats, the cProfile dump (pstats, snakeviz)
+    - .collapsed, the sampled stacks in the folded format read by
+      flamegraph.pl and speedscope
+    - .txt, a summary: wall time per stage from the metrics (which includes
+      awaiting the browser and the network), CPU per category (parse,
+      regex, encode, validate, ...) and the top functions by self time
+
+    The summary is printed as well.
+
+    Args:
+        name (str): Script name, used in the file names.
+        output_dir (str): Directory for the profile files.
+        interval (float): Seconds between stack samples.
+    """
+
+    def __init__(self, name: str, output_dir: str = PROFILE_DIR, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.name = name
+        self.output_dir = output_dir
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._profile = cProfile.Profile()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._cpu_started = 0.0
+
+    def __enter__(self) -> "CrawlProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        wall = time.perf_counter() - self._started
+        cpu = time.process_time() - self._cpu_started
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(
+            self.output_dir, f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        )
+        self._profile.dump_stats(f"{prefix}.pstats")
+        with open(f"{prefix}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        summary = self.summary(wall, cpu)
+        with open(f"{prefix}.txt", "w", encoding="utf-8") as f:
+            f.write(summary)
+        print(summary)
+        print(f"Profile written to {prefix}.{{txt,pstats,collapsed}}")
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def summary(self, wall: float, cpu: float) -> str:
+        out = io.StringIO()
+        out.write(f"Profile of {self.name} (pid {os.getpid()}): {wall:.1f}s wall, {cpu:.1f}s CPU\n")
+
+        stages = STAGE_SECONDS.totals()
+        if stages:
+            out.write("\nWall time per stage (includes awaiting the browser and the network):\n")
+            for (stage,), (count, seconds) in sorted(stages.items(), key=lambda item: -item[1][1]):
+                out.write(f"  {stage:<10} {seconds:>10.1f}s  {count:>8} calls\n")
+
+        stats = pstats.Stats(self._profile)
+        by_category: Dict[str, float] = {}
+        for (filename, _, function), (_, _, self_time, _, _) in stats.stats.items():
+            category = categorize(f"{filename}:{function}") or "other"
+            by_category[category] = by_category.get(category, 0.0) + self_time
+        total = sum(by_category.values()) or 1.0
+        out.write("\nSelf time per category (event loop thread, cProfile; 'wait' is idle in select):\n")
+        for category, seconds in sorted(by_category.items(), key=lambda item: -item[1]):
+            out.write(f"  {category:<10} {seconds:>10.2f}s  {seconds / total:>6.1%}\n")
+
+        # A sample counts towards the innermost frame that has a category
+        sampled: Counter = Counter()
+        for stack, count in self.samples.items():
+            frames = stack.split(";")
+            thread = frames[0]
+            category = next((c for c in map(categorize, reversed(frames[1:])) if c), "other")
+            sampled[(thread, category)] += count
+        if sampled:
+            out.write(f"\nSamples per thread and category (every {self.interval * 1000:g}ms, all threads):\n")
+            for (thread, category), count in sorted(sampled.items(), key=lambda item: -item[1])[:20]:
+                out.write(f"  {thread[:24]:<24} {category:<10} {count:>8}\n")
+
+        out.write("\nTop functions by self time (event loop thread):\n")
+        stats.stream = out
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(20)
+        return out.getvalue()
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+from config import (
+    RATE_LIMIT_DECREASE,
+    RATE_LIMIT_INCREASE,
+    RATE_LIMIT_INITIAL,
+    RATE_LIMIT_LATENCY_TARGET,
+    RATE_LIMIT_MAX,
+    RATE_LIMIT_MIN,
+)
+from utils.metrics import RATE_LIMIT
+
+
+class RateLimiter:
+    """
+    Token bucket whose rate adapts with AIMD (additive increase,
+    multiplicative decrease), shared by everything that hits the site.
+
+    Each request takes a token with acquire() and reports back with record().
+    Healthy responses raise the rate by about `increase` requests/s per second
+    of traffic; an error or a response slower than latency_target cuts it by
+    `decrease`, at most once per cooldown so one burst of failures doesn't
+    drive the rate straight to the floor. The crawl settles near the highest
+    rate the site sustains.
+
+    Args:
+        initial_rate (float): Starting rate in requests per second.
+        min_rate (float): Lower bound for the rate.
+        max_rate (float): Upper bound for the rate.
+        increase (float): Requests/s added per second of healthy responses.
+        decrease (float): Factor the rate is multiplied by on a bad signal.
+        latency_target (float): Responses slower than this (seconds) count
+            as a sign of overload.
+        burst (float): Bucket size, i.e. requests allowed back to back.
+        log_interval (float): Seconds between "current rate" log lines.
+        clock (Callable[[], float]): Monotonic time source (tests pass a fake).
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = RATE_LIMIT_INITIAL,
+        min_rate: float = RATE_LIMIT_MIN,
+        max_rate: float = RATE_LIMIT_MAX,
+        increase: float = RATE_LIMIT_INCREASE,
+        decrease: float = RATE_LIMIT_DECREASE,
+        latency_target: float = RATE_LIMIT_LATENCY_TARGET,
+        burst: float = 1.0,
+        log_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max(min_rate, max_rate)
+        self.rate = min(max(initial_rate, min_rate), self.max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.burst = burst
+        self.log_interval = log_interval
+        self.clock = clock
+
+        self._tokens = burst
+        self._updated = clock()
+        self._last_decrease = 0.0
+        self._last_log = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Waits until a request may be sent."""
+        async with self._lock:  # Waiters are served in arrival order
+            while True:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def record(self, success: bool, latency: float, reason: Optional[str] = None) -> None:
+        """
+        Feeds a response back into the rate.
+
+        Args:
+            success (bool): False for errors (5xx, 429, timeouts, failed renders).
+            latency (float): Seconds the request took.
+            reason (Optional[str]): Logged when the rate is cut.
+        """
+        now = self.clock()
+        if success and latency <= self.latency_target:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+            RATE_LIMIT.set(self.rate)
+            if now - self._last_log >= self.log_interval:
+                self._last_log = now
+                print(f"Rate limit: {self.rate:.2f} req/s")
+            return
+
+        # One cut per cooldown: responses already in flight report the same overload
+        if now - self._last_decrease < max(1.0, latency):
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        RATE_LIMIT.set(self.rate)
+        if not reason:
+            reason = "error" if not success else f"slow response ({latency:.1f}s)"
+        print(f"Rate limit: {reason}, slowing down to {self.rate:.2f} req/s")
+
+
+_shared: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the process-wide rate limiter, configured from config."""
+    global _shared
+    if _shared is None:
+        _shared = RateLimiter()
+    return _shared
@@ -0,0 +1,226 @@
+import asyncio
+import csv
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from config import WRITER_BATCH_SIZE, WRITER_FLUSH_SECONDS
+from utils.framed_jsonl import JsonlFile
+from utils.metrics import QUEUE_DEPTH, RECORDS_WRITTEN, stage_timer
+
+Record = Dict[str, Any]
+
+_STOP = object()
+
+
+class CsvSink:
+    """
+    Appends records to a CSV file, one writerows() + flush per batch.
+
+    Args:
+        path (str): CSV file path.
+        fieldnames (Sequence[str]): Column layout; extra keys are ignored.
+        write_header (bool): Write the header row first (new files).
+    """
+
+    def __init__(self, path: str, fieldnames: Sequence[str], write_header: bool = False):
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=list(fieldnames), extrasaction="ignore")
+        if write_header:
+            self._writer.writeheader()
+            self._file.flush()
+
+    def write(self, records: List[Record]) -> None:
+        self._writer.writerows(records)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+class JsonlSink:
+    """
+    Appends records to an indexed JSONL file, one write per batch. A
+    FramedJsonl buffers them until they fill a compressed frame.
+
+    Fields named in raw_fields already hold a JSON document as a string (the
+    CSV representation of embed_url) and are spliced into the line as-is, so
+    the episode map is serialized once for both outputs.
+
+    Args:
+        jsonl (JsonlFile): An opened IndexedJsonl or FramedJsonl.
+        raw_fields (Iterable[str]): Fields holding pre-serialized JSON.
+    """
+
+    def __init__(self, jsonl: JsonlFile, raw_fields: Iterable[str] = ()):
+        self.jsonl = jsonl
+        self.raw_fields = set(raw_fields)
+
+    def _line(self, record: Record) -> str:
+        parts = []
+        for key, value in record.items():
+            if key in self.raw_fields and isinstance(value, str) and value:
+                encoded = value
+            else:
+                encoded = json.dumps(value)
+            parts.append(f"{json.dumps(key)}: {encoded}")
+        return "{" + ", ".join(parts) + "}"
+
+    def write(self, records: List[Record]) -> None:
+        self.jsonl.append_lines([(self._line(record), record["slug"]) for record in records])
+
+    def close(self) -> None:
+        self.jsonl.close()
+
+
+class StoreSink:
+    """
+    Hands each batch to a CrawlStore method (one transaction per batch).
+
+    Args:
+        save (Callable[[List[Record]], Any]): e.g. store.save_animes.
+    """
+
+    def __init__(self, save: Callable[[List[Record]], Any]):
+        self._save = save
+
+    def write(self, records: List[Record]) -> None:
+        self._save(records)
+
+    def close(self) -> None:
+        pass
+
+
+class RecordWriter:
+    """
+    Background writer stage between the crawl and its outputs.
+
+    The crawl hands records over with write(), which only enqueues them. A
+    single task collects them into batches, flushed once a batch holds
+    batch_size records or flush_interval seconds after its first record,
+    and writes each batch to every sink in a worker thread, so fetches never
+    wait on disk. Records keep their submission order.
+
+    close() drains the queue, writes what is left and fsyncs the files. It
+    runs from the crawl's finally block, so Ctrl-C (which cancels the crawl)
+    still gets everything submitted so far on disk.
+
+    Usage:
+        async with RecordWriter([CsvSink(...), JsonlSink(...)]) as writer:
+            writer.write(record)
+
+    Args:
+        sinks (List): Objects with write(records) and close().
+        batch_size (int): Maximum records per batch.
+        flush_interval (float): Maximum seconds a record waits in a batch.
+    """
+
+    def __init__(
+        self,
+        sinks: List[Any],
+        batch_size: int = WRITER_BATCH_SIZE,
+        flush_interval: float = WRITER_FLUSH_SECONDS,
+    ):
+        self.sinks = sinks
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[Record] = []
+        self._lock = threading.Lock()
+
+    async def __aenter__(self) -> "RecordWriter":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def write(self, record: Record) -> None:
+        """Queues one record; never blocks."""
+        self._queue.put_nowait(record)
+        QUEUE_DEPTH.set(self._queue.qsize(), queue="writer")
+
+    def write_many(self, records: Iterable[Record]) -> None:
+        for record in records:
+            self._queue.put_nowait(record)
+        QUEUE_DEPTH.set(self._queue.qsize(), queue="writer")
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def close(self) -> None:
+        """Writes all queued records, then closes (and fsyncs) the sinks."""
+        self._queue.put_nowait(_STOP)
+        try:
+            if self._task:
+                await asyncio.shield(self._task)
+        finally:
+            if self._task and not self._task.done():
+                # Interrupted again while draining: finish synchronously
+                self._task.cancel()
+            leftover = [item for item in self._drain() if item is not _STOP]
+            with self._lock:
+                self._batch = self._batch + leftover
+            self._flush_batch()
+            for sink in self.sinks:
+                try:
+                    sink.close()
+                except Exception as e:
+                    print(f"Error closing output: {e}")
+
+    def _drain(self) -> List[Any]:
+        items = []
+        while not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stop = False
+        while not stop:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            self._batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(self._batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    # Poll rather than wait_for(get()), which can drop an item on timeout
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    await asyncio.sleep(min(remaining, 0.05))
+                    continue
+                if item is _STOP:
+                    stop = True
+                    break
+                self._batch.append(item)
+            QUEUE_DEPTH.set(self._queue.qsize(), queue="writer")
+            await asyncio.to_thread(self._flush_batch)
+
+    def _flush_batch(self) -> None:
+        # Claims the current batch under the lock, so it is written exactly
+        # once even if close() runs while a flush thread is still pending
+        with self._lock:
+            batch, self._batch = self._batch, []
+            if not batch:
+                return
+            with stage_timer("write"):
+                for sink in self.sinks:
+                    try:
+                        sink.write(batch)
+                    except Exception as e:
+                        print(f"Error writing {len(batch)} records: {e}")
+            self.written += len(batch)
+            RECORDS_WRITTEN.inc(len(batch))
@@ -0,0 +1,186 @@
+import asyncio
+import random
+import re
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from config import (
+    CIRCUIT_BREAKER_COOLDOWN,
+    CIRCUIT_BREAKER_MAX_COOLDOWN,
+    CIRCUIT_BREAKER_THRESHOLD,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+)
+from utils.page_loader import PageLoad
+
+# Failure classes. Only NOT_FOUND means the page genuinely has nothing for us;
+# the others are transient and worth retrying.
+NOT_FOUND = "not_found"
+TIMEOUT = "timeout"
+SERVER_ERROR = "server_error"
+RATE_LIMITED = "rate_limited"
+NAVIGATION = "navigation"
+
+TRANSIENT = {TIMEOUT, SERVER_ERROR, RATE_LIMITED, NAVIGATION}
+
+TIMEOUT_RE = re.compile(r'timeout|timed out', re.IGNORECASE)
+
+
+class TransientFetchError(Exception):
+    """
+    A page could not be loaded after all retries for a transient reason, so
+    its absence says nothing about the content (e.g. where a series ends).
+    """
+
+    def __init__(self, url: str, kind: str, message: str = ""):
+        super().__init__(f"{kind} fetching {url}: {message}" if message else f"{kind} fetching {url}")
+        self.url = url
+        self.kind = kind
+
+
+def classify_failure(page: PageLoad) -> Optional[str]:
+    """
+    Classifies a loaded page.
+
+    Returns:
+        Optional[str]: None if the page loaded and the extract callable found
+        something, NOT_FOUND for a genuine miss (404/410, or a page that
+        loaded and settled but has nothing to extract), otherwise one of
+        the transient classes (TIMEOUT for a render cut off before that).
+    """
+    status = page.status_code
+    if status in (404, 410):
+        return NOT_FOUND
+    if status == 429:
+        return RATE_LIMITED
+    if status is not None and status >= 500:
+        return SERVER_ERROR
+    if page.success:
+        if page.extracted:
+            return None
+        # An empty render only proves a miss if the page loaded and settled
+        return NOT_FOUND if page.complete else TIMEOUT
+    if TIMEOUT_RE.search(page.error_message or ""):
+        return TIMEOUT
+    return NAVIGATION
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BACKOFF_BASE, cap: float = RETRY_BACKOFF_MAX) -> float:
+    """
+    Full-jitter exponential backoff: a random delay in [0, base * 2^attempt],
+    capped, so concurrent workers don't retry in lockstep.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Stops all requests to a host after `threshold` consecutive transient
+    failures, instead of burning through the queue while the host is down.
+
+    While open, wait() blocks every caller until the cooldown ends. Then one
+    trial request goes through (half-open): success closes the circuit,
+    failure reopens it with the cooldown doubled (up to max_cooldown).
+
+    Args:
+        host (str): Host name, for logging.
+        threshold (int): Consecutive failures that open the circuit.
+        cooldown (float): Seconds the circuit stays open the first time.
+        max_cooldown (float): Upper bound for the doubled cooldown.
+        clock (Callable[[], float]): Monotonic time source (tests pass a fake).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        threshold: int = CIRCUIT_BREAKER_THRESHOLD,
+        cooldown: float = CIRCUIT_BREAKER_COOLDOWN,
+        max_cooldown: float = CIRCUIT_BREAKER_MAX_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.host = host
+        self.clock = clock
+        self.threshold = max(1, threshold)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    async def wait(self) -> bool:
+        """
+        Blocks while the circuit is open.
+
+        Returns:
+            bool: True if the caller is the half-open trial request; pass it
+            back to record().
+        """
+        while self.opened_at is not None:
+            remaining = self.opened_at + self.cooldown - self.clock()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            elif not self._trial_in_flight:
+                # Half-open: this caller is the trial, the rest keep waiting
+                self._trial_in_flight = True
+                return True
+            else:
+                await asyncio.sleep(0.1)
+        return False
+
+    def abandon(self, trial: bool) -> None:
+        """Called when a request is cancelled before it completes."""
+        if trial:
+            self._trial_in_flight = False
+
+    def record(self, healthy: bool, trial: bool = False) -> None:
+        if trial:
+            self._trial_in_flight = False
+        if healthy:
+            if self.opened_at is not None:
+                print(f"Circuit for {self.host} closed, resuming")
+            self.failures = 0
+            self.opened_at = None
+            self.cooldown = self.base_cooldown
+            return
+
+        self.failures += 1
+        if trial:
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            self.opened_at = self.clock()
+            print(f"Circuit for {self.host} still failing, pausing {self.cooldown:.0f}s")
+        elif self.opened_at is None and self.failures >= self.threshold:
+            self.opened_at = self.clock()
+            print(
+                f"Circuit for {self.host} opened after {self.failures} consecutive failures, "
+                f"pausing {self.cooldown:.0f}s"
+            )
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per host."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(host)
+        return self._breakers[host]
+
+
+_shared: Optional[CircuitBreakers] = None
+
+
+def get_circuit_breakers() -> CircuitBreakers:
+    """Returns the process-wide circuit breakers."""
+    global _shared
+    if _shared is None:
+        _shared = CircuitBreakers()
+    return _shared
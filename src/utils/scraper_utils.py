@@ -1,34 +1,60 @@
 import json
 import os
-from typing import List, Set, Tuple
-
-from crawl4ai import (
-    AsyncWebCrawler,
-    BrowserConfig,
-    CacheMode,
-    CrawlerRunConfig,
-    LLMExtractionStrategy,
-)
+from typing import TYPE_CHECKING, List, Optional, Set, Tuple
 
+from config import CACHE_TTLS, LEAN_BROWSER
 from models.venue import Anime
 from utils.data_utils import is_complete_anime, is_duplicate_anime
+from utils.extractor_backends import get_backend
+from utils.lean_browser import LEAN_BROWSER_ARGS, LeanProfile
+from utils.page_cache import get_page_cache
+from utils.page_loader import PageLoader
+from utils.rate_limiter import get_rate_limiter
+from utils.resilience import get_circuit_breakers
+
+if TYPE_CHECKING:
+    # Imported where used: crawl4ai (and LLMExtractionStrategy's dependencies)
+    # take seconds to import, which offline commands shouldn't pay
+    from crawl4ai import AsyncWebCrawler, BrowserConfig, LLMExtractionStrategy
 
 
-def get_browser_config() -> BrowserConfig:
+def get_browser_config(verbose: bool = True, lean: bool = LEAN_BROWSER) -> "BrowserConfig":
     """
     Returns the browser configuration for the crawler.
 
+    Args:
+        verbose (bool): Enable crawl4ai's verbose logging.
+        lean (bool): Add the lean profile's Chromium flags (no media
+            autoplay, no images); see get_crawler for request blocking.
+
     Returns:
         BrowserConfig: The configuration settings for the browser.
     """
+    from crawl4ai import BrowserConfig
+
     # https://docs.crawl4ai.com/core/browser-crawler-config/
     return BrowserConfig(
         browser_type="chromium",  # Type of browser to simulate
         headless=True,  # Whether to run in headless mode (no GUI)
-        verbose=True,  # Enable verbose logging
+        verbose=verbose,  # Enable verbose logging
+        light_mode=lean,  # Disable background networking, sync, extensions...
+        extra_args=list(LEAN_BROWSER_ARGS) if lean else None,
     )
 
 
+def get_crawler(verbose: bool = True, lean: bool = LEAN_BROWSER) -> "AsyncWebCrawler":
+    """
+    Returns a crawler (to use with `async with`) on get_browser_config's
+    browser, with the lean profile's request blocking installed when lean.
+    """
+    from crawl4ai import AsyncWebCrawler
+
+    crawler = AsyncWebCrawler(config=get_browser_config(verbose=verbose, lean=lean))
+    if lean:
+        LeanProfile().install(crawler)
+    return crawler
+
+
 # def get_llm_strategy() -> LLMExtractionStrategy:
 #     """
 #     Returns the configuration for the language model extraction strategy.
@@ -55,7 +81,8 @@ def get_browser_config() -> BrowserConfig:
 
 def extract_canonical_url(html_content: str) -> str:
     """
-    Extracts the canonical URL from HTML content using BeautifulSoup.
+    Extracts the canonical URL from HTML content.
+    The parser used is chosen by EXTRACTOR_BACKEND (see utils.extractor_backends).
 
     Args:
         html_content (str): The HTML content to search.
@@ -63,13 +90,8 @@ def extract_canonical_url(html_content: str) -> str:
     Returns:
         str: The canonical URL if found, empty string otherwise.
     """
-    from bs4 import BeautifulSoup
-    
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        canonical_link = soup.find('link', {'rel': 'canonical'})
-        if canonical_link and canonical_link.get('href'):
-            return canonical_link['href']
+        return get_backend().canonical_url(html_content)
     except Exception as e:
         print(f"Error extracting canonical URL: {e}")
     
@@ -77,9 +99,10 @@ def extract_canonical_url(html_content: str) -> str:
 
 
 async def check_no_results(
-    crawler: AsyncWebCrawler,
+    crawler: "AsyncWebCrawler",
     url: str,
     session_id: str,
+    loader: Optional[PageLoader] = None,
 ) -> bool:
     """
     Checks if the "No Results Found" message is present on the page.
@@ -88,21 +111,23 @@ async def check_no_results(
         crawler (AsyncWebCrawler): The web crawler instance.
         url (str): The URL to check.
         session_id (str): The session identifier.
+        loader (Optional[PageLoader]): The caller's shared page loader (cache
+            + HTTP fast path); defaults to the browser with the page cache.
 
     Returns:
         bool: True if "No Results Found" message is found, False otherwise.
     """
     # Fetch the page without any CSS selector or extraction strategy
-    result = await crawler.arun(
-        url=url,
-        config=CrawlerRunConfig(
-            cache_mode=CacheMode.BYPASS,
-            session_id=session_id,
-        ),
+    loader = loader or PageLoader(
+        crawler,
+        cache=get_page_cache(),
+        rate_limiter=get_rate_limiter(),
+        breakers=get_circuit_breakers(),
     )
+    result = await loader.load(url, session_id, cache_ttl=CACHE_TTLS["no_results"])
 
     if result.success:
-        if "No Results Found" in result.cleaned_html:
+        if "No Results Found" in result.html:
             return True
     else:
         print(
@@ -113,14 +138,15 @@ async def check_no_results(
 
 
 async def fetch_and_process_page(
-    crawler: AsyncWebCrawler,
+    crawler: "AsyncWebCrawler",
     page_number: int,
     base_url: str,
     css_selector: str,
-    llm_strategy: LLMExtractionStrategy,
+    llm_strategy: "LLMExtractionStrategy",
     session_id: str,
     required_keys: List[str],
     seen_names: Set[str],
+    loader: Optional[PageLoader] = None,
 ) -> Tuple[List[dict], bool]:
     """
     Fetches and processes a single page of venue data.
@@ -134,17 +160,21 @@ async def fetch_and_process_page(
         session_id (str): The session identifier.
         required_keys (List[str]): List of required keys in the venue data.
         seen_names (Set[str]): Set of venue names that have already been seen.
+        loader (Optional[PageLoader]): Shared page loader for the "No Results
+            Found" check, so it goes through the cache and HTTP fast path.
 
     Returns:
         Tuple[List[dict], bool]:
             - List[dict]: A list of processed venues from the page.
             - bool: A flag indicating if the "No Results Found" message was encountered.
     """
+    from crawl4ai import CacheMode, CrawlerRunConfig
+
     url = f"{base_url}?page={page_number}"
     print(f"Loading page {page_number}...")
 
     # Check if "No Results Found" message is present
-    no_results = await check_no_results(crawler, url, session_id)
+    no_results = await check_no_results(crawler, url, session_id, loader=loader)
     if no_results:
         return [], True  # No more results, signal to stop crawling
 
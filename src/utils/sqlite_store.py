@@ -0,0 +1,213 @@
+import csv
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from models.venue import Anime
+
+# Anime columns stored in the animes table (embed_url lives in episodes)
+ANIME_COLUMNS = [name for name in Anime.model_fields if name != "embed_url"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS animes (
+    slug TEXT PRIMARY KEY,
+    {", ".join(f"{column} TEXT NOT NULL DEFAULT ''" for column in ANIME_COLUMNS if column != "slug")},
+    processed INTEGER NOT NULL DEFAULT 0,
+    last_checked TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_animes_title ON animes (title);
+CREATE TABLE IF NOT EXISTS episodes (
+    slug TEXT NOT NULL,
+    episode INTEGER NOT NULL,
+    embed_url TEXT NOT NULL,
+    PRIMARY KEY (slug, episode)
+) WITHOUT ROWID;
+"""
+
+
+class CrawlStore:
+    """
+    SQLite-backed crawl state and output store.
+
+    One row per anime in `animes` (with a processed flag and last_checked
+    timestamp) and one row per episode in `episodes`, keyed by slug. The
+    database runs in WAL mode so exports and readers don't block the crawler,
+    and every write method is a single transaction. CSV / JSONL files are
+    produced from it with the export_* methods.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "CrawlStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # --- AZ-list ---
+
+    def add_animes(self, animes: Iterable[Dict[str, Any]]) -> int:
+        """
+        Inserts animes from the AZ-list in one transaction, ignoring slugs
+        that are already stored.
+
+        Returns:
+            int: Number of new rows.
+        """
+        rows = [
+            tuple(anime.get(column) or "" for column in ANIME_COLUMNS)
+            for anime in animes
+            if anime.get("slug")
+        ]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO animes ({', '.join(ANIME_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in ANIME_COLUMNS)})",
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    def titles(self) -> Set[str]:
+        """Returns the titles of all stored animes (for AZ-list dedup)."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT title FROM animes")}
+
+    def iter_animes(self) -> List[Dict[str, Any]]:
+        """Returns all stored animes in insertion order, without episodes."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(ANIME_COLUMNS)} FROM animes ORDER BY rowid"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # --- Episodes ---
+
+    def is_processed(self, slug: str) -> bool:
+        """Indexed lookup: has this anime's episode list been fetched?"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT processed FROM animes WHERE slug = ?", (slug,)
+            ).fetchone()
+        return bool(row and row["processed"])
+
+    def get_record(self, slug: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a processed anime as a CSV-style record (embed_url as a JSON
+        string, plus last_checked), or None if it hasn't been processed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(ANIME_COLUMNS)}, last_checked FROM animes "
+                "WHERE slug = ? AND processed = 1",
+                (slug,),
+            ).fetchone()
+            if row is None:
+                return None
+            episodes = self._conn.execute(
+                "SELECT episode, embed_url FROM episodes WHERE slug = ? ORDER BY episode",
+                (slug,),
+            ).fetchall()
+        record = dict(row)
+        record["embed_url"] = json.dumps({str(ep["episode"]): ep["embed_url"] for ep in episodes})
+        return record
+
+    def save_animes(self, records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Stores processed animes with their episodes, all in one transaction.
+        Existing episodes are kept (and overwritten when refetched), so this
+        also merges incremental updates.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): CSV-style records with
+                embed_url as a JSON string or dict, and last_checked.
+        """
+        with self._lock, self._conn:
+            for record in records:
+                episode_map = record.get("embed_url") or {}
+                if isinstance(episode_map, str):
+                    episode_map = json.loads(episode_map or "{}")
+
+                values = {column: record.get(column) or "" for column in ANIME_COLUMNS}
+                values["last_checked"] = record.get("last_checked") or ""
+                columns = list(values)
+                self._conn.execute(
+                    f"INSERT INTO animes ({', '.join(columns)}, processed) "
+                    f"VALUES ({', '.join('?' for _ in columns)}, 1) "
+                    "ON CONFLICT (slug) DO UPDATE SET processed = 1, "
+                    + ", ".join(f"{column} = excluded.{column}" for column in columns if column != "slug"),
+                    [values[column] for column in columns],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO episodes (slug, episode, embed_url) VALUES (?, ?, ?)",
+                    [(values["slug"], int(ep), src) for ep, src in episode_map.items() if str(ep).isdigit()],
+                )
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields processed animes as JSONL-style records (embed_url as a dict),
+        in the order they were first stored.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(ANIME_COLUMNS)}, last_checked FROM animes "
+                "WHERE processed = 1 ORDER BY rowid"
+            ).fetchall()
+        for row in rows:
+            with self._lock:
+                episodes = self._conn.execute(
+                    "SELECT episode, embed_url FROM episodes WHERE slug = ? ORDER BY episode",
+                    (row["slug"],),
+                ).fetchall()
+            record = dict(row)
+            last_checked = record.pop("last_checked")
+            record["embed_url"] = {str(ep["episode"]): ep["embed_url"] for ep in episodes}
+            record["last_checked"] = last_checked
+            yield record
+
+    # --- Exports ---
+
+    def export_az_list_csv(self, csv_file: str) -> int:
+        """Writes all animes in the AZ-list CSV layout. Returns the row count."""
+        animes = self.iter_animes()
+        with open(csv_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(Anime.model_fields), extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(animes)
+        return len(animes)
+
+    def export_records_csv(self, csv_file: str) -> int:
+        """Writes processed animes with embed_url as a JSON string column."""
+        count = 0
+        with open(csv_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=ANIME_COLUMNS + ["embed_url", "last_checked"])
+            writer.writeheader()
+            for record in self.iter_records():
+                record["embed_url"] = json.dumps(record["embed_url"])
+                writer.writerow(record)
+                count += 1
+        return count
+
+    def export_records_jsonl(self, jsonl_file: str) -> int:
+        """Writes processed animes as JSONL, one record per line."""
+        count = 0
+        with open(jsonl_file, "w", encoding="utf-8") as f:
+            for record in self.iter_records():
+                f.write(json.dumps(record) + "\n")
+                count += 1
+        return count
@@ -0,0 +1,275 @@
+import csv
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import CLEAN_CHUNK_BYTES, CLEAN_DROP_DUPLICATES, CLEAN_WORKERS
+from utils.framed_jsonl import FramedJsonl, codec_for_path, jsonl_temp_path, split_frames
+from utils.hash_set import HashSet
+
+# Scraper artifacts glued to a title, e.g. "Maison IkkokuTV96 Eps", "TitleTV12 Eps"
+TYPE_SUFFIX_RE = re.compile(r'(TV|Movie|OVA|ONA|Special)\d+(\s*Eps)?$', re.IGNORECASE)
+# A title that is nothing but the artifact, e.g. "96TV", "12OVA"
+TYPE_ONLY_RE = re.compile(r'^\d+(TV|Movie|OVA|ONA|Special)(\s*Eps)?$', re.IGNORECASE)
+
+CleanStats = Tuple[int, int, int, int]  # (records, titles fixed, invalid lines skipped, duplicate slugs dropped)
+
+
+def slug_to_title(slug: str) -> str:
+    if not slug:
+        return "Unknown"
+    # Basic slug conversion: "jujutsu-kaisen-2nd-season" -> "Jujutsu Kaisen 2nd Season"
+    return slug.replace("-", " ").title()
+
+
+def clean_title(title: str, slug: str) -> str:
+    """
+    Strips scraper artifacts from a title, falling back to a title built
+    from the slug when nothing usable is left.
+    """
+    cleaned = TYPE_SUFFIX_RE.sub('', title)
+
+    # If the title is just digits + type, it's garbage
+    if TYPE_ONLY_RE.match(cleaned) or TYPE_ONLY_RE.match(title):
+        cleaned = ""
+
+    cleaned = cleaned.strip()
+
+    # Fallback to slug if title is empty or just digits or very short/suspicious
+    if not cleaned or cleaned.isdigit() or len(cleaned) < 2:
+        return slug_to_title(slug)
+
+    return cleaned
+
+
+def clean_records(
+    records: Iterable[Dict[str, Any]],
+    on_fixed: Optional[Callable[[str, str], None]] = None,
+) -> Iterator[Tuple[Dict[str, Any], bool]]:
+    """
+    Yields (record, changed) with each record's title cleaned in place.
+
+    Args:
+        records (Iterable[Dict[str, Any]]): Rows with "title" and "slug".
+        on_fixed (Optional[Callable[[str, str], None]]): Called with
+            (old title, new title) for every title that changed.
+    """
+    for record in records:
+        original = record.get('title') or ''
+        new_title = clean_title(original, record.get('slug') or '')
+        changed = new_title != original
+        if changed and on_fixed:
+            on_fixed(original, new_title)
+        record['title'] = new_title
+        yield record, changed
+
+
+def _replace_atomically(temp_path: str, output_path: str) -> None:
+    with open(temp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(temp_path, output_path)
+
+
+def clean_csv_file(
+    input_path: str,
+    output_path: str,
+    on_fixed: Optional[Callable[[str, str], None]] = None,
+    drop_duplicates: bool = CLEAN_DROP_DUPLICATES,
+) -> Tuple[int, int, int]:
+    """
+    Streams a CSV through clean_title row by row, into a temp file that
+    replaces output_path once complete. With drop_duplicates, rows
+    repeating an earlier row's slug are dropped.
+
+    CSV is cleaned in one process: quoted fields may span lines, so the file
+    can't be split at arbitrary newlines.
+
+    Returns:
+        Tuple[int, int, int]: (rows, titles fixed, duplicate slugs dropped).
+    """
+    temp_path = f"{output_path}.tmp"
+    total = fixed = duplicates = 0
+    seen = HashSet()
+    try:
+        with open(input_path, 'r', encoding='utf-8', newline='') as infile, \
+                open(temp_path, 'w', encoding='utf-8', newline='') as outfile:
+            reader = csv.DictReader(infile)
+            writer = csv.DictWriter(outfile, fieldnames=reader.fieldnames or ['title', 'slug'])
+            writer.writeheader()
+            for row, changed in clean_records(reader, on_fixed):
+                total += 1
+                fixed += changed
+                if drop_duplicates and row.get('slug') and not seen.add(row['slug']):
+                    duplicates += 1
+                    continue
+                writer.writerow(row)
+        _replace_atomically(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return total, fixed, duplicates
+
+
+CleanedChunk = Tuple[List[bytes], List[str], CleanStats]
+
+
+def clean_jsonl_lines(lines: Iterable[bytes]) -> CleanedChunk:
+    """
+    Cleans the titles in a run of JSONL lines.
+
+    Lines whose title is already clean are copied byte for byte, so the
+    (possibly large) episode maps are only re-serialized for the few records
+    that change. Invalid lines are dropped.
+
+    Returns:
+        CleanedChunk: The output lines, each line's slug ("" for none) for
+        the caller's dedup, and the counts (no duplicates yet).
+    """
+    out: List[bytes] = []
+    slugs: List[str] = []
+    total = fixed = invalid = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            invalid += 1
+            continue
+        total += 1
+        original = record.get('title') or ''
+        new_title = clean_title(original, record.get('slug') or '')
+        if new_title != original:
+            fixed += 1
+            record['title'] = new_title
+            line = json.dumps(record).encode('utf-8')
+        out.append(line + b'\n')
+        slug = record.get('slug')
+        slugs.append(slug if slug and isinstance(slug, str) else '')
+    return out, slugs, (total, fixed, invalid, 0)
+
+
+def _clean_jsonl_chunk(path: str, start: int, end: int) -> CleanedChunk:
+    # Worker: cleans the lines that begin in [start, end), or the frames in
+    # it for a framed file
+    codec = codec_for_path(path)
+    with open(path, 'rb') as f:
+        if codec is not None:
+            return clean_jsonl_lines(
+                line for *_, content in split_frames(codec, f, start, end) for line in content.splitlines()
+            )
+
+        if start:
+            # Skip the line that began before start; it belongs to the previous chunk
+            f.seek(start - 1)
+            f.readline()
+
+        def lines() -> Iterator[bytes]:
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    return
+                yield line
+
+        return clean_jsonl_lines(lines())
+
+
+def _jsonl_ranges(path: str, chunk_bytes: int) -> List[Tuple[int, int]]:
+    # Byte ranges of about chunk_bytes; those of a framed file hold whole frames
+    if codec_for_path(path) is None:
+        size = os.path.getsize(path)
+        return [(start, min(size, start + chunk_bytes)) for start in range(0, size, chunk_bytes)]
+
+    with FramedJsonl(path) as jsonl:
+        frames = list(jsonl.frames)
+    ranges: List[Tuple[int, int]] = []
+    for offset, length in frames:
+        if ranges and offset - ranges[-1][0] < chunk_bytes:
+            ranges[-1] = (ranges[-1][0], offset + length)
+        else:
+            ranges.append((offset, offset + length))
+    return ranges
+
+
+def clean_jsonl_file(
+    input_path: str,
+    output_path: str,
+    workers: int = CLEAN_WORKERS,
+    chunk_bytes: int = CLEAN_CHUNK_BYTES,
+    drop_duplicates: bool = CLEAN_DROP_DUPLICATES,
+) -> CleanStats:
+    """
+    Cleans the titles of a JSONL file into a temp file that replaces
+    output_path once complete. With drop_duplicates, records repeating an
+    earlier record's slug are dropped.
+
+    The input is cut into chunk_bytes ranges that workers clean in parallel
+    (each one reads its own range from disk); the parent writes the results
+    in input order, with at most two chunks per worker in memory, so memory
+    stays bounded whatever the file size. Slugs are deduped in the parent
+    against one HashSet (8-16 bytes per slug). Files of a single chunk, or
+    workers=1, are cleaned in this process.
+
+    Either file may be framed (.gz / .zst, see FramedJsonl): a framed input
+    is cut at frame boundaries taken from its index (chunk_bytes then counts
+    compressed bytes), and a framed output is written with its frame index.
+
+    Args:
+        input_path (str): JSONL to clean.
+        output_path (str): Where the cleaned JSONL goes (may equal input_path).
+        workers (int): Worker processes; 0 uses every core.
+        chunk_bytes (int): Size of the input ranges handed to workers.
+        drop_duplicates (bool): Drop records whose slug was already seen.
+
+    Returns:
+        CleanStats: (records, titles fixed, invalid lines skipped,
+        duplicate slugs dropped).
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = _jsonl_ranges(input_path, max(1, chunk_bytes))
+
+    framed = codec_for_path(output_path) is not None
+    temp_path = jsonl_temp_path(output_path) if framed else f"{output_path}.tmp"
+    totals = [0, 0, 0, 0]
+    seen = HashSet()
+    try:
+        if framed and os.path.exists(temp_path):
+            # Leftover of an interrupted run; a FramedJsonl would append to it
+            os.remove(temp_path)
+        with (FramedJsonl(temp_path) if framed else open(temp_path, 'wb')) as outfile:
+            def write(result: CleanedChunk) -> None:
+                lines, slugs, stats = result
+                kept = [(line, slug) for line, slug in zip(lines, slugs) if not drop_duplicates or not slug or seen.add(slug)]
+                if framed:
+                    outfile.append_encoded([line for line, _ in kept], [slug for _, slug in kept])
+                else:
+                    outfile.write(b''.join(line for line, _ in kept))
+                for i, value in enumerate(stats):
+                    totals[i] += value
+                totals[3] += len(lines) - len(kept)
+
+            if workers <= 1 or len(ranges) <= 1:
+                for start, end in ranges:
+                    write(_clean_jsonl_chunk(input_path, start, end))
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+                    pending = []
+                    for start, end in ranges:
+                        pending.append(executor.submit(_clean_jsonl_chunk, input_path, start, end))
+                        # Keep the pool busy without holding the whole file in memory
+                        if len(pending) >= 2 * workers:
+                            write(pending.pop(0).result())
+                    for future in pending:
+                        write(future.result())
+        if framed:
+            os.replace(outfile.index_path, f"{output_path}.idx")
+            os.replace(outfile.slugset_path, f"{output_path}.idx.slugset")
+        _replace_atomically(temp_path, output_path)
+    finally:
+        for path in (temp_path, f"{temp_path}.idx", f"{temp_path}.idx.slugset"):
+            if os.path.exists(path):
+                os.remove(path)
+    return totals[0], totals[1], totals[2], totals[3]
@@ -0,0 +1,220 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Container, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from config import WORK_QUEUE_MAX_ATTEMPTS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    slug TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT NOT NULL DEFAULT '',
+    lease_until REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT NOT NULL DEFAULT '',
+    error TEXT NOT NULL DEFAULT '',
+    updated REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (state, lease_until);
+"""
+
+# Task states
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class WorkQueue:
+    """
+    Lease-based work queue of animes in a SQLite database, shared by a
+    coordinator and any number of worker processes (on one box, or several
+    boxes sharing the file).
+
+    A worker leases a slug for a limited time and keeps the lease alive with
+    heartbeats while it fetches. A lease that expires (the worker died or
+    lost the database) makes the slug available again. Completing a task only
+    succeeds while the worker still owns the lease, so a slug that was
+    re-leased is never reported twice.
+
+    The database uses the rollback journal rather than WAL, since WAL's
+    shared memory doesn't work when processes on different hosts open it.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        max_attempts (int): Leases per slug before it is marked failed.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _transaction(self, statements) -> Any:
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can't
+        # read the same pending row and both lease it
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    # --- Coordinator ---
+
+    def enqueue(self, animes: Iterable[Dict[str, Any]], skip: Optional[Container[str]] = None) -> int:
+        """
+        Adds animes (AZ-list rows) as pending tasks, ignoring slugs already
+        queued or in `skip`.
+
+        Returns:
+            int: Number of new tasks.
+        """
+        skip = skip or set()
+        now = time.time()
+        rows = [
+            (anime["slug"], json.dumps(anime), now)
+            for anime in animes
+            if anime.get("slug") and anime["slug"] not in skip
+        ]
+
+        def insert(conn: sqlite3.Connection) -> int:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO tasks (slug, payload, updated) VALUES (?, ?, ?)", rows)
+            return conn.total_changes - before
+
+        return self._transaction(insert)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of tasks per state (expired leases count as pending)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT CASE WHEN state = ? AND lease_until < ? THEN ? ELSE state END AS s, COUNT(*) "
+                "FROM tasks GROUP BY s",
+                (LEASED, time.time(), PENDING),
+            ).fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update({row[0]: row[1] for row in rows})
+        return counts
+
+    def iter_results(self) -> Iterator[Dict[str, Any]]:
+        """Yields the records reported by workers, in queue order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM tasks WHERE state = ? ORDER BY rowid", (DONE,)
+            ).fetchall()
+        for row in rows:
+            yield json.loads(row["result"])
+
+    # --- Worker ---
+
+    def lease(self, owner: str, lease_seconds: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Leases the next pending (or expired) task.
+
+        Returns:
+            Optional[Tuple[str, Dict[str, Any]]]: (slug, AZ-list row), or None
+            if nothing is available right now.
+        """
+        def take(conn: sqlite3.Connection):
+            now = time.time()
+            while True:
+                row = conn.execute(
+                    "SELECT slug, payload, attempts FROM tasks "
+                    "WHERE state = ? OR (state = ? AND lease_until < ?) ORDER BY rowid LIMIT 1",
+                    (PENDING, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["attempts"] < self.max_attempts:
+                    break
+                # Its workers keep dying on it; stop handing it out
+                conn.execute(
+                    "UPDATE tasks SET state = ?, error = ?, updated = ? WHERE slug = ?",
+                    (FAILED, "lease expired too often", now, row["slug"]),
+                )
+            conn.execute(
+                "UPDATE tasks SET state = ?, owner = ?, lease_until = ?, attempts = attempts + 1, updated = ? "
+                "WHERE slug = ?",
+                (LEASED, owner, now + lease_seconds, now, row["slug"]),
+            )
+            return row["slug"], json.loads(row["payload"])
+
+        return self._transaction(take)
+
+    def heartbeat(self, owner: str, slugs: Iterable[str], lease_seconds: float) -> Set[str]:
+        """
+        Extends the leases `owner` holds on `slugs`.
+
+        Returns:
+            Set[str]: The slugs whose lease was lost (expired and re-leased).
+        """
+        slugs = list(slugs)
+
+        def extend(conn: sqlite3.Connection) -> Set[str]:
+            now = time.time()
+            lost = set()
+            for slug in slugs:
+                cursor = conn.execute(
+                    "UPDATE tasks SET lease_until = ?, updated = ? WHERE slug = ? AND owner = ? AND state = ?",
+                    (now + lease_seconds, now, slug, owner, LEASED),
+                )
+                if cursor.rowcount == 0:
+                    lost.add(slug)
+            return lost
+
+        return self._transaction(extend) if slugs else set()
+
+    def complete(self, owner: str, slug: str, record: Dict[str, Any]) -> bool:
+        """
+        Reports a finished task.
+
+        Returns:
+            bool: False if the lease was lost to another worker; the result
+            is then discarded.
+        """
+        def finish(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
+                "UPDATE tasks SET state = ?, result = ?, lease_until = 0, updated = ? "
+                "WHERE slug = ? AND owner = ? AND state = ?",
+                (DONE, json.dumps(record), time.time(), slug, owner, LEASED),
+            )
+            return cursor.rowcount == 1
+
+        return self._transaction(finish)
+
+    def release(self, owner: str, slug: str, error: str = "") -> None:
+        """
+        Gives a task back after a transient failure. It becomes pending again,
+        or failed once it has been leased max_attempts times.
+        """
+        def give_back(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "owner = '', lease_until = 0, error = ?, updated = ? "
+                "WHERE slug = ? AND owner = ? AND state = ?",
+                (self.max_attempts, FAILED, PENDING, error, time.time(), slug, owner, LEASED),
+            )
+
+        self._transaction(give_back)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The crawler's scripts use flat imports from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,135 @@
+import asyncio
+import json
+
+import pytest
+
+import fetch_iframes
+from utils.episode_list import SeriesPage, parse_episode_list_response, parse_series_page
+
+SERIES_PAGE = """
+<html><body>
+<div id="wrapper" data-id="page-1" data-anime-id="4821">
+  <ul class="episodes">
+    <li><a href="/watch/frieren/ep-1" data-embed="https://player.example/e/1">
+      <img data-src="https://cdn.example/thumb/1.jpg"> Episode 1</a></li>
+    <li><a href="/watch/frieren/ep-2"><img data-src="https://cdn.example/thumb/2.jpg"> Episode 2</a></li>
+    <li><a href="/watch/frieren/ep-3?server=2">Episode 3</a></li>
+  </ul>
+  <div class="servers">
+    <span data-number="2" data-src="https://player.example/e/2">Server 1</span>
+    <span data-ep="4" data-video="http://insecure.example/e/4">Server 1</span>
+    <span data-number="0">Trailer</span>
+    <span data-number="soon">Next</span>
+  </div>
+  <aside><a href="/watch/other-show/ep-9">Recommended</a></aside>
+</div>
+</body></html>
+"""
+
+
+def test_series_page_episodes_and_embeds():
+    page = parse_series_page(SERIES_PAGE, slug="frieren")
+    assert page.episodes == {
+        1: "https://player.example/e/1",
+        # The server list knows the embed the episode link didn't
+        2: "https://player.example/e/2",
+        3: "",
+        # Not https: no embed candidate
+        4: "",
+    }
+    assert page.series_id == "4821"
+    assert page
+
+
+def test_series_page_without_slug_accepts_any_episode_link():
+    assert 9 in parse_series_page(SERIES_PAGE).episodes
+
+
+def test_series_page_without_episodes_is_falsy():
+    page = parse_series_page('<html><body><div data-id="7">Loading...</div></body></html>', slug="frieren")
+    assert page == SeriesPage() and not page
+
+
+def test_series_page_ignores_thumbnail_sources():
+    page = parse_series_page(
+        '<a href="/watch/frieren/ep-5"><img data-src="https://cdn.example/5.jpg"></a>', slug="frieren"
+    )
+    assert page.episodes == {5: ""}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        json.dumps({"status": True, "html": '<a href="/watch/frieren/ep-1">1</a><a href="/watch/frieren/ep-2">2</a>'}),
+        json.dumps([{"number": 1, "embed": "https://player.example/e/1"}, {"episode": "2"}]),
+        json.dumps({"episodes": [{"ep": 1, "url": "https://player.example/e/1"}, {"num": 2, "url": "/relative"}]}),
+        json.dumps({"data": [{"number": 1, "link": "https://player.example/e/1"}, {"number": 2}, {"number": -1}]}),
+    ],
+    ids=["html", "list", "episodes", "data"],
+)
+def test_episode_list_response_shapes(body):
+    episodes = parse_episode_list_response(body, slug="frieren").episodes
+    assert sorted(episodes) == [1, 2]
+    assert episodes[2] == ""
+
+
+def test_browser_rendered_json_is_unwrapped():
+    body = json.dumps([{"number": 1, "embed": "https://player.example/e/1?a=1&b=2"}])
+    rendered = f"<html><body><pre>{body.replace('&', '&amp;')}</pre></body></html>"
+    assert parse_episode_list_response(rendered).episodes == {1: "https://player.example/e/1?a=1&b=2"}
+
+
+def test_episode_list_html_fragment():
+    page = parse_episode_list_response('<li data-number="3" data-embed="https://player.example/e/3">3</li>')
+    assert page.episodes == {3: "https://player.example/e/3"}
+
+
+@pytest.mark.parametrize("body", ["{}", "[]", json.dumps({"episodes": "none"}), json.dumps([1, "two", None])])
+def test_episode_list_response_without_episodes(body):
+    assert not parse_episode_list_response(body)
+
+
+# --- Gallop search for the last episode ---
+
+def probe_site(monkeypatch, last_episode):
+    """Fakes a series whose episodes 1..last_episode exist; returns the probed numbers."""
+    probed = []
+
+    async def fake_fetch_episode_iframes(crawler, anime_slug, episode_num=1, **kwargs):
+        probed.append(episode_num)
+        return f"https://player.example/{anime_slug}/{episode_num}" if episode_num <= last_episode else ""
+
+    monkeypatch.setattr(fetch_iframes, "fetch_episode_iframes", fake_fetch_episode_iframes)
+    return probed
+
+
+@pytest.mark.parametrize("last_episode", [0, 1, 2, 3, 8, 9, 16, 17, 1024, 1025])
+def test_gallop_finds_the_last_episode(monkeypatch, last_episode):
+    probed = probe_site(monkeypatch, last_episode)
+    assert asyncio.run(fetch_iframes.find_last_episode(None, "show")) == last_episode
+    # Each number is fetched once, and O(log n) of them
+    assert len(probed) == len(set(probed))
+    assert len(probed) <= 2 * max(1, last_episode).bit_length() + 2
+
+
+@pytest.mark.parametrize("last_episode", [5, 10, 11])
+def test_gallop_stops_at_max_episodes(monkeypatch, last_episode):
+    probed = probe_site(monkeypatch, last_episode)
+    assert asyncio.run(fetch_iframes.find_last_episode(None, "show", max_episodes=10)) == min(last_episode, 10)
+    assert max(probed) <= 10
+
+
+@pytest.mark.parametrize("last_episode", [12, 13, 16, 17])
+def test_gallop_from_a_start_episode(monkeypatch, last_episode):
+    probed = probe_site(monkeypatch, last_episode)
+    probes = {}
+    assert asyncio.run(fetch_iframes.find_last_episode(None, "show", probes=probes, start_episode=12)) == last_episode
+    assert min(probed) == 12
+    # Every probe is cached for the caller, misses included
+    assert sorted(probes) == sorted(probed)
+    assert all(bool(src) == (number <= last_episode) for number, src in probes.items())
+
+
+def test_gallop_with_missing_start_episode(monkeypatch):
+    probe_site(monkeypatch, 4)
+    assert asyncio.run(fetch_iframes.find_last_episode(None, "show", start_episode=7)) == 6
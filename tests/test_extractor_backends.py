@@ -0,0 +1,92 @@
+import glob
+import os
+
+import pytest
+
+import main_az_list
+from utils import extractor_backends
+from utils.extractor_backends import BACKENDS
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "*.html")))
+FUNCTIONS = ["iframe_src", "all_iframes", "canonical_url", "anime_links"]
+# Backends checked against the bs4 reference (lxml is optional)
+OTHERS = [name for name in BACKENDS if name != "bs4"]
+
+# Malformed link markup every backend must read the way html.parser does
+MALFORMED = {
+    "unclosed": '<li><a href="/watch/open-ended"><span>Open</span> Ended',
+    "stray_close": '</a><a href="/watch/stray">Stray</a></a> after',
+    "misnested": '<a href="/watch/misnested"><b><i>Bold</b> Tail</i></a>',
+    "comment": '<a href="/watch/commented"><!-- ad --><span>12</span></a>',
+    "script": '<a href="/watch/scripted"><script>var s = "</a>";</script>Shown</a>',
+    "whitespace": '<a href="/watch/spaced">\n  <span>TV</span>\n  Spaced \n</a>',
+    "uppercase": '<A HREF="/watch/upper">Upper</A>',
+    "attributes": "<a class=x href='/watch/quoted?' title=\"a>b\">Q</a><a href=/watch/bare>Bare</a>",
+}
+NESTED = '<a href="/watch/outer">Outer <a href="/watch/inner">Inner</a> tail</a>'
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_fixtures_found():
+    assert len(FIXTURES) >= 3
+
+
+@pytest.mark.parametrize("function", FUNCTIONS)
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+@pytest.mark.parametrize("name", OTHERS)
+def test_backend_matches_bs4_on_fixture(name, path, function):
+    html_content = read(path)
+    expected = getattr(BACKENDS["bs4"], function)(html_content)
+    assert getattr(BACKENDS[name], function)(html_content) == expected
+
+
+@pytest.mark.parametrize("case", sorted(MALFORMED))
+@pytest.mark.parametrize("name", OTHERS)
+def test_backend_matches_bs4_on_malformed_links(name, case):
+    html_content = MALFORMED[case]
+    assert BACKENDS[name].anime_links(html_content) == BACKENDS["bs4"].anime_links(html_content)
+
+
+def test_comment_is_not_a_title():
+    # The digits-only first part falls back to the direct text children
+    for backend in BACKENDS.values():
+        assert backend.anime_links(MALFORMED["comment"]) == [("/watch/commented", "12", [])]
+
+
+def test_nested_links_stream_nests_like_html_parser():
+    expected = [
+        ("/watch/outer", "Outer|Inner|tail", ["Outer ", " tail"]),
+        ("/watch/inner", "Inner", ["Inner"]),
+    ]
+    assert BACKENDS["bs4"].anime_links(NESTED) == expected
+    assert BACKENDS["stream"].anime_links(NESTED) == expected
+
+
+@pytest.mark.skipif("lxml" not in BACKENDS, reason="lxml is not installed")
+def test_nested_links_lxml_closes_outer_link():
+    # Documented difference: libxml2 closes the outer link at the inner one
+    assert BACKENDS["lxml"].anime_links(NESTED) == [
+        ("/watch/outer", "Outer", ["Outer "]),
+        ("/watch/inner", "Inner", ["Inner"]),
+    ]
+
+
+@pytest.mark.parametrize("name", list(BACKENDS))
+def test_nested_links_give_the_same_titles(monkeypatch, name):
+    monkeypatch.setattr(extractor_backends, "EXTRACTOR_BACKEND", name)
+    titles = [(anime["slug"], anime["title"]) for anime in main_az_list.extract_anime_from_html(NESTED)]
+    assert titles == [("outer", "Outer"), ("inner", "Inner")]
+
+
+@pytest.mark.parametrize("name", OTHERS)
+def test_backend_handles_empty_documents(name):
+    for html_content in ("", "   ", "<!-- only a comment -->"):
+        backend = BACKENDS[name]
+        assert backend.iframe_src(html_content) is None
+        assert backend.all_iframes(html_content) == []
+        assert backend.canonical_url(html_content) == ""
+        assert backend.anime_links(html_content) == []
@@ -0,0 +1,122 @@
+import json
+import os
+
+import pytest
+
+from utils import framed_jsonl
+from utils.framed_jsonl import CODECS, FramedJsonl, read_jsonl_lines, split_frames
+
+SUFFIXES = [
+    pytest.param(".gz", id="gzip"),
+    pytest.param(".zst", id="zstd", marks=pytest.mark.skipif("zstd" not in CODECS, reason="zstandard is not installed")),
+]
+
+
+def record(i):
+    return {"slug": f"s{i}", "title": f"T{i}", "episodes": [f"https://player.example/e/{i}/{n}" for n in range(3)]}
+
+
+def lines(start, stop):
+    return [(json.dumps(record(i)), f"s{i}") for i in range(start, stop)]
+
+
+def frame(codec, start, stop):
+    return codec.compress("".join(json.dumps(record(i)) + "\n" for i in range(start, stop)).encode("utf-8"))
+
+
+@pytest.fixture(params=SUFFIXES)
+def path(request, tmp_path):
+    return str(tmp_path / f"out.jsonl{request.param}")
+
+
+def test_read_record_by_slug(path):
+    with FramedJsonl(path, frame_records=10) as jsonl:
+        jsonl.append_lines(lines(0, 25))
+        # Five records are still buffered for the next frame
+        assert jsonl.read_record("s23") == record(23)
+        assert jsonl.read_record("s7") == record(7)
+        assert jsonl.read_record("s12") == record(12)
+        assert jsonl.read_record("missing") is None
+    assert len(jsonl.frames) == 3
+
+    with FramedJsonl(path, frame_records=10) as jsonl:
+        assert len(jsonl.slugs) == 25
+        for i in (0, 9, 10, 24):
+            assert jsonl.read_record(f"s{i}") == record(i)
+        assert jsonl.read_record("s25") is None
+
+
+def test_torn_last_frame_is_truncated_on_reopen(path):
+    with FramedJsonl(path, frame_records=10) as jsonl:
+        jsonl.append_lines(lines(0, 20))
+    size = os.path.getsize(path)
+    torn = frame(jsonl.codec, 20, 30)
+    with open(path, "ab") as f:
+        f.write(torn[:len(torn) // 2])
+
+    with FramedJsonl(path, frame_records=10) as jsonl:
+        assert os.path.getsize(path) == size
+        assert len(jsonl.slugs) == 20 and "s25" not in jsonl.slugs
+        jsonl.append_lines(lines(20, 30))
+
+    with FramedJsonl(path, frame_records=10) as jsonl:
+        assert len(jsonl.slugs) == 30
+        assert jsonl.read_record("s25") == record(25)
+    assert [json.loads(line)["slug"] for line in read_jsonl_lines(path)] == [f"s{i}" for i in range(30)]
+
+
+def test_tail_appended_after_the_index_is_picked_up(path):
+    with FramedJsonl(path, frame_records=10) as jsonl:
+        jsonl.append_lines(lines(0, 10))
+    # Another tool appends whole frames without touching the index
+    with open(path, "ab") as f:
+        f.write(frame(jsonl.codec, 10, 15) + frame(jsonl.codec, 15, 18))
+
+    with FramedJsonl(path, frame_records=10) as jsonl:
+        assert len(jsonl.slugs) == 18
+        assert len(jsonl.frames) == 3 and sum(jsonl.frames[-1]) == os.path.getsize(path)
+        assert jsonl.read_record("s12") == record(12)
+        assert jsonl.read_record("s17") == record(17)
+        jsonl.append_lines(lines(18, 20))
+
+    with FramedJsonl(path, frame_records=10) as jsonl:
+        assert len(jsonl.slugs) == 20
+        assert jsonl.read_record("s19") == record(19)
+
+
+def test_plain_jsonl_is_imported_on_first_open(path):
+    plain_path = path.rsplit(".", 1)[0]
+    with open(plain_path, "w", encoding="utf-8") as f:
+        for i in range(23):
+            f.write(json.dumps(record(i)) + "\n")
+        f.write("\n")  # Blank lines are dropped
+
+    with FramedJsonl(path, frame_records=5) as jsonl:
+        assert len(jsonl.slugs) == 23
+        assert len(jsonl.frames) == 5
+        assert jsonl.read_record("s0") == record(0)
+        assert jsonl.read_record("s22") == record(22)
+    # The plain file is left alone
+    assert os.path.getsize(plain_path) > 0
+
+    assert [json.loads(line) for line in read_jsonl_lines(path)] == [record(i) for i in range(23)]
+    with FramedJsonl(path, frame_records=5) as jsonl:
+        assert len(jsonl.slugs) == 23
+        assert jsonl.read_record("s13") == record(13)
+
+
+def test_split_frames_across_small_reads(path, monkeypatch):
+    with FramedJsonl(path, frame_records=3) as jsonl:
+        jsonl.append_lines(lines(0, 10))
+    monkeypatch.setattr(framed_jsonl, "SPLIT_READ_BYTES", 7)
+
+    with open(path, "rb") as f:
+        frames = list(split_frames(jsonl.codec, f))
+        assert [(offset, length) for offset, length, _, _ in frames] == jsonl.frames
+        contents = b"".join(content for _, _, _, content in frames)
+        assert [json.loads(line)["slug"] for line in contents.splitlines()] == [f"s{i}" for i in range(10)]
+
+        # A range that stops inside the last frame yields the frames before it
+        second_offset, second_length = jsonl.frames[1]
+        partial = list(split_frames(jsonl.codec, f, second_offset, second_offset + second_length + 5))
+        assert [(offset, length) for offset, length, _, _ in partial] == [jsonl.frames[1]]
@@ -0,0 +1,111 @@
+import json
+import os
+
+from utils.framed_jsonl import FramedJsonl
+from utils.hash_set import HashMap
+from utils.jsonl_index import IndexedJsonl
+
+
+def records(start, stop):
+    return [(json.dumps({"slug": f"s{i}", "title": f"T{i}"}), f"s{i}") for i in range(start, stop)]
+
+
+def parsed_lines(monkeypatch, cls):
+    """Records the type of every index line loaded."""
+    seen = []
+    original = cls._load_index_line
+
+    def load_index_line(self, fields):
+        seen.append(fields[0])
+        original(self, fields)
+
+    monkeypatch.setattr(cls, "_load_index_line", load_index_line)
+    return seen
+
+
+def test_reopen_maps_the_slugset_instead_of_parsing_the_index(tmp_path, monkeypatch):
+    path = str(tmp_path / "out.jsonl")
+    with IndexedJsonl(path) as jsonl:
+        jsonl.append_lines(records(0, 100))
+        jsonl.checkpoint("csv_size", 123)
+    assert os.path.exists(f"{path}.idx.slugset")
+
+    seen = parsed_lines(monkeypatch, IndexedJsonl)
+    with IndexedJsonl(path) as jsonl:
+        assert isinstance(jsonl.slugs, HashMap)
+        assert len(jsonl.slugs) == 100 and "s42" in jsonl.slugs and "s100" not in jsonl.slugs
+        assert jsonl.read_record("s42") == {"slug": "s42", "title": "T42"}
+        assert jsonl.checkpoints == {"csv_size": "123"}
+        jsonl.append_lines(records(100, 110))
+    # Only the lines restated at close were parsed
+    assert "r" not in seen
+
+    with IndexedJsonl(path) as jsonl:
+        assert len(jsonl.slugs) == 110
+        assert jsonl.read_record("s105") == {"slug": "s105", "title": "T105"}
+
+
+def test_lines_written_after_the_slugset_are_loaded(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with IndexedJsonl(path) as jsonl:
+        jsonl.append_lines(records(0, 10))
+    # A checkpoint after close, then a run that crashed without closing
+    jsonl.checkpoint("csv_size", 7)
+    crashed = IndexedJsonl(path).open()
+    crashed.append_lines(records(10, 20))
+    crashed._file.close()
+    crashed._index_file.close()
+
+    with IndexedJsonl(path) as jsonl:
+        assert len(jsonl.slugs) == 20
+        assert jsonl.checkpoints == {"csv_size": "7"}
+        assert jsonl.read_record("s15") == {"slug": "s15", "title": "T15"}
+
+
+def test_stale_slugset_is_ignored(tmp_path, capsys):
+    path = str(tmp_path / "out.jsonl")
+    with IndexedJsonl(path) as jsonl:
+        jsonl.append_lines(records(0, 10))
+
+    # Rewrite the JSONL and its index behind the slugset's back
+    os.remove(path)
+    os.remove(f"{path}.idx")
+    slugset = f"{path}.idx.slugset"
+    os.rename(slugset, f"{slugset}.old")
+    with IndexedJsonl(path) as jsonl:
+        jsonl.append_lines(records(50, 53))
+    os.replace(f"{slugset}.old", slugset)
+
+    with IndexedJsonl(path) as jsonl:
+        assert len(jsonl.slugs) == 3 and "s0" not in jsonl.slugs
+        assert jsonl.read_record("s51") == {"slug": "s51", "title": "T51"}
+    assert "reading the whole index" in capsys.readouterr().out
+
+
+def test_framed_frames_are_read_from_the_index_after_a_slugset_load(tmp_path):
+    path = str(tmp_path / "out.jsonl.gz")
+    with FramedJsonl(path, frame_records=4) as jsonl:
+        jsonl.append_lines(records(0, 10))
+    # The partial third frame is written on close
+    frames = list(jsonl.frames)
+    assert len(frames) == 3
+
+    with FramedJsonl(path, frame_records=4) as jsonl:
+        jsonl.append_lines(records(10, 14))
+        assert jsonl.frames[:3] == frames and len(jsonl.frames) == 4
+        assert jsonl.read_record("s2") == {"slug": "s2", "title": "T2"}
+        assert jsonl.read_record("s13") == {"slug": "s13", "title": "T13"}
+
+
+def test_hash_map_round_trips_through_a_file(tmp_path):
+    entries = HashMap()
+    for i in range(1000):
+        entries.put(f"s{i}", i * 10, i)
+    entries.put("s5", -1, 0)
+    entries.save(str(tmp_path / "map"), stamp=3, tag=4)
+
+    loaded = HashMap.load(str(tmp_path / "map"))
+    assert (loaded.stamp, loaded.tag, len(loaded)) == (3, 4, 1000)
+    assert loaded.get("s999") == (9990, 999) and loaded.get("s5") == (-1, 0) and loaded.get("x") is None
+    loaded.put("new", 1, 2)
+    assert loaded.get("new") == (1, 2)
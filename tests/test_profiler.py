@@ -0,0 +1,22 @@
+import glob
+import time
+from types import SimpleNamespace
+
+from utils.profiler import CrawlProfiler, _frame_label
+
+
+def test_frame_label_without_co_qualname():
+    # Code objects before Python 3.11 have no co_qualname
+    frame = SimpleNamespace(f_code=SimpleNamespace(co_filename="/src/fetch_iframes.py", co_name="worker"))
+    assert _frame_label(frame) == "fetch_iframes.py:worker"
+
+
+def test_sampled_stacks_are_written(tmp_path):
+    with CrawlProfiler("test", output_dir=str(tmp_path), interval=0.001) as profiler:
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+    assert profiler.samples
+    (collapsed,) = glob.glob(str(tmp_path / "*.collapsed"))
+    with open(collapsed, encoding="utf-8") as f:
+        assert "test_profiler.py:" in f.read()
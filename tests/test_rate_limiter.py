@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from utils.rate_limiter import RateLimiter
+
+
+class Clock:
+    """Fake monotonic clock; sleep() advances it instead of waiting."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def limiter(clock, **kwargs):
+    options = dict(initial_rate=2.0, min_rate=0.5, max_rate=4.0, increase=1.0, decrease=0.5, latency_target=3.0)
+    options.update(kwargs)
+    return RateLimiter(clock=clock, **options)
+
+
+def test_healthy_responses_increase_the_rate_additively(clock):
+    rate_limiter = limiter(clock)
+    rate_limiter.record(True, 0.5)
+    assert rate_limiter.rate == pytest.approx(2.5)  # + increase / rate
+    rate_limiter.record(True, 3.0)  # At the latency target is still healthy
+    assert rate_limiter.rate == pytest.approx(2.9)
+    for _ in range(20):
+        rate_limiter.record(True, 0.5)
+    assert rate_limiter.rate == 4.0
+
+
+def test_errors_decrease_the_rate_once_per_cooldown(clock):
+    rate_limiter = limiter(clock, initial_rate=4.0)
+    rate_limiter.record(False, 0.5)
+    assert rate_limiter.rate == 2.0
+    # Responses already in flight report the same overload
+    clock.now += 0.5
+    rate_limiter.record(False, 0.5)
+    assert rate_limiter.rate == 2.0
+
+    clock.now += 0.5
+    rate_limiter.record(False, 0.5)
+    assert rate_limiter.rate == 1.0
+    for _ in range(5):
+        clock.now += 1.0
+        rate_limiter.record(False, 0.5)
+    assert rate_limiter.rate == 0.5
+
+
+def test_slow_responses_decrease_the_rate(clock):
+    rate_limiter = limiter(clock, initial_rate=4.0)
+    rate_limiter.record(True, 5.0)
+    assert rate_limiter.rate == 2.0
+    # The cooldown is at least the latency of the slow response
+    clock.now += 4.0
+    rate_limiter.record(True, 5.0)
+    assert rate_limiter.rate == 2.0
+    clock.now += 1.0
+    rate_limiter.record(True, 5.0)
+    assert rate_limiter.rate == 1.0
+
+
+def test_increase_after_decrease(clock):
+    rate_limiter = limiter(clock, initial_rate=4.0)
+    rate_limiter.record(False, 0.5)
+    rate_limiter.record(True, 0.5)
+    assert rate_limiter.rate == pytest.approx(2.5)
+
+
+def test_acquire_paces_requests_at_the_rate(clock):
+    rate_limiter = limiter(clock)
+
+    async def take(count):
+        for _ in range(count):
+            await rate_limiter.acquire()
+
+    asyncio.run(take(3))
+    # The bucket starts with one token; then one request every 1 / rate seconds
+    assert clock.sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
@@ -0,0 +1,191 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import fetch_iframes
+from utils.page_loader import RENDER_WAIT_ATTR, PageLoad, PageLoader
+from utils.resilience import (
+    NAVIGATION,
+    NOT_FOUND,
+    RATE_LIMITED,
+    SERVER_ERROR,
+    TIMEOUT,
+    CircuitBreaker,
+    TransientFetchError,
+    classify_failure,
+)
+
+URL = "https://site.example/watch/show/ep-3"
+IFRAME = '<iframe src="https://player.example/e/3"></iframe>'
+real_sleep = asyncio.sleep
+
+
+def extract_iframe(html):
+    return "https://player.example/e/3" if IFRAME in html else ""
+
+
+class RenderCrawler:
+    """Stands in for AsyncWebCrawler: every render returns the same HTML."""
+
+    def __init__(self, html):
+        self.html = html
+        self.renders = 0
+
+    async def arun(self, url, config=None):
+        self.renders += 1
+        return SimpleNamespace(
+            success=True, html=self.html, error_message="", status_code=200, response_headers={},
+        )
+
+
+class Clock:
+    """Fake monotonic clock; sleep() advances it instead of waiting."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        await real_sleep(0)  # Let the other tasks run
+
+
+def render(html):
+    loader = PageLoader(RenderCrawler(html))
+    return asyncio.run(loader.render(URL, "s", extract=extract_iframe, wait_for="iframe"))
+
+
+@pytest.mark.parametrize(
+    "page, kind",
+    [
+        (PageLoad(URL, success=True, extracted="https://player.example/e/3"), None),
+        (PageLoad(URL, success=False, status_code=404), NOT_FOUND),
+        (PageLoad(URL, success=False, status_code=410), NOT_FOUND),
+        (PageLoad(URL, success=False, status_code=429), RATE_LIMITED),
+        (PageLoad(URL, success=False, status_code=503), SERVER_ERROR),
+        (PageLoad(URL, success=False, error_message="Page.goto: Timeout 10000ms exceeded"), TIMEOUT),
+        (PageLoad(URL, success=False, error_message="net::ERR_CONNECTION_RESET"), NAVIGATION),
+        (PageLoad(URL, success=True, extracted=""), NOT_FOUND),
+        (PageLoad(URL, success=True, extracted="", complete=False), TIMEOUT),
+    ],
+)
+def test_classify_failure(page, kind):
+    assert classify_failure(page) == kind
+
+
+def test_settled_empty_render_is_not_found():
+    page = render(f'<html {RENDER_WAIT_ATTR}="settled"><body>No episode</body></html>')
+    assert page.complete
+    assert classify_failure(page) == NOT_FOUND
+
+
+def test_render_with_the_element_is_found():
+    page = render(f'<html lang="en" {RENDER_WAIT_ATTR}="found"><body>{IFRAME}</body></html>')
+    assert classify_failure(page) is None
+
+
+def test_timed_out_render_is_a_timeout():
+    # crawl4ai hands back whatever was in the DOM when wait_for timed out
+    page = render('<html><body><div class="loading"></div></body></html>')
+    assert page.success and not page.complete
+    assert classify_failure(page) == TIMEOUT
+
+
+def test_timed_out_renders_are_retried_not_taken_as_the_end(monkeypatch):
+    monkeypatch.setattr(fetch_iframes, "FETCH_RETRIES", 2)
+    monkeypatch.setattr(fetch_iframes, "backoff_delay", lambda attempt: 0)
+    crawler = RenderCrawler('<html><body><div class="loading"></div></body></html>')
+
+    with pytest.raises(TransientFetchError) as excinfo:
+        asyncio.run(fetch_iframes.fetch_episode_iframes(crawler, "show", 3, loader=PageLoader(crawler)))
+    assert excinfo.value.kind == TIMEOUT
+    assert crawler.renders == 3
+
+    # find_last_episode must not stop at a probe that timed out
+    with pytest.raises(TransientFetchError):
+        asyncio.run(fetch_iframes.find_last_episode(crawler, "show", loader=PageLoader(crawler)))
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(asyncio, "sleep", clock.sleep)
+    return CircuitBreaker("site.example", threshold=3, cooldown=10, max_cooldown=25, clock=clock)
+
+
+def test_circuit_opens_after_threshold_consecutive_failures(breaker):
+    breaker.record(False)
+    breaker.record(False)
+    breaker.record(True)  # A success resets the count
+    breaker.record(False)
+    breaker.record(False)
+    assert not breaker.is_open
+    breaker.record(False)
+    assert breaker.is_open and breaker.opened_at == breaker.clock()
+    assert asyncio.run(breaker.wait()) is True
+    # The caller waited out the cooldown, then became the half-open trial
+    assert breaker.clock.sleeps == [10]
+
+
+def test_failed_trial_reopens_with_doubled_cooldown(breaker):
+    for _ in range(3):
+        breaker.record(False)
+
+    cooldowns = []
+    for _ in range(3):
+        trial = asyncio.run(breaker.wait())
+        assert trial
+        breaker.record(False, trial=trial)
+        assert breaker.is_open
+        cooldowns.append(breaker.cooldown)
+    assert cooldowns == [20, 25, 25]
+    assert breaker.clock.sleeps == [10, 20, 25]
+
+
+def test_successful_trial_closes_the_circuit(breaker):
+    for _ in range(3):
+        breaker.record(False)
+    trial = asyncio.run(breaker.wait())
+    breaker.record(False, trial=trial)
+
+    trial = asyncio.run(breaker.wait())
+    breaker.record(True, trial=trial)
+    assert not breaker.is_open
+    assert breaker.cooldown == 10 and breaker.failures == 0
+    # Closed: nobody waits, nobody is a trial
+    assert asyncio.run(breaker.wait()) is False
+    assert breaker.clock.sleeps == [10, 20]
+
+
+def test_only_one_trial_while_half_open(breaker):
+    for _ in range(3):
+        breaker.record(False)
+
+    async def call():
+        trial = await breaker.wait()
+        if trial:
+            await asyncio.sleep(1)  # The trial request
+        breaker.record(True, trial=trial)
+        return trial
+
+    async def callers():
+        return await asyncio.gather(call(), call())
+
+    # The other caller polls until the trial has closed the circuit
+    assert sorted(asyncio.run(callers())) == [False, True]
+    assert not breaker.is_open
+    assert breaker.clock.sleeps.count(0.1) >= 1
+
+
+def test_abandoned_trial_lets_the_next_caller_try(breaker):
+    for _ in range(3):
+        breaker.record(False)
+    trial = asyncio.run(breaker.wait())
+    breaker.abandon(trial)
+    assert breaker.is_open
+    assert asyncio.run(breaker.wait()) is True
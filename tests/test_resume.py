@@ -0,0 +1,86 @@
+import asyncio
+import csv
+import json
+
+import pytest
+
+import fetch_iframes
+
+
+class DummyCrawler:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Stubs the browser and episode fetching; returns the fetched slugs."""
+    fetched = []
+
+    async def fake_fetch_anime_episodes(crawler, slug, **kwargs):
+        fetched.append(slug)
+        return {"1": f"https://player.example/{slug}/1"}
+
+    monkeypatch.setattr(fetch_iframes, "get_crawler", lambda **kwargs: DummyCrawler())
+    monkeypatch.setattr(fetch_iframes, "fetch_anime_episodes", fake_fetch_anime_episodes)
+    return fetched
+
+
+def write_az_list(path, slugs):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["title", "slug", "watch_url"])
+        writer.writeheader()
+        for slug in slugs:
+            writer.writerow({"title": slug.title(), "slug": slug, "watch_url": f"https://site.example/watch/{slug}"})
+
+
+def run(**kwargs):
+    asyncio.run(fetch_iframes.enrich_anime_with_iframes(workers=1, **kwargs))
+
+
+def test_resume_without_update_fetches_nothing(tmp_path, fetches):
+    csv_input = tmp_path / "anime_az_list.csv"
+    write_az_list(csv_input, ["s0", "s1", "s2"])
+    outputs = dict(
+        csv_input_file=str(csv_input),
+        csv_output_file=str(tmp_path / "out.csv"),
+        json_output_file=str(tmp_path / "out.jsonl"),
+    )
+
+    run(**outputs)
+    assert sorted(fetches) == ["s0", "s1", "s2"]
+    with open(tmp_path / "out.jsonl", encoding="utf-8") as f:
+        before = [json.loads(line) for line in f]
+
+    fetches.clear()
+    run(**outputs)
+    assert fetches == []
+    with open(tmp_path / "out.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == before
+
+
+def test_resume_without_update_fetches_nothing_sqlite(tmp_path, fetches, monkeypatch):
+    monkeypatch.setattr(fetch_iframes, "SQLITE_DB_PATH", str(tmp_path / "crawl.db"))
+    csv_input = tmp_path / "anime_az_list.csv"
+    write_az_list(csv_input, ["s0", "s1", "s2"])
+
+    run(csv_input_file=str(csv_input), storage="sqlite")
+    assert sorted(fetches) == ["s0", "s1", "s2"]
+
+    fetches.clear()
+    run(csv_input_file=str(csv_input), storage="sqlite")
+    assert fetches == []
+
+
+def test_update_rechecks_processed_animes(tmp_path, fetches):
+    csv_input = tmp_path / "anime_az_list.csv"
+    write_az_list(csv_input, ["s0", "s1"])
+    outputs = dict(csv_input_file=str(csv_input), json_output_file=str(tmp_path / "out.jsonl"))
+
+    run(**outputs)
+    fetches.clear()
+    run(update=True, recheck_after=0, **outputs)
+    assert sorted(fetches) == ["s0", "s1"]
@@ -0,0 +1,24 @@
+import csv
+import json
+
+import sync_csv_to_jsonl
+
+
+def test_records_without_a_usable_slug_dont_stop_the_scan(tmp_path, monkeypatch):
+    jsonl_path = tmp_path / "t.jsonl"
+    monkeypatch.setattr(sync_csv_to_jsonl, "CSV_INPUT", str(tmp_path / "in.csv"))
+    monkeypatch.setattr(sync_csv_to_jsonl, "JSONL_OUTPUT", str(jsonl_path))
+    monkeypatch.setattr(sync_csv_to_jsonl, "SLUGSET_FILE", f"{jsonl_path}.slugset")
+    monkeypatch.setattr(sync_csv_to_jsonl, "FRAMED", False)
+
+    lines = [{"slug": "a"}, {"slug": None}, [1], {"title": "no slug"}, {"slug": "b"}]
+    jsonl_path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    with open(tmp_path / "in.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["title", "slug"])
+        writer.writeheader()
+        writer.writerows({"title": slug.upper(), "slug": slug} for slug in "abc")
+
+    sync_csv_to_jsonl.sync_csv_to_jsonl()
+
+    added = [json.loads(line) for line in jsonl_path.read_text().splitlines()[len(lines):]]
+    assert added == [{"title": "C", "slug": "c"}]
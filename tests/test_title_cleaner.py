@@ -0,0 +1,178 @@
+import csv
+import json
+import re
+
+import pytest
+
+from utils.framed_jsonl import read_jsonl_lines
+from utils.title_cleaner import clean_csv_file, clean_jsonl_file
+
+TITLES = [
+    ("Maison IkkokuTV96 Eps", "maison-ikkoku"),
+    ("Jujutsu KaisenTV24 Eps", "jujutsu-kaisen"),
+    ("Your NameMovie1 Eps", "your-name"),
+    ("96TV", "ninety-six"),
+    ("12OVA", "hellsing-ultimate"),
+    ("12 ova eps", "lowercase-artifact"),
+    ("Frieren", "frieren"),
+    ("Sousou no Frieren: Beyond Journey's End", "sousou-no-frieren"),
+    ("", "jujutsu-kaisen-2nd-season"),
+    ("7", "seven"),
+    ("X", "x-1999"),
+    ("  Padded Title  ", "padded"),
+    ("Shingeki no KyojinéTV25", "attack-on-titan"),
+    ("SpecialTV", "special-tv"),
+    ("Frieren", "frieren"),  # Duplicate slug
+]
+
+
+# --- The whole-file cleaner the streaming one replaced ---
+
+def old_slug_to_title(slug):
+    if not slug:
+        return "Unknown"
+    return slug.replace("-", " ").title()
+
+
+def old_clean_title(title, slug):
+    cleaned = re.sub(r'(TV|Movie|OVA|ONA|Special)\d+(\s*Eps)?$', '', title, flags=re.IGNORECASE)
+    if re.match(r'^\d+(TV|Movie|OVA|ONA|Special)(\s*Eps)?$', cleaned, flags=re.IGNORECASE) or \
+       re.match(r'^\d+(TV|Movie|OVA|ONA|Special)(\s*Eps)?$', title, flags=re.IGNORECASE):
+        cleaned = ""
+    cleaned = cleaned.strip()
+    if not cleaned or cleaned.isdigit() or len(cleaned) < 2:
+        return old_slug_to_title(slug)
+    return cleaned
+
+
+def old_clean_jsonl(input_path, output_path):
+    updated_lines = []
+    with open(input_path, 'r', encoding='utf-8') as infile:
+        for line in infile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            data['title'] = old_clean_title(data.get('title', ''), data.get('slug', ''))
+            updated_lines.append(json.dumps(data))
+    with open(output_path, 'w', encoding='utf-8') as outfile:
+        for line in updated_lines:
+            outfile.write(line + '\n')
+
+
+def old_clean_csv(input_path, output_path):
+    with open(input_path, 'r', encoding='utf-8') as infile:
+        reader = csv.DictReader(infile)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+    for row in rows:
+        row['title'] = old_clean_title(row['title'], row['slug'])
+    with open(output_path, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# --- Fixtures ---
+
+def records(copies):
+    for copy in range(copies):
+        for i, (title, slug) in enumerate(TITLES):
+            yield {
+                "title": title,
+                "slug": slug if copy == 0 else f"{slug}-{copy}",
+                "episodes": {str(n): f"https://player.example/{slug}/{n}" for n in range(1, i % 4 + 2)},
+            }
+
+
+@pytest.fixture
+def jsonl_path(tmp_path):
+    path = tmp_path / "iframes.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i, record in enumerate(records(20)):
+            # Compact and default separators: clean lines are copied as they are
+            separators = (",", ":") if i % 2 else None
+            f.write(json.dumps(record, separators=separators, ensure_ascii=bool(i % 3)) + "\n")
+            if i % 50 == 7:
+                f.write("\n{not json\n")
+    return str(path)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "anime.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["title", "slug", "description"])
+        writer.writeheader()
+        for i, (title, slug) in enumerate(TITLES):
+            writer.writerow({"title": title, "slug": slug, "description": f"Line one\nline, \"two\" {i}"})
+    return str(path)
+
+
+def parsed(path):
+    return [json.loads(line) for line in read_jsonl_lines(path)]
+
+
+@pytest.mark.parametrize("workers, chunk_bytes", [(1, 1 << 20), (1, 256), (2, 256), (3, 1000)])
+def test_jsonl_matches_the_whole_file_cleaner(tmp_path, jsonl_path, workers, chunk_bytes):
+    expected_path = str(tmp_path / "expected.jsonl")
+    old_clean_jsonl(jsonl_path, expected_path)
+    output_path = str(tmp_path / "cleaned.jsonl")
+
+    total, fixed, invalid, duplicates = clean_jsonl_file(
+        jsonl_path, output_path, workers=workers, chunk_bytes=chunk_bytes, drop_duplicates=False,
+    )
+    assert parsed(output_path) == parsed(expected_path)
+    assert total == len(TITLES) * 20 and invalid == 6 and duplicates == 0
+    assert fixed == sum(old_clean_title(title, slug) != title for title, slug in TITLES) * 20
+
+
+def test_jsonl_keeps_clean_lines_byte_for_byte(tmp_path, jsonl_path):
+    output_path = str(tmp_path / "cleaned.jsonl")
+    clean_jsonl_file(jsonl_path, output_path, workers=2, chunk_bytes=300)
+    with open(jsonl_path, "rb") as f:
+        clean_lines = {line for line in f if b'"title"' in line and json.loads(line)["title"] == "Frieren"}
+    with open(output_path, "rb") as f:
+        assert clean_lines and clean_lines <= set(f)
+
+
+def test_jsonl_cleaned_in_place(tmp_path, jsonl_path):
+    expected_path = str(tmp_path / "expected.jsonl")
+    old_clean_jsonl(jsonl_path, expected_path)
+    clean_jsonl_file(jsonl_path, jsonl_path, workers=2, chunk_bytes=500)
+    assert parsed(jsonl_path) == parsed(expected_path)
+
+
+def test_framed_jsonl_matches_the_whole_file_cleaner(tmp_path, jsonl_path):
+    expected_path = str(tmp_path / "expected.jsonl")
+    old_clean_jsonl(jsonl_path, expected_path)
+
+    # Plain to framed, then framed to framed across several workers
+    framed_path = str(tmp_path / "cleaned.jsonl.gz")
+    clean_jsonl_file(jsonl_path, framed_path, workers=1)
+    assert parsed(framed_path) == parsed(expected_path)
+    again_path = str(tmp_path / "again.jsonl.gz")
+    clean_jsonl_file(framed_path, again_path, workers=2, chunk_bytes=1)
+    assert parsed(again_path) == parsed(expected_path)
+
+
+def test_jsonl_drops_duplicate_slugs_when_asked(tmp_path, jsonl_path):
+    output_path = str(tmp_path / "cleaned.jsonl")
+    *_, duplicates = clean_jsonl_file(jsonl_path, output_path, workers=2, chunk_bytes=256, drop_duplicates=True)
+    slugs = [record["slug"] for record in parsed(output_path)]
+    assert duplicates == 20 and len(slugs) == len(set(slugs))
+
+
+def test_csv_matches_the_whole_file_cleaner(tmp_path, csv_path):
+    expected_path = str(tmp_path / "expected.csv")
+    old_clean_csv(csv_path, expected_path)
+    output_path = str(tmp_path / "cleaned.csv")
+
+    total, fixed, duplicates = clean_csv_file(csv_path, output_path, drop_duplicates=False)
+    with open(output_path, "rb") as f, open(expected_path, "rb") as expected:
+        assert f.read() == expected.read()
+    assert (total, duplicates) == (len(TITLES), 0)
+    assert fixed == sum(old_clean_title(title, slug) != title for title, slug in TITLES)
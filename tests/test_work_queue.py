@@ -0,0 +1,135 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from utils import work_queue
+from utils.work_queue import DONE, FAILED, LEASED, PENDING, WorkQueue
+
+LEASE = 5.0
+
+
+class Clock:
+    """Stands in for time.time() in the queue, advanced by hand."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(work_queue, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "queue.db")
+    with WorkQueue(path) as coordinator:
+        coordinator.enqueue([{"slug": f"s{i}", "title": f"T{i}"} for i in range(3)])
+    return path
+
+
+@pytest.fixture
+def workers(db_path, clock):
+    """Two workers, each with its own connection to the queue."""
+    first, second = WorkQueue(db_path, max_attempts=3), WorkQueue(db_path, max_attempts=3)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(workers, clock):
+    first, second = workers
+    assert first.lease("a", LEASE) == ("s0", {"slug": "s0", "title": "T0"})
+    # A live lease isn't handed out again
+    assert second.lease("b", LEASE)[0] == "s1"
+
+    clock.advance(LEASE + 1)
+    assert second.lease("b", LEASE)[0] == "s0"
+
+    # The first worker finds out on its next heartbeat, and can't report it
+    assert first.heartbeat("a", ["s0"], LEASE) == {"s0"}
+    assert not first.complete("a", "s0", {"slug": "s0", "by": "a"})
+    assert second.complete("b", "s0", {"slug": "s0", "by": "b"})
+    assert list(second.iter_results()) == [{"slug": "s0", "by": "b"}]
+
+
+def test_heartbeat_keeps_the_lease(workers, clock):
+    first, second = workers
+    first.lease("a", LEASE)
+    for _ in range(3):
+        clock.advance(LEASE - 1)
+        assert first.heartbeat("a", ["s0"], LEASE) == set()
+    assert [second.lease("b", LEASE)[0] for _ in range(2)] == ["s1", "s2"]
+    assert second.lease("b", LEASE) is None
+
+
+def test_crashed_workers_tasks_are_requeued(workers, clock):
+    crashed, survivor = workers
+    assert [crashed.lease("a", LEASE)[0] for _ in range(3)] == ["s0", "s1", "s2"]
+    crashed.close()  # Dies without releasing anything
+
+    assert survivor.lease("b", LEASE) is None
+    assert survivor.stats()[LEASED] == 3
+    clock.advance(LEASE + 1)
+    assert survivor.stats() == {PENDING: 3, LEASED: 0, DONE: 0, FAILED: 0}
+
+    while True:
+        task = survivor.lease("b", LEASE)
+        if task is None:
+            break
+        assert survivor.complete("b", task[0], task[1])
+    assert survivor.stats()[DONE] == 3
+    assert [record["slug"] for record in survivor.iter_results()] == ["s0", "s1", "s2"]
+
+
+def test_task_fails_after_max_attempts(workers, clock):
+    first, second = workers
+    for _ in range(3):
+        assert first.lease("a", LEASE)[0] == "s0"
+        clock.advance(LEASE + 1)
+    # The lease expired on every attempt; the next worker skips it
+    assert second.lease("b", LEASE)[0] == "s1"
+    assert second.stats()[FAILED] == 1
+
+
+def test_released_task_is_pending_again(workers, clock):
+    first, second = workers
+    first.lease("a", LEASE)
+    first.release("a", "s0", "timeout")
+    assert second.lease("b", LEASE)[0] == "s0"
+
+
+def test_concurrent_workers_lease_each_task_once(tmp_path):
+    path = str(tmp_path / "queue.db")
+    with WorkQueue(path) as coordinator:
+        coordinator.enqueue([{"slug": f"s{i}"} for i in range(60)])
+
+    leased = {"a": [], "b": []}
+
+    def work(owner):
+        with WorkQueue(path) as queue:
+            while True:
+                task = queue.lease(owner, 0.5)
+                if task is None:
+                    return
+                leased[owner].append(task[0])
+                assert queue.complete(owner, task[0], task[1])
+
+    threads = [threading.Thread(target=work, args=(owner,)) for owner in leased]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(leased["a"] + leased["b"], key=lambda slug: int(slug[1:])) == [f"s{i}" for i in range(60)]
+    with WorkQueue(path) as coordinator:
+        assert coordinator.stats()[DONE] == 60